@@ -0,0 +1,31 @@
+"""add_contract_file_hash_and_size
+
+Revision ID: 3b7d1c2e9f10
+Revises: 0e8c9a36bbcb
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7d1c2e9f10'
+down_revision: Union[str, None] = '0e8c9a36bbcb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Content hash and size computed while streaming the upload to disk
+    op.add_column('contract_files', sa.Column('sha256', sa.String(length=64), nullable=True))
+    op.add_column('contract_files', sa.Column('file_size', sa.BigInteger(), nullable=True))
+    op.create_index(op.f('ix_contract_files_sha256'), 'contract_files', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_contract_files_sha256'), table_name='contract_files')
+    op.drop_column('contract_files', 'file_size')
+    op.drop_column('contract_files', 'sha256')
@@ -0,0 +1,38 @@
+"""add_file_blobs_table
+
+Revision ID: 8c41f5a2d6e7
+Revises: 3b7d1c2e9f10
+Create Date: 2026-10-16 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41f5a2d6e7'
+down_revision: Union[str, None] = '3b7d1c2e9f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create file_blobs table (content-addressed raw files)
+    op.create_table(
+        'file_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('file_size', sa.BigInteger(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('ocr_text', sa.Text(), nullable=True),
+        sa.Column('ocr_time', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_time', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+
+
+def downgrade() -> None:
+    # Drop file_blobs table
+    op.drop_table('file_blobs')
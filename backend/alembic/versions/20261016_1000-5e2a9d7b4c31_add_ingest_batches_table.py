@@ -0,0 +1,48 @@
+"""add_ingest_batches_table
+
+Revision ID: 5e2a9d7b4c31
+Revises: 8c41f5a2d6e7
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a9d7b4c31'
+down_revision: Union[str, None] = '8c41f5a2d6e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create ingest_batches table (bulk zip / manifest imports)
+    op.create_table(
+        'ingest_batches',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('source_filename', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=False, server_default='processing'),
+        sa.Column('total_contracts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_files', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('skipped_contracts', sa.Text(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.String(length=100), nullable=True),
+        sa.Column('created_time', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('finished_time', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Link contracts to the batch that imported them
+    op.add_column('contracts', sa.Column('batch_id', sa.UUID(), nullable=True))
+    op.create_foreign_key('fk_contracts_batch_id', 'contracts', 'ingest_batches', ['batch_id'], ['id'])
+    op.create_index(op.f('ix_contracts_batch_id'), 'contracts', ['batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_contracts_batch_id'), table_name='contracts')
+    op.drop_constraint('fk_contracts_batch_id', 'contracts', type_='foreignkey')
+    op.drop_column('contracts', 'batch_id')
+    op.drop_table('ingest_batches')
@@ -0,0 +1,43 @@
+"""add_upload_sessions_table
+
+Revision ID: a9f3e6c1b852
+Revises: 5e2a9d7b4c31
+Create Date: 2026-10-16 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9f3e6c1b852'
+down_revision: Union[str, None] = '5e2a9d7b4c31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create upload_sessions table (resumable chunked uploads)
+    op.create_table(
+        'upload_sessions',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('contract_number', sa.String(length=100), nullable=False),
+        sa.Column('contract_type', sa.String(length=50), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('total_size', sa.BigInteger(), nullable=False),
+        sa.Column('received_size', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('temp_path', sa.String(length=500), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False, server_default='uploading'),
+        sa.Column('contract_id', sa.UUID(), nullable=True),
+        sa.Column('created_time', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_time', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['contract_id'], ['contracts.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    # Drop upload_sessions table
+    op.drop_table('upload_sessions')
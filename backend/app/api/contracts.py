@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.core.db import get_db
 from app.schemas.contract import ContractResponse, ContractListResponse
 from app.schemas.review import ReviewRecordCreate, ReviewRecordResponse, ReviewSummary
-from app.models.models import Contract, ReviewRecord, ContractFile
-from app.services.contract_service import ContractService
+from app.schemas.batch import IngestBatchResponse
+from app.models.models import Contract, ReviewRecord, ContractFile, IngestBatch
+from app.services.contract_service import ContractService, UploadTooLargeError
+from app.services.bulk_ingest_service import BulkIngestService, ManifestError
+from app.core.config import settings
 from uuid import UUID
 import os
 
@@ -21,11 +25,24 @@ async def upload_contract(
 ):
     from app.schemas.contract import ContractCreate
 
-    # 读取所有文件内容
-    files_content = []
-    for file in files:
-        file_content = await file.read()
-        files_content.append((file.filename, file_content))
+    service = ContractService()
+
+    # 分块流式写盘，同时校验大小并计算哈希，避免整文件读入内存
+    stored_files = []
+    remaining = settings.max_upload_request_size
+    try:
+        for file in files:
+            stored = await service.save_upload_stream(
+                file, min(settings.max_upload_file_size, remaining)
+            )
+            remaining -= stored.file_size
+            stored_files.append(stored)
+    except UploadTooLargeError as e:
+        await run_in_threadpool(service.discard_stored_files, stored_files)
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception:
+        await run_in_threadpool(service.discard_stored_files, stored_files)
+        raise
 
     # 确保 contract_type 是小写字符串
     contract_type_lower = contract_type.lower() if isinstance(contract_type, str) else str(contract_type).lower()
@@ -36,20 +53,72 @@ async def upload_contract(
         contract_type=contract_type_lower
     )
 
-    # Save contract（支持多文件）
-    service = ContractService()
-    contract = service.create_contract(db, contract_data, files_content)
+    # Save contract（支持多文件）：数据库提交和文件移动放到线程池，避免阻塞事件循环
+    try:
+        contract = await run_in_threadpool(service.create_contract, db, contract_data, stored_files)
+    except Exception:
+        await run_in_threadpool(service.discard_stored_files, stored_files)
+        raise
 
-    # 自动触发 OCR 识别（加入队列）
+    # 自动触发 OCR 识别（加入队列）：发送到 Celery / Redis 是一次网络往返，同样放到线程池
     try:
-        from app.services.ocr_queue import ocr_queue_manager
-        queue_status = ocr_queue_manager.add_task(str(contract.id))
+        from app.tasks.dispatch import dispatch_ocr
+        queue_status = await run_in_threadpool(dispatch_ocr, str(contract.id))
         print(f"Contract {contract.contract_number} added to OCR queue: {queue_status}")
     except Exception as e:
         print(f"Failed to add contract to OCR queue: {e}")
 
     return contract
 
+@router.post("/bulk", response_model=IngestBatchResponse)
+async def bulk_upload_contracts(
+    background_tasks: BackgroundTasks,
+    archive: UploadFile = File(...),
+    manifest: Optional[UploadFile] = File(None),
+    contract_type: str = Form("purchase"),
+    db: Session = Depends(get_db)
+):
+    """
+    批量导入合同（zip 压缩包 + 可选清单）
+
+    压缩包先流式落盘并校验清单，随后在后台批量入库并整批加入 OCR 队列，
+    返回批次 ID，可通过 /batches/{batch_id} 查询进度。
+    """
+    service = BulkIngestService()
+
+    try:
+        stored = await service.contract_service.save_upload_stream(archive, settings.max_bulk_archive_size)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    try:
+        manifest_content = await manifest.read() if manifest else None
+        plan = await run_in_threadpool(
+            service.build_plan,
+            stored.file_path,
+            contract_type.lower(),
+            manifest_content,
+            manifest.filename if manifest else "manifest.json"
+        )
+        batch = await run_in_threadpool(service.create_batch, db, stored.filename, plan)
+    except ManifestError as e:
+        await run_in_threadpool(service.contract_service.discard_stored_files, [stored])
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        await run_in_threadpool(service.contract_service.discard_stored_files, [stored])
+        raise
+
+    background_tasks.add_task(service.ingest, batch.id, stored.file_path, plan)
+    return await run_in_threadpool(service.serialize_batch, db, batch)
+
+@router.get("/batches/{batch_id}", response_model=IngestBatchResponse)
+def get_ingest_batch(batch_id: UUID, db: Session = Depends(get_db)):
+    """查询批量导入进度"""
+    batch = db.query(IngestBatch).filter(IngestBatch.id == batch_id).first()
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return BulkIngestService().serialize_batch(db, batch)
+
 @router.get("/", response_model=list[ContractListResponse])
 def list_contracts(
     skip: int = 0,
@@ -132,23 +201,41 @@ def get_contract(contract_id: str, db: Session = Depends(get_db)):
     return contract
 
 @router.post("/{contract_id}/ocr", response_model=ContractResponse)
-def trigger_ocr(contract_id: str, db: Session = Depends(get_db)):
-    """触发OCR识别（加入队列）"""
-    from app.services.ocr_queue import ocr_queue_manager
+def trigger_ocr(contract_id: str, refresh: bool = False, db: Session = Depends(get_db)):
+    """
+    触发OCR识别（加入队列）
+
+    refresh=true 时清除合同文件缓存的识别结果（按内容哈希复用）和逐页检查点，
+    并且下一次识别不使用页面级 OCR 结果缓存，全部重新请求识别服务；
+    已完成识别的合同（待审核、已完成）也可以刷新。
+    """
+    from app.tasks.dispatch import dispatch_ocr
+    from app.services.blob_store import BlobStore
+    from app.services.contract_service import BLOB_DIR
 
     contract = db.query(Contract).filter(Contract.id == contract_id).first()
     if not contract:
         raise HTTPException(status_code=404, detail="Contract not found")
 
     # 检查状态是否允许触发OCR
-    if contract.status not in ["pending_ocr", "ocr_failed"]:
+    allowed = ["pending_ocr", "ocr_failed"] + (["pending_review", "completed"] if refresh else [])
+    if contract.status not in allowed:
         raise HTTPException(
             status_code=400,
             detail=f"Cannot trigger OCR for contract with status: {contract.status}"
         )
 
+    if refresh:
+        sha256s = [cf.sha256 for cf in db.query(ContractFile).filter(ContractFile.contract_id == contract.id).all()]
+        cleared = BlobStore(BLOB_DIR).clear_ocr_text(db, sha256s)
+        if not sha256s and contract.file_path and os.path.exists(contract.file_path):
+            # 没有 ContractFile 的旧数据
+            from app.services.page_checkpoint import request_refresh
+            request_refresh(contract.file_path)
+        print(f"Cleared cached OCR text for {cleared} files of contract {contract_id}")
+
     # 添加到队列
-    queue_status = ocr_queue_manager.add_task(contract_id)
+    queue_status = dispatch_ocr(contract_id)
 
     # 更新状态
     contract.status = "ocr_processing"
@@ -201,7 +288,10 @@ def delete_contract(contract_id: str, db: Session = Depends(get_db)):
     if not contract:
         raise HTTPException(status_code=404, detail="Contract not found")
 
-    # 删除合同（级联删除关联的parties、extraction_results、review_records）
+    # 释放文件引用，再删除合同（级联删除关联的files、parties、extraction_results、review_records）
+    service = ContractService()
+    for contract_file in contract.files:
+        service.release_contract_file(db, contract_file)
     db.delete(contract)
     db.commit()
 
@@ -220,7 +310,10 @@ def batch_contracts(contract_ids: List[str], db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="No contracts found")
 
     # 删除所有合同
+    service = ContractService()
     for contract in contracts:
+        for contract_file in contract.files:
+            service.release_contract_file(db, contract_file)
         db.delete(contract)
 
     db.commit()
@@ -343,12 +436,8 @@ def delete_contract_file(contract_id: str, file_id: str, db: Session = Depends(g
     if not contract_file:
         raise HTTPException(status_code=404, detail="File not found")
 
-    # 删除物理文件
-    try:
-        if os.path.exists(contract_file.file_path):
-            os.remove(contract_file.file_path)
-    except Exception as e:
-        print(f"Failed to delete file {contract_file.file_path}: {e}")
+    # 释放文件引用（没有其他合同引用时删除物理文件）
+    ContractService().release_contract_file(db, contract_file)
 
     # 删除数据库记录
     db.delete(contract_file)
@@ -5,3 +5,26 @@ router = APIRouter()
 @router.get("/")
 def health_check():
     return {"status": "healthy"}
+
+
+@router.get("/queues")
+def queue_depths():
+    """各阶段排队中的任务数（用于按队列长度扩缩工作节点）"""
+    from app.tasks.dispatch import pipeline_queue_depths
+    return pipeline_queue_depths()
+
+
+@router.get("/metrics")
+def metrics():
+    """
+    本进程的 OCR 运行指标：分级引擎各级页数、耗时和升级次数，服务商限流器的
+    等待时间，以及页面级 OCR 结果缓存的命中率
+    """
+    from app.services.ocr_result_cache import ocr_result_cache_stats
+    from app.services.ocr_service import ocr_engine_stats
+    from app.services.rate_limiter import rate_limiter_stats
+    return {
+        "ocr_engines": ocr_engine_stats(),
+        "rate_limiters": rate_limiter_stats(),
+        "ocr_result_cache": ocr_result_cache_stats()
+    }
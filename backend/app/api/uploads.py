@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from uuid import UUID
+from app.core.db import get_db
+from app.schemas.contract import ContractResponse
+from app.schemas.upload import UploadSessionCreate, UploadSessionResponse
+from app.services.contract_service import UploadTooLargeError
+from app.services.upload_session_service import UploadSessionService, UploadSessionError, UploadOffsetError
+
+router = APIRouter()
+
+
+def _get_session_or_404(service: UploadSessionService, db: Session, session_id: UUID, for_update: bool = False):
+    upload_session = service.get_session(db, session_id, for_update)
+    if not upload_session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return upload_session
+
+
+@router.post("/", response_model=UploadSessionResponse)
+def create_upload_session(data: UploadSessionCreate, db: Session = Depends(get_db)):
+    """创建断点续传会话"""
+    try:
+        return UploadSessionService().create_session(db, data)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+@router.get("/{session_id}", response_model=UploadSessionResponse)
+def get_upload_session(session_id: UUID, db: Session = Depends(get_db)):
+    """查询上传进度，received_size 即续传起始偏移量"""
+    return _get_session_or_404(UploadSessionService(), db, session_id)
+
+
+@router.put("/{session_id}", response_model=UploadSessionResponse)
+async def upload_chunk(session_id: UUID, offset: int, request: Request, db: Session = Depends(get_db)):
+    """
+    上传一个分片（请求体为原始字节），从 offset 处写入临时文件
+
+    offset 超过已接收字节数时返回 409 及正确的偏移量。
+    会话行在写入期间保持锁定，同一会话的并发请求排队执行。
+    """
+    service = UploadSessionService()
+    upload_session = await run_in_threadpool(_get_session_or_404, service, db, session_id, True)
+
+    try:
+        received_size = await service.write_chunk(upload_session, offset, request.stream())
+    except UploadOffsetError as e:
+        return JSONResponse(
+            status_code=409,
+            content={"detail": str(e), "received_size": e.expected_offset}
+        )
+    except UploadSessionError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    return await run_in_threadpool(service.record_progress, db, upload_session, received_size)
+
+
+@router.post("/{session_id}/complete", response_model=ContractResponse)
+def complete_upload(session_id: UUID, db: Session = Depends(get_db)):
+    """完成上传：生成合同文件并加入 OCR 队列"""
+    service = UploadSessionService()
+    upload_session = _get_session_or_404(service, db, session_id, for_update=True)
+
+    try:
+        contract = service.complete(db, upload_session)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    # 自动触发 OCR 识别（加入队列）
+    try:
+        from app.tasks.dispatch import dispatch_ocr
+        queue_status = dispatch_ocr(str(contract.id))
+        print(f"Contract {contract.contract_number} added to OCR queue: {queue_status}")
+    except Exception as e:
+        print(f"Failed to add contract to OCR queue: {e}")
+
+    return contract
+
+
+@router.delete("/{session_id}")
+def abort_upload(session_id: UUID, db: Session = Depends(get_db)):
+    """取消上传并删除临时文件"""
+    service = UploadSessionService()
+    upload_session = _get_session_or_404(service, db, session_id)
+
+    try:
+        service.abort(db, upload_session)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return {"message": "Upload session aborted", "session_id": str(session_id)}
@@ -1,3 +1,5 @@
+import os
+from typing import Dict
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -22,9 +24,65 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = ""
 
     # OCR
-    OCR_PROVIDER: str = "baidu"
+    OCR_PROVIDER: str = "baidu"  # baidu | paddle
     BAIDU_OCR_API_KEY: str = ""
     BAIDU_OCR_SECRET_KEY: str = ""
+    BAIDU_OCR_TIMEOUT: float = 30.0
+    BAIDU_OCR_CONNECT_TIMEOUT: float = 5.0
+    BAIDU_OCR_MAX_CONNECTIONS: int = 20
+    BAIDU_OCR_HTTP2: bool = True
+    BAIDU_TOKEN_REFRESH_MARGIN: int = 86400
+    BAIDU_TOKEN_CACHE_REDIS: bool = False
+    # 分级识别：先用快速引擎（baidu = general_basic，paddle = 本地），不可信时升级到 OCR_PROVIDER；留空关闭
+    OCR_FAST_TIER: str = ""
+    OCR_TIER_MIN_CONFIDENCE: float = 0.9
+    PADDLE_OCR_WORKERS: int = 0  # 0 = CPU 核数
+    PADDLE_OCR_LANG: str = "ch"
+    PADDLE_OCR_USE_ANGLE_CLS: bool = True
+    OCR_IMAGE_MAX_LONG_EDGE: int = 2560
+    OCR_IMAGE_TARGET_KB: int = 1536
+    OCR_IMAGE_DESKEW: bool = False
+    OCR_PDF_PAGE_CONCURRENCY: int = 4
+    PDF_RENDER_WORKERS: int = 0  # 0 = CPU 核数
+    PDF_RENDER_DPI: int = 150
+    # 低置信度页面以更高 DPI 重新渲染识别；0 关闭
+    PDF_RENDER_HIGH_DPI: int = 300
+    OCR_IMAGE_HIGH_MAX_LONG_EDGE: int = 4096
+    OCR_RERENDER_MIN_CONFIDENCE: float = 0.85
+    OCR_RERENDER_MIN_CHARS: int = 20
+    OCR_MEMORY_BUDGET_MB: int = 512
+    OCR_FILE_CONCURRENCY: int = 4
+    # 进程内 OCR 队列和 AI 提取队列各自的工作线程数（即各阶段的并发上限）
+    OCR_QUEUE_WORKERS: int = 4
+    AI_QUEUE_WORKERS: int = 4
+    # AI 提取失败（服务商错误、超时）后的重试次数和退避基数（秒）
+    AI_MAX_RETRIES: int = 3
+    AI_RETRY_BACKOFF: float = 30.0
+    # 启用后 OCR / AI 提取任务发送到 Celery（ocr、ai_extraction 队列），由独立的工作节点处理
+    CELERY_ENABLED: bool = False
+    # 队列存储：memory（进程内，开发环境）或 redis（Redis Streams，持久化，可多进程共享）
+    OCR_QUEUE_BACKEND: str = "memory"
+    OCR_QUEUE_STREAM: str = "contract_scan:ocr_queue"
+    AI_QUEUE_STREAM: str = "contract_scan:ai_queue"
+    OCR_QUEUE_VISIBILITY_TIMEOUT: float = 600.0
+    OCR_QUEUE_DRAIN_TIMEOUT: float = 30.0
+    # 启动时把流程未完成的合同重新入队（仅 redis 队列）
+    OCR_QUEUE_RECONCILE_ON_STARTUP: bool = True
+    OCR_RESULT_CACHE_ENABLED: bool = True
+    OCR_RESULT_CACHE_MAX_MB: int = 512
+
+    # Provider rate limits: "provider=qps" or "provider:endpoint=qps", comma separated
+    PROVIDER_RATE_LIMITS: str = "baidu=10,qwen=5"
+    PROVIDER_MAX_RETRIES: int = 5
+    PROVIDER_BACKOFF_BASE: float = 0.5
+    PROVIDER_BACKOFF_MAX: float = 30.0
+
+    # Upload
+    MAX_UPLOAD_FILE_SIZE_MB: int = 100
+    MAX_UPLOAD_REQUEST_SIZE_MB: int = 1024
+    MAX_BULK_ARCHIVE_SIZE_MB: int = 10240
+    BULK_INSERT_CHUNK_SIZE: int = 1000
+    MAX_RESUMABLE_UPLOAD_SIZE_MB: int = 2048
 
     # Security
     SECRET_KEY: str = "dev-secret-key-change-in-production"
@@ -93,6 +151,191 @@ class Settings(BaseSettings):
     def baidu_ocr_secret_key(self) -> str:
         return self.BAIDU_OCR_SECRET_KEY
 
+    @property
+    def baidu_ocr_timeout(self) -> float:
+        return self.BAIDU_OCR_TIMEOUT
+
+    @property
+    def baidu_ocr_connect_timeout(self) -> float:
+        return self.BAIDU_OCR_CONNECT_TIMEOUT
+
+    @property
+    def baidu_ocr_max_connections(self) -> int:
+        return self.BAIDU_OCR_MAX_CONNECTIONS
+
+    @property
+    def baidu_ocr_http2(self) -> bool:
+        return self.BAIDU_OCR_HTTP2
+
+    @property
+    def baidu_token_refresh_margin(self) -> int:
+        return self.BAIDU_TOKEN_REFRESH_MARGIN
+
+    @property
+    def baidu_token_cache_redis(self) -> bool:
+        return self.BAIDU_TOKEN_CACHE_REDIS
+
+    @property
+    def paddle_ocr_workers(self) -> int:
+        return self.PADDLE_OCR_WORKERS or os.cpu_count() or 1
+
+    @property
+    def paddle_ocr_lang(self) -> str:
+        return self.PADDLE_OCR_LANG
+
+    @property
+    def paddle_ocr_use_angle_cls(self) -> bool:
+        return self.PADDLE_OCR_USE_ANGLE_CLS
+
+    @property
+    def ocr_fast_tier(self) -> str:
+        return self.OCR_FAST_TIER.strip().lower()
+
+    @property
+    def ocr_tier_min_confidence(self) -> float:
+        return self.OCR_TIER_MIN_CONFIDENCE
+
+    @property
+    def ocr_image_max_long_edge(self) -> int:
+        return self.OCR_IMAGE_MAX_LONG_EDGE
+
+    @property
+    def ocr_image_target_bytes(self) -> int:
+        return self.OCR_IMAGE_TARGET_KB * 1024
+
+    @property
+    def ocr_image_deskew(self) -> bool:
+        return self.OCR_IMAGE_DESKEW
+
+    @property
+    def ocr_pdf_page_concurrency(self) -> int:
+        return max(1, self.OCR_PDF_PAGE_CONCURRENCY)
+
+    @property
+    def pdf_render_workers(self) -> int:
+        return self.PDF_RENDER_WORKERS or os.cpu_count() or 1
+
+    @property
+    def pdf_render_dpi(self) -> int:
+        return self.PDF_RENDER_DPI
+
+    @property
+    def pdf_render_high_dpi(self) -> int:
+        return self.PDF_RENDER_HIGH_DPI
+
+    @property
+    def ocr_image_high_max_long_edge(self) -> int:
+        return self.OCR_IMAGE_HIGH_MAX_LONG_EDGE
+
+    @property
+    def ocr_rerender_min_confidence(self) -> float:
+        return self.OCR_RERENDER_MIN_CONFIDENCE
+
+    @property
+    def ocr_rerender_min_chars(self) -> int:
+        return self.OCR_RERENDER_MIN_CHARS
+
+    @property
+    def ocr_memory_budget(self) -> int:
+        return self.OCR_MEMORY_BUDGET_MB * 1024 * 1024
+
+    @property
+    def ocr_file_concurrency(self) -> int:
+        return max(1, self.OCR_FILE_CONCURRENCY)
+
+    @property
+    def ocr_queue_workers(self) -> int:
+        return max(1, self.OCR_QUEUE_WORKERS)
+
+    @property
+    def ai_queue_workers(self) -> int:
+        return max(1, self.AI_QUEUE_WORKERS)
+
+    @property
+    def ai_max_retries(self) -> int:
+        return self.AI_MAX_RETRIES
+
+    @property
+    def ai_retry_backoff(self) -> float:
+        return self.AI_RETRY_BACKOFF
+
+    @property
+    def celery_enabled(self) -> bool:
+        return self.CELERY_ENABLED
+
+    @property
+    def ocr_queue_backend(self) -> str:
+        return self.OCR_QUEUE_BACKEND.strip().lower()
+
+    @property
+    def ocr_queue_stream(self) -> str:
+        return self.OCR_QUEUE_STREAM
+
+    @property
+    def ai_queue_stream(self) -> str:
+        return self.AI_QUEUE_STREAM
+
+    @property
+    def ocr_queue_visibility_timeout(self) -> float:
+        return self.OCR_QUEUE_VISIBILITY_TIMEOUT
+
+    @property
+    def ocr_queue_drain_timeout(self) -> float:
+        return self.OCR_QUEUE_DRAIN_TIMEOUT
+
+    @property
+    def ocr_queue_reconcile_on_startup(self) -> bool:
+        return self.OCR_QUEUE_RECONCILE_ON_STARTUP
+
+    @property
+    def provider_rate_limits(self) -> Dict[str, float]:
+        limits = {}
+        for item in self.PROVIDER_RATE_LIMITS.split(","):
+            if "=" in item:
+                name, rate = item.split("=", 1)
+                limits[name.strip()] = float(rate)
+        return limits
+
+    @property
+    def provider_max_retries(self) -> int:
+        return self.PROVIDER_MAX_RETRIES
+
+    @property
+    def provider_backoff_base(self) -> float:
+        return self.PROVIDER_BACKOFF_BASE
+
+    @property
+    def provider_backoff_max(self) -> float:
+        return self.PROVIDER_BACKOFF_MAX
+
+    @property
+    def ocr_result_cache_enabled(self) -> bool:
+        return self.OCR_RESULT_CACHE_ENABLED
+
+    @property
+    def ocr_result_cache_max_bytes(self) -> int:
+        return self.OCR_RESULT_CACHE_MAX_MB * 1024 * 1024
+
+    @property
+    def max_upload_file_size(self) -> int:
+        return self.MAX_UPLOAD_FILE_SIZE_MB * 1024 * 1024
+
+    @property
+    def max_upload_request_size(self) -> int:
+        return self.MAX_UPLOAD_REQUEST_SIZE_MB * 1024 * 1024
+
+    @property
+    def max_bulk_archive_size(self) -> int:
+        return self.MAX_BULK_ARCHIVE_SIZE_MB * 1024 * 1024
+
+    @property
+    def bulk_insert_chunk_size(self) -> int:
+        return self.BULK_INSERT_CHUNK_SIZE
+
+    @property
+    def max_resumable_upload_size(self) -> int:
+        return self.MAX_RESUMABLE_UPLOAD_SIZE_MB * 1024 * 1024
+
     @property
     def secret_key(self) -> str:
         return self.SECRET_KEY
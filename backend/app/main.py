@@ -1,15 +1,45 @@
+import threading
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import contracts, health
+from app.api import contracts, health, uploads
+from app.core.config import settings
 from app.core.db import engine, Base
 
 app = FastAPI(title="Contract Scanner API", version="1.0.0")
 
 @app.on_event("startup")
 def startup_event():
-    """Create database tables on startup"""
+    """Create database tables on startup, then re-enqueue unfinished contracts"""
     Base.metadata.create_all(bind=engine)
 
+    # 启用 Celery 时任务由 broker 持久化（acks_late），进程内队列不使用。
+    # 进程内队列（memory）看不到其他进程（gunicorn 多 worker）正在处理的合同，对账会重复处理，
+    # 只有 redis 队列按共享的去重集合对账
+    if settings.ocr_queue_reconcile_on_startup and settings.ocr_queue_backend == "redis" \
+            and not settings.celery_enabled:
+        threading.Thread(target=_reconcile_queues, name="queue-reconcile", daemon=True).start()
+
+
+def _reconcile_queues():
+    """在后台对账，不阻塞启动：未完成的合同按状态回到 OCR 或 AI 提取队列"""
+    try:
+        from app.services.ocr_queue import ai_queue_manager, ocr_queue_manager
+        ocr_queue_manager.reconcile()
+        ai_queue_manager.reconcile()
+    except Exception as e:
+        print(f"Queue reconciliation failed: {e}")
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Drain in-flight OCR and AI extraction tasks before the process exits"""
+    import sys
+    # 队列未被使用过时不必为了停止而创建它
+    ocr_queue = sys.modules.get("app.services.ocr_queue")
+    if ocr_queue is not None:
+        ocr_queue.ocr_queue_manager.stop()
+        ocr_queue.ai_queue_manager.stop()
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -19,6 +49,7 @@ app.add_middleware(
 )
 
 app.include_router(health.router, prefix="/health", tags=["health"])
+app.include_router(uploads.router, prefix="/api/contracts/uploads", tags=["uploads"])
 app.include_router(contracts.router, prefix="/api/contracts", tags=["contracts"])
 
 @app.get("/")
@@ -1,8 +1,12 @@
-from app.models.models import Contract, ContractParty, AIExtractionResult, ReviewRecord
+from app.models.models import Contract, ContractFile, FileBlob, IngestBatch, UploadSession, ContractParty, AIExtractionResult, ReviewRecord
 from app.models.enums import ContractType, ContractStatus, PartyType
 
 __all__ = [
     "Contract",
+    "ContractFile",
+    "FileBlob",
+    "IngestBatch",
+    "UploadSession",
     "ContractParty",
     "AIExtractionResult",
     "ReviewRecord",
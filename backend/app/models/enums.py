@@ -8,6 +8,7 @@ class ContractType(str, Enum):
 class ContractStatus(str, Enum):
     PENDING_OCR = "pending_ocr"
     OCR_PROCESSING = "ocr_processing"
+    OCR_FAILED = "ocr_failed"  # 部分文件识别失败，可重新触发 OCR
     PENDING_AI = "pending_ai"
     AI_PROCESSING = "ai_processing"
     PENDING_REVIEW = "pending_review"
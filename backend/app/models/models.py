@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, Numeric, Boolean, ForeignKey, Enum as SQLEnum, Float, Index, Integer
+from sqlalchemy import Column, String, DateTime, Text, Numeric, Boolean, ForeignKey, Enum as SQLEnum, Float, Index, Integer, BigInteger
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -18,6 +18,7 @@ class Contract(Base):
     status = Column(String(50), nullable=False, index=True, server_default="pending_ocr")  # 改用字符串
     upload_time = Column(DateTime(timezone=True), server_default=func.now())
     created_by = Column(String(100))
+    batch_id = Column(UUID(as_uuid=True), ForeignKey("ingest_batches.id"), index=True)  # 批量导入批次
 
     # 提取字段
     total_amount = Column(Numeric(15, 2))
@@ -41,6 +42,40 @@ class Contract(Base):
     )
 
 
+class IngestBatch(Base):
+    """批量导入批次 - 记录一次压缩包/清单导入"""
+    __tablename__ = "ingest_batches"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    source_filename = Column(String(255))
+    status = Column(String(50), nullable=False, server_default="processing")  # processing / completed / failed
+    total_contracts = Column(Integer, nullable=False, default=0)
+    total_files = Column(Integer, nullable=False, default=0)
+    skipped_contracts = Column(Text)  # JSON，已存在而跳过的合同编号
+    error_message = Column(Text)
+    created_by = Column(String(100))
+    created_time = Column(DateTime(timezone=True), server_default=func.now())
+    finished_time = Column(DateTime(timezone=True))
+
+
+class UploadSession(Base):
+    """断点续传会话 - 分片追加到 RAW_DIR 下的临时文件，完成后生成 ContractFile"""
+    __tablename__ = "upload_sessions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    contract_number = Column(String(100), nullable=False)
+    contract_type = Column(String(50), nullable=False)
+    filename = Column(String(255), nullable=False)
+    total_size = Column(BigInteger, nullable=False)
+    received_size = Column(BigInteger, nullable=False, default=0)  # 已接收字节数，即下一个分片的偏移量
+    temp_path = Column(String(500), nullable=False)
+    status = Column(String(50), nullable=False, server_default="uploading")  # uploading / completed / aborted
+    # 完成后关联的合同；删除合同时会话保留，关联置空
+    contract_id = Column(UUID(as_uuid=True), ForeignKey("contracts.id", ondelete="SET NULL"))
+    created_time = Column(DateTime(timezone=True), server_default=func.now())
+    updated_time = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class ContractFile(Base):
     """合同文件模型 - 支持一个合同多个文件"""
     __tablename__ = "contract_files"
@@ -50,11 +85,26 @@ class ContractFile(Base):
     file_path = Column(String(500), nullable=False)
     filename = Column(String(255), nullable=False)
     file_order = Column(Integer, nullable=False, default=0)  # 文件顺序
+    sha256 = Column(String(64), index=True)  # 上传时计算的内容哈希
+    file_size = Column(BigInteger)
     upload_time = Column(DateTime(timezone=True), server_default=func.now())
 
     contract = relationship("Contract", back_populates="files")
 
 
+class FileBlob(Base):
+    """内容寻址的原始文件 - 相同内容只存一份，按引用计数回收"""
+    __tablename__ = "file_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    file_path = Column(String(500), nullable=False)
+    file_size = Column(BigInteger)
+    ref_count = Column(Integer, nullable=False, default=0)  # 引用该内容的 ContractFile 数量
+    ocr_text = Column(Text)  # 识别结果，重复上传时直接复用
+    ocr_time = Column(DateTime(timezone=True))
+    created_time = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class ContractParty(Base):
     __tablename__ = "contract_parties"
 
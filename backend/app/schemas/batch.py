@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+
+class IngestBatchResponse(BaseModel):
+    id: UUID
+    source_filename: Optional[str] = None
+    status: str = Field(..., description="processing / completed / failed")
+    total_contracts: int
+    total_files: int
+    skipped_contracts: List[str] = Field(default_factory=list, description="已存在而跳过的合同编号")
+    error_message: Optional[str] = None
+    created_time: Optional[datetime] = None
+    finished_time: Optional[datetime] = None
+    status_counts: Dict[str, int] = Field(default_factory=dict, description="批次内各状态合同数量")
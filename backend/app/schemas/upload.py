@@ -0,0 +1,22 @@
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+class UploadSessionCreate(BaseModel):
+    contract_number: str = Field(..., description="合同编号，已存在时文件追加到该合同")
+    contract_type: str = Field("purchase", description="新建合同时使用的合同类型")
+    filename: str = Field(..., description="原始文件名")
+    total_size: int = Field(..., gt=0, description="文件总字节数")
+
+class UploadSessionResponse(BaseModel):
+    id: UUID
+    contract_number: str
+    filename: str
+    total_size: int
+    received_size: int = Field(..., description="已接收字节数，即下一个分片的偏移量")
+    status: str
+    contract_id: Optional[UUID] = None
+    created_time: Optional[datetime] = None
+    updated_time: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
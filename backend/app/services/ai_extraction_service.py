@@ -5,6 +5,7 @@ from typing import Dict, Any, Optional
 import httpx
 import os
 from app.core.config import settings
+from app.services.rate_limiter import ThrottledError, call_with_backoff, get_rate_limiter, parse_retry_after
 
 
 class AIExtractionService:
@@ -16,6 +17,7 @@ class AIExtractionService:
         self.api_key = settings.qwen_api_key
         self.api_url = "https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions"
         self.model_version = "qwen-plus"
+        self.rate_limiter = get_rate_limiter("qwen", self.model_version)
 
     def _build_extraction_prompt(self, text: str) -> str:
         """Build prompt for contract field extraction"""
@@ -73,13 +75,19 @@ class AIExtractionService:
         }
 
         async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                self.api_url,
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            result = response.json()
+            async def send():
+                response = await client.post(
+                    self.api_url,
+                    headers=headers,
+                    json=payload
+                )
+                if response.status_code == 429:
+                    raise ThrottledError("HTTP 429", parse_retry_after(response.headers.get("Retry-After")))
+                response.raise_for_status()
+                return response.json()
+
+            # 按 Qwen 限额取令牌，429 时退避重试
+            result = await call_with_backoff(self.rate_limiter, send)
 
         # Parse response
         ai_message = result["choices"][0]["message"]["content"]
@@ -0,0 +1,166 @@
+"""Asyncio Baidu OCR client on a shared, pooled HTTP connection"""
+
+import asyncio
+import base64
+import threading
+import weakref
+from typing import Optional
+import httpx
+from app.core.config import settings
+from app.services.baidu_token_cache import INVALID_TOKEN_ERROR_CODES, get_token_cache
+from app.services.image_preprocessor import ImagePreprocessor
+from app.services.ocr_engine import PageOCRResult, weighted_confidence
+from app.services.ocr_result_cache import OCRResultCache, get_ocr_result_cache
+from app.services.rate_limiter import ThrottledError, call_with_backoff, get_rate_limiter, parse_retry_after
+
+BAIDU_OCR_URL = "https://aip.baidubce.com/rest/2.0/ocr/v1/{endpoint}"
+
+# 百度 QPS 超限错误码
+THROTTLED_ERROR_CODES = (18,)
+
+# 每个事件循环一个客户端：httpx 的连接绑定在创建它的事件循环上
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _http2_available() -> bool:
+    """HTTP/2 需要安装 h2（httpx[http2]），未安装时退回 HTTP/1.1 keep-alive"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """当前事件循环共享的连接池客户端"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=settings.baidu_ocr_http2 and _http2_available(),
+            timeout=httpx.Timeout(settings.baidu_ocr_timeout, connect=settings.baidu_ocr_connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.baidu_ocr_max_connections,
+                max_keepalive_connections=settings.baidu_ocr_max_connections,
+                keepalive_expiry=60.0
+            )
+        )
+        _clients[loop] = client
+    return client
+
+
+class BackgroundLoop:
+    """常驻后台的事件循环线程，供同步代码（队列工作线程、Celery 任务）提交协程"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name=self.name, daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """在后台事件循环上执行协程并阻塞等待结果，可被多个线程同时调用"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result(timeout)
+
+
+# 进程内所有同步调用方共享同一个事件循环和连接池
+background_loop = BackgroundLoop("baidu-ocr-loop")
+
+
+class AsyncBaiduOCRService:
+    """asyncio 版百度 OCR 客户端，与 BaiduOCRService 提供相同的 extract_text_from_image"""
+
+    def __init__(self, endpoint: str = "accurate_basic"):
+        self.api_key = settings.baidu_ocr_api_key
+        self.secret_key = settings.baidu_ocr_secret_key
+        self.endpoint = endpoint
+        self.token_cache = get_token_cache(self.api_key, self.secret_key)
+        self.preprocessor = ImagePreprocessor()
+        self.result_cache = get_ocr_result_cache()
+        self.rate_limiter = get_rate_limiter("baidu", endpoint)
+
+    async def get_access_token(self) -> str:
+        """Get Baidu OCR access token (shared across the process)"""
+        return await self.token_cache.get_token_async()
+
+    def load_image(self, image_path: str) -> bytes:
+        """读取并预处理图片（CPU 密集，不要在事件循环线程中调用）"""
+        with open(image_path, 'rb') as f:
+            return self.prepare_image(f.read())
+
+    def prepare_image(self, image_data: bytes) -> bytes:
+        """预处理内存中的图片字节，失败时返回原图"""
+        try:
+            return self.preprocessor.normalize(image_data)
+        except Exception as e:
+            # 预处理失败时仍按原图识别
+            print(f"Image preprocessing failed, sending original image: {e}")
+            return image_data
+
+    async def recognize(self, image_data: bytes, use_cache: bool = True) -> str:
+        """识别预处理后的图片"""
+        return (await self.recognize_page(image_data, use_cache)).text
+
+    async def recognize_page(self, image_data: bytes, use_cache: bool = True) -> PageOCRResult:
+        """
+        识别预处理后的图片，返回文本和平均行置信度
+
+        相同图片（同一引擎和接口）命中结果缓存时不再请求百度；use_cache=False 时
+        跳过缓存直接请求，并用新结果覆盖缓存。
+        """
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = OCRResultCache.make_key(image_data, "baidu", self.endpoint)
+            cached = self.result_cache.lookup(cache_key) if use_cache else None
+            if cached is not None:
+                return PageOCRResult(*cached)
+
+        result = await self._request(base64.b64encode(image_data).decode())
+        if cache_key is not None:
+            self.result_cache.put(cache_key, result.text, result.confidence)
+        return result
+
+    async def _request(self, image_base64: str) -> PageOCRResult:
+        """按接口限流调用 OCR，被限流时退避重试"""
+        return await call_with_backoff(self.rate_limiter, lambda: self._post(image_base64))
+
+    async def _post(self, image_base64: str) -> PageOCRResult:
+        """调用 OCR 接口识别已编码的图片，token 失效时刷新后重试一次"""
+        for attempt in range(2):
+            access_token = await self.get_access_token()
+
+            response = await get_http_client().post(
+                BAIDU_OCR_URL.format(endpoint=self.endpoint),
+                params={"access_token": access_token},
+                # probability=true 时每行返回置信度，用于判断是否需要高分辨率重新识别
+                data={"image": image_base64, "probability": "true"}
+            )
+            if response.status_code == 429:
+                raise ThrottledError("HTTP 429", parse_retry_after(response.headers.get("Retry-After")))
+            result = response.json()
+
+            if "words_result" in result:
+                lines = [
+                    (item["words"], item["probability"]["average"])
+                    for item in result["words_result"] if "probability" in item
+                ]
+                text_lines = [item["words"] for item in result["words_result"]]
+                return PageOCRResult('\n'.join(text_lines), weighted_confidence(lines))
+            if result.get("error_code") in INVALID_TOKEN_ERROR_CODES and attempt == 0:
+                self.token_cache.invalidate(access_token)
+                continue
+            if result.get("error_code") in THROTTLED_ERROR_CODES:
+                raise ThrottledError(f"Baidu error_code {result['error_code']}: {result.get('error_msg')}")
+            raise Exception(f"Baidu OCR error: {result}")
+
+    async def extract_text_from_image(self, image_path: str) -> str:
+        """Extract text from image using Baidu OCR"""
+        image_data = await asyncio.to_thread(self.load_image, image_path)
+        return await self.recognize(image_data)
@@ -0,0 +1,180 @@
+"""Process-wide Baidu OCR access-token cache"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import httpx
+from app.core.config import settings
+
+BAIDU_TOKEN_URL = "https://aip.baidubce.com/oauth/2.0/token"
+
+# 百度返回这些错误码时说明 token 失效，需要刷新后重试
+INVALID_TOKEN_ERROR_CODES = (110, 111)
+
+
+class BaiduTokenCache:
+    """
+    百度 access token 缓存
+
+    - 按 expires_in 计算过期时间，临近过期时后台线程提前刷新，调用方继续使用旧 token
+    - 同一时刻只有一个刷新请求，并发调用方等待并共享结果
+    - 可选写入 Redis，多个 worker 进程共享同一个 token
+    """
+
+    # 过期前预留的安全时间（秒），避免请求途中过期
+    EXPIRY_SAFETY = 60
+
+    def __init__(self, api_key: str, secret_key: str, redis_url: Optional[str] = None):
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._redis = None
+        if redis_url:
+            import redis
+            self._redis = redis.Redis.from_url(redis_url)
+        key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+        self._redis_key = f"baidu_ocr:token:{key_hash}"
+
+    def _is_valid(self, now: float) -> bool:
+        return self._token is not None and now < self._expires_at
+
+    def _set_token(self, token: str, expires_at: float):
+        lifetime = max(expires_at - time.time(), 0)
+        self._token = token
+        self._expires_at = expires_at - self.EXPIRY_SAFETY
+        self._refresh_at = expires_at - min(settings.baidu_token_refresh_margin, lifetime * 0.1)
+
+    def get_token(self) -> str:
+        """获取有效 token（必要时阻塞等待刷新）"""
+        now = time.time()
+        if self._is_valid(now):
+            if now >= self._refresh_at:
+                self._refresh_in_background()
+            return self._token
+
+        with self._lock:
+            # 等锁期间可能已被其他线程刷新
+            if self._is_valid(time.time()):
+                return self._token
+            token, expires_at = self._load_or_fetch()
+            self._set_token(token, expires_at)
+            return token
+
+    async def get_token_async(self) -> str:
+        """异步版本：缓存有效时直接返回，否则在线程中刷新，不阻塞事件循环"""
+        if self._is_valid(time.time()):
+            if time.time() >= self._refresh_at:
+                self._refresh_in_background()
+            return self._token
+        return await asyncio.to_thread(self.get_token)
+
+    def invalidate(self, token: str):
+        """标记 token 失效（仅当它仍是当前 token 时），下次调用会重新获取"""
+        with self._lock:
+            if self._token == token:
+                self._token = None
+                self._expires_at = 0.0
+            if self._redis is not None:
+                try:
+                    cached = self._redis.get(self._redis_key)
+                    if cached and json.loads(cached)["access_token"] == token:
+                        self._redis.delete(self._redis_key)
+                except Exception as e:
+                    print(f"Failed to invalidate Baidu token in Redis: {e}")
+
+    def _refresh_in_background(self):
+        """临近过期时在后台刷新，同一时刻只启动一个刷新线程"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                token, expires_at = self._fetch_shared(force=True)
+                with self._lock:
+                    self._set_token(token, expires_at)
+            except Exception as e:
+                print(f"Background Baidu token refresh failed: {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, name="baidu-token-refresh", daemon=True).start()
+
+    def _load_or_fetch(self) -> Tuple[str, float]:
+        return self._fetch_shared(force=False)
+
+    def _fetch_shared(self, force: bool) -> Tuple[str, float]:
+        """
+        获取 token：启用 Redis 时先读共享缓存，并用分布式锁保证只有一个进程请求百度
+        """
+        if self._redis is None:
+            return self._fetch()
+
+        try:
+            if not force:
+                cached = self._read_redis()
+                if cached:
+                    return cached
+            with self._redis.lock(f"{self._redis_key}:lock", timeout=30, blocking_timeout=30):
+                cached = self._read_redis()
+                # 强制刷新时，如果其他进程刚刷新过（离过期还很远）就直接复用
+                if cached and (not force or cached[1] - time.time() > settings.baidu_token_refresh_margin):
+                    return cached
+                token, expires_at = self._fetch()
+                self._redis.set(
+                    self._redis_key,
+                    json.dumps({"access_token": token, "expires_at": expires_at}),
+                    ex=max(int(expires_at - time.time()), 1)
+                )
+                return token, expires_at
+        except Exception as e:
+            # Redis 不可用时退回进程内缓存
+            print(f"Baidu token Redis cache unavailable: {e}")
+            return self._fetch()
+
+    def _read_redis(self) -> Optional[Tuple[str, float]]:
+        cached = self._redis.get(self._redis_key)
+        if not cached:
+            return None
+        data = json.loads(cached)
+        if data["expires_at"] - self.EXPIRY_SAFETY <= time.time():
+            return None
+        return data["access_token"], data["expires_at"]
+
+    def _fetch(self) -> Tuple[str, float]:
+        """向百度请求新 token，返回 (token, 过期时间戳)"""
+        params = {
+            "grant_type": "client_credentials",
+            "client_id": self.api_key,
+            "client_secret": self.secret_key
+        }
+        response = httpx.post(BAIDU_TOKEN_URL, params=params, timeout=settings.baidu_ocr_timeout)
+        result = response.json()
+
+        if "access_token" in result:
+            return result["access_token"], time.time() + float(result.get("expires_in", 2592000))
+        else:
+            raise Exception(f"Failed to get access token: {result}")
+
+
+_caches: Dict[str, BaiduTokenCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_token_cache(api_key: str, secret_key: str) -> BaiduTokenCache:
+    """进程内按 API Key 共享的 token 缓存"""
+    with _caches_lock:
+        cache = _caches.get(api_key)
+        if cache is None:
+            redis_url = settings.redis_url if settings.baidu_token_cache_redis else None
+            cache = BaiduTokenCache(api_key, secret_key, redis_url)
+            _caches[api_key] = cache
+        return cache
@@ -0,0 +1,186 @@
+"""Content-addressed raw file store"""
+
+import glob
+import os
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.models import FileBlob
+
+
+class BlobStore:
+    """按 SHA-256 寻址的原始文件存储，同一内容只保存一份并记录引用计数"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def blob_path(self, sha256: str, filename: str) -> Path:
+        """内容哈希对应的存储路径（保留扩展名供 OCR 判断文件类型）"""
+        ext = os.path.splitext(filename)[1].lower()
+        return self.root / sha256[:2] / f"{sha256}{ext}"
+
+    def get(self, db: Session, sha256: Optional[str], for_update: bool = False) -> Optional[FileBlob]:
+        """按哈希获取存储记录"""
+        if not sha256:
+            return None
+        query = db.query(FileBlob).filter(FileBlob.sha256 == sha256)
+        if for_update:
+            query = query.with_for_update()
+        return query.first()
+
+    def add_file(self, db: Session, staged_path: str, sha256: str, file_size: int, filename: str) -> FileBlob:
+        """
+        将已落盘的临时文件纳入存储并增加一次引用
+
+        内容已存在时直接丢弃临时文件，只增加引用计数。调用方负责提交事务。
+
+        Args:
+            db: 数据库会话
+            staged_path: 临时文件路径（需与存储目录位于同一文件系统）
+            sha256: 文件内容哈希
+            file_size: 文件大小
+            filename: 原始文件名
+
+        Returns:
+            对应的存储记录
+        """
+        blob = self.get(db, sha256, for_update=True)
+        if blob is None:
+            target = self.blob_path(sha256, filename)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(staged_path, target)
+            blob = FileBlob(sha256=sha256, file_path=str(target), file_size=file_size, ref_count=0)
+            try:
+                with db.begin_nested():
+                    db.add(blob)
+            except IntegrityError:
+                # 并发上传了相同内容，改为引用已有记录
+                blob = self.get(db, sha256, for_update=True)
+        elif not os.path.exists(blob.file_path):
+            # 文件被误删时用本次上传的内容恢复
+            Path(blob.file_path).parent.mkdir(parents=True, exist_ok=True)
+            os.replace(staged_path, blob.file_path)
+        else:
+            Path(staged_path).unlink(missing_ok=True)
+
+        blob.ref_count += 1
+        return blob
+
+    def add_files(self, db: Session, staged_files: List) -> Dict[str, str]:
+        """
+        批量纳入暂存文件，一次查询已有记录、一次批量插入新记录
+
+        Args:
+            db: 数据库会话
+            staged_files: StoredFile 列表（filename, file_path, sha256, file_size）
+
+        Returns:
+            {sha256: 存储路径}，调用方负责提交事务
+        """
+        counts = Counter(stored.sha256 for stored in staged_files)
+        existing = {}
+        hashes = list(counts)
+        for start in range(0, len(hashes), 1000):
+            blobs = db.query(FileBlob)\
+                .filter(FileBlob.sha256.in_(hashes[start:start + 1000]))\
+                .with_for_update()\
+                .all()
+            existing.update({blob.sha256: blob for blob in blobs})
+
+        paths = {sha256: blob.file_path for sha256, blob in existing.items()}
+        new_rows = []
+        for stored in staged_files:
+            if stored.sha256 in paths:
+                if os.path.exists(paths[stored.sha256]):
+                    Path(stored.file_path).unlink(missing_ok=True)
+                    continue
+                target = Path(paths[stored.sha256])
+            else:
+                target = self.blob_path(stored.sha256, stored.filename)
+                paths[stored.sha256] = str(target)
+                new_rows.append({
+                    "sha256": stored.sha256,
+                    "file_path": str(target),
+                    "file_size": stored.file_size,
+                    "ref_count": counts[stored.sha256],
+                })
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(stored.file_path, target)
+
+        for sha256, blob in existing.items():
+            blob.ref_count += counts[sha256]
+        if new_rows:
+            db.execute(insert(FileBlob), new_rows)
+        return paths
+
+    def release(self, db: Session, sha256: Optional[str], file_path: str):
+        """
+        释放一次引用，计数归零时删除文件和记录
+
+        没有存储记录的旧文件（去重之前上传的）直接删除物理文件。调用方负责提交事务。
+        """
+        blob = self.get(db, sha256, for_update=True)
+        if blob is None:
+            self._remove_file(file_path)
+            return
+
+        blob.ref_count -= 1
+        if blob.ref_count <= 0:
+            self._remove_file(blob.file_path)
+            db.delete(blob)
+
+    @staticmethod
+    def _remove_file(file_path: str):
+        """删除文件及其旁边的派生文件（如 <文件>.pages.json 页面分类）"""
+        path = Path(file_path)
+        try:
+            for sidecar in path.parent.glob(f"{glob.escape(path.name)}.*"):
+                sidecar.unlink()
+            if path.exists():
+                path.unlink()
+        except Exception as e:
+            print(f"Failed to delete file {file_path}: {e}")
+
+    def get_ocr_text(self, db: Session, sha256: Optional[str]) -> Optional[str]:
+        """获取已识别过的文本，未识别返回 None"""
+        blob = self.get(db, sha256)
+        return blob.ocr_text if blob else None
+
+    def save_ocr_text(self, db: Session, sha256: Optional[str], text: str):
+        """
+        记录文件内容的识别结果，调用方负责提交事务
+
+        结果会被之后所有相同内容的文件复用，只应在识别无错误时调用；
+        空文本不缓存，下次仍重新识别。
+        """
+        if not text.strip():
+            return
+        blob = self.get(db, sha256)
+        if blob is not None:
+            blob.ocr_text = text
+            blob.ocr_time = datetime.utcnow()
+
+    def clear_ocr_text(self, db: Session, sha256s: List[Optional[str]]) -> int:
+        """
+        清除缓存的识别结果和逐页检查点，下次识别从头开始且不使用页面级 OCR 结果缓存，
+        调用方负责提交事务
+
+        Returns:
+            清除的记录数
+        """
+        from app.services.page_checkpoint import request_refresh
+
+        hashes = [sha256 for sha256 in set(sha256s) if sha256]
+        if not hashes:
+            return 0
+        blobs = db.query(FileBlob).filter(FileBlob.sha256.in_(hashes)).all()
+        for blob in blobs:
+            blob.ocr_text = None
+            blob.ocr_time = None
+            if os.path.exists(blob.file_path):
+                request_refresh(blob.file_path)
+        return len(blobs)
@@ -0,0 +1,309 @@
+"""Bulk contract ingestion from zip archives and manifests"""
+
+import csv
+import io
+import json
+import os
+import uuid
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.models.models import Contract, ContractFile, IngestBatch
+from app.services.contract_service import ContractService
+
+# OCR 支持的文件类型，其余条目（如 Thumbs.db）在目录模式下忽略
+SUPPORTED_EXTENSIONS = ('.pdf', '.png', '.jpg', '.jpeg', '.docx')
+MANIFEST_NAMES = ('manifest.json', 'manifest.csv')
+
+
+class ManifestError(ValueError):
+    """清单或压缩包内容无效"""
+
+
+class BulkIngestService:
+    """批量导入：解析压缩包/清单，分块落盘，批量插入合同和文件记录"""
+
+    def __init__(self):
+        self.contract_service = ContractService()
+
+    def parse_manifest(self, content: bytes, filename: str) -> List[dict]:
+        """
+        解析导入清单
+
+        支持两种格式：
+        - JSON: [{"contract_number", "contract_type"?, "files": [...]}, ...]
+          或 {"合同编号": ["文件", ...], ...}
+        - CSV: contract_number, contract_type(可选), file，每行一个文件，按行序排列
+
+        Returns:
+            [{"contract_number", "contract_type", "files"}, ...]
+        """
+        text = content.decode('utf-8-sig')
+        entries: Dict[str, dict] = {}
+
+        def add(number, contract_type, files):
+            number = str(number or '').strip()
+            if not number:
+                raise ManifestError("Manifest entry without contract_number")
+            entry = entries.setdefault(number, {
+                "contract_number": number,
+                "contract_type": None,
+                "files": []
+            })
+            if contract_type:
+                entry["contract_type"] = str(contract_type).strip().lower()
+            entry["files"].extend(f.strip().lstrip('/') for f in files if f and f.strip())
+
+        if filename.lower().endswith('.csv'):
+            reader = csv.DictReader(io.StringIO(text))
+            if not reader.fieldnames or not {'contract_number', 'file'} <= set(reader.fieldnames):
+                raise ManifestError("CSV manifest requires contract_number and file columns")
+            for row in reader:
+                add(row.get('contract_number'), row.get('contract_type'), [row.get('file') or ''])
+        else:
+            try:
+                data = json.loads(text)
+            except json.JSONDecodeError as e:
+                raise ManifestError(f"Invalid JSON manifest: {e}")
+            if isinstance(data, dict):
+                for number, files in data.items():
+                    add(number, None, files if isinstance(files, list) else [files])
+            elif isinstance(data, list):
+                for item in data:
+                    if not isinstance(item, dict):
+                        raise ManifestError("JSON manifest items must be objects")
+                    add(item.get('contract_number'), item.get('contract_type'), item.get('files') or [])
+            else:
+                raise ManifestError("JSON manifest must be a list or an object")
+
+        return list(entries.values())
+
+    def _member_names(self, zf: zipfile.ZipFile) -> Dict[str, zipfile.ZipInfo]:
+        """压缩包内的文件条目，未标记 UTF-8 的文件名按 GBK 还原中文"""
+        members = {}
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            name = info.filename
+            if not info.flag_bits & 0x800:
+                try:
+                    name = name.encode('cp437').decode('gbk')
+                except (UnicodeEncodeError, UnicodeDecodeError):
+                    pass
+            if name.startswith('__MACOSX/') or os.path.basename(name).startswith('.'):
+                continue
+            members[name] = info
+        return members
+
+    def build_plan(
+        self,
+        archive_path: str,
+        default_type: str,
+        manifest_content: Optional[bytes] = None,
+        manifest_name: str = "manifest.json"
+    ) -> List[dict]:
+        """
+        根据清单或目录结构生成导入计划（只读取压缩包目录，不解压内容）
+
+        没有单独上传清单时，依次查找压缩包根目录下的 manifest.json / manifest.csv；
+        都没有则按“一级目录名 = 合同编号”的目录结构导入。
+
+        Returns:
+            [{"contract_number", "contract_type", "files": [(条目名, 文件名), ...]}, ...]
+
+        Raises:
+            ManifestError: 压缩包无效或清单引用了不存在的文件
+        """
+        try:
+            zf = zipfile.ZipFile(archive_path)
+        except zipfile.BadZipFile as e:
+            raise ManifestError(f"Invalid zip archive: {e}")
+
+        with zf:
+            members = self._member_names(zf)
+
+            if manifest_content is None:
+                for name in MANIFEST_NAMES:
+                    if name in members:
+                        manifest_content = zf.read(members[name])
+                        manifest_name = name
+                        break
+
+            if manifest_content is not None:
+                entries = self.parse_manifest(manifest_content, manifest_name)
+            else:
+                grouped: Dict[str, dict] = {}
+                for name in sorted(members):
+                    parts = name.split('/')
+                    if len(parts) < 2 or not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                        continue
+                    entry = grouped.setdefault(parts[0], {
+                        "contract_number": parts[0],
+                        "contract_type": None,
+                        "files": []
+                    })
+                    entry["files"].append(name)
+                entries = list(grouped.values())
+
+            plan = []
+            for entry in entries:
+                if not entry["files"]:
+                    raise ManifestError(f"Contract {entry['contract_number']} has no files")
+                files = []
+                for name in entry["files"]:
+                    info = members.get(name)
+                    if info is None:
+                        raise ManifestError(f"File {name} listed for {entry['contract_number']} is not in the archive")
+                    if info.file_size > settings.max_upload_file_size:
+                        raise ManifestError(f"File {name} exceeds the upload limit")
+                    files.append((info.filename, os.path.basename(name)))
+                plan.append({
+                    "contract_number": entry["contract_number"],
+                    "contract_type": entry["contract_type"] or default_type,
+                    "files": files
+                })
+
+        if not plan:
+            raise ManifestError("No contracts found in archive")
+        return plan
+
+    def create_batch(self, db: Session, source_filename: str, plan: List[dict], created_by: str = None) -> IngestBatch:
+        """创建导入批次记录"""
+        batch = IngestBatch(
+            source_filename=source_filename,
+            status="processing",
+            total_contracts=len(plan),
+            total_files=sum(len(entry["files"]) for entry in plan),
+            created_by=created_by or "system"
+        )
+        db.add(batch)
+        db.commit()
+        db.refresh(batch)
+        return batch
+
+    def ingest(self, batch_id, archive_path: str, plan: List[dict], created_by: str = None):
+        """
+        执行导入：逐条流式解出文件，单个事务内批量插入合同和文件，最后一次性加入 OCR 队列
+
+        在后台任务中运行，使用独立的数据库会话。
+        """
+        db = SessionLocal()
+        staged = []
+        blob_paths = {}
+        try:
+            batch = db.query(IngestBatch).filter(IngestBatch.id == batch_id).first()
+
+            # 已存在的合同编号跳过，避免唯一约束冲突导致整批失败
+            numbers = [entry["contract_number"] for entry in plan]
+            existing = set()
+            for start in range(0, len(numbers), 1000):
+                rows = db.query(Contract.contract_number)\
+                    .filter(Contract.contract_number.in_(numbers[start:start + 1000]))\
+                    .all()
+                existing.update(row[0] for row in rows)
+
+            now = datetime.utcnow()
+            contract_rows = []
+            file_rows = []
+            with zipfile.ZipFile(archive_path) as zf:
+                for entry in plan:
+                    if entry["contract_number"] in existing:
+                        continue
+                    contract_id = uuid.uuid4()
+                    contract_rows.append({
+                        "id": contract_id,
+                        "contract_number": entry["contract_number"],
+                        "contract_type": entry["contract_type"],
+                        "file_path": "",  # 兼容旧字段
+                        "status": "pending_ocr",
+                        "upload_time": now,
+                        "created_by": created_by or "system",
+                        "requires_review": True,
+                        "batch_id": batch_id
+                    })
+                    for order, (member, filename) in enumerate(entry["files"]):
+                        with zf.open(member) as stream:
+                            stored = self.contract_service.stage_stream(
+                                stream, filename, settings.max_upload_file_size
+                            )
+                        staged.append(stored)
+                        file_rows.append({
+                            "id": uuid.uuid4(),
+                            "contract_id": contract_id,
+                            "filename": filename,
+                            "file_order": order,
+                            "sha256": stored.sha256,
+                            "file_size": stored.file_size,
+                            "upload_time": now
+                        })
+
+            blob_paths = self.contract_service.blob_store.add_files(db, staged)
+            staged = []
+            for row in file_rows:
+                row["file_path"] = blob_paths[row["sha256"]]
+
+            chunk = settings.bulk_insert_chunk_size
+            for start in range(0, len(contract_rows), chunk):
+                db.execute(insert(Contract), contract_rows[start:start + chunk])
+            for start in range(0, len(file_rows), chunk):
+                db.execute(insert(ContractFile), file_rows[start:start + chunk])
+
+            skipped = [number for number in numbers if number in existing]
+            batch.status = "completed"
+            batch.total_contracts = len(contract_rows)
+            batch.total_files = len(file_rows)
+            batch.skipped_contracts = json.dumps(skipped, ensure_ascii=False) if skipped else None
+            batch.finished_time = datetime.utcnow()
+            db.commit()
+        except Exception as e:
+            print(f"Bulk ingest failed for batch {batch_id}: {e}")
+            db.rollback()
+            self.contract_service.discard_stored_files(staged)
+            # 回滚后没有记录的新文件需要清理
+            for sha256, path in blob_paths.items():
+                if self.contract_service.blob_store.get(db, sha256) is None:
+                    Path(path).unlink(missing_ok=True)
+            batch = db.query(IngestBatch).filter(IngestBatch.id == batch_id).first()
+            if batch:
+                batch.status = "failed"
+                batch.error_message = str(e)
+                batch.finished_time = datetime.utcnow()
+                db.commit()
+            return
+        finally:
+            Path(archive_path).unlink(missing_ok=True)
+            db.close()
+
+        # 整批一次性加入 OCR 队列
+        try:
+            from app.tasks.dispatch import dispatch_ocr_batch
+            queue_status = dispatch_ocr_batch([str(row["id"]) for row in contract_rows])
+            print(f"Batch {batch_id} added to OCR queue: {queue_status}")
+        except Exception as e:
+            print(f"Failed to add batch {batch_id} to OCR queue: {e}")
+
+    def serialize_batch(self, db: Session, batch: IngestBatch) -> dict:
+        """批次信息及各状态合同数量"""
+        status_counts = dict(
+            db.query(Contract.status, func.count(Contract.id))
+            .filter(Contract.batch_id == batch.id)
+            .group_by(Contract.status)
+            .all()
+        )
+        return {
+            "id": batch.id,
+            "source_filename": batch.source_filename,
+            "status": batch.status,
+            "total_contracts": batch.total_contracts,
+            "total_files": batch.total_files,
+            "skipped_contracts": json.loads(batch.skipped_contracts) if batch.skipped_contracts else [],
+            "error_message": batch.error_message,
+            "created_time": batch.created_time,
+            "finished_time": batch.finished_time,
+            "status_counts": status_counts
+        }
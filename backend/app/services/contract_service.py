@@ -2,39 +2,163 @@ from sqlalchemy.orm import Session, joinedload
 from app.models.models import Contract, ContractFile
 from app.models.enums import PartyType
 from app.schemas.contract import ContractCreate
+from app.services.blob_store import BlobStore
 from pathlib import Path
+import hashlib
+import os
+import aiofiles
+import aiofiles.os
 import uuid
 from datetime import datetime
-from typing import List
+from typing import BinaryIO, List, NamedTuple
 
 # 创建上传目录
 UPLOAD_DIR = Path("/opt/contract_scan/contract_scan/uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 RAW_DIR = UPLOAD_DIR / "raw"
 RAW_DIR.mkdir(exist_ok=True)
+# 按内容哈希去重后的原始文件
+BLOB_DIR = RAW_DIR / "blobs"
+
+# 流式写盘的分块大小
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """上传文件超过大小限制"""
+
+
+class StoredFile(NamedTuple):
+    """已落盘、尚未纳入 BlobStore 的上传文件"""
+    filename: str
+    file_path: str
+    sha256: str
+    file_size: int
+
 
 class ContractService:
     def __init__(self):
         # 使用本地存储，不再依赖 MinIO
-        pass
+        self.blob_store = BlobStore(BLOB_DIR)
 
-    def save_file_locally(self, file_content: bytes, filename: str) -> str:
-        """保存文件到本地存储"""
-        # 生成唯一文件名
-        unique_filename = f"{uuid.uuid4()}_{filename}"
-        file_path = RAW_DIR / unique_filename
+    async def save_upload_stream(self, upload, max_bytes: int) -> StoredFile:
+        """
+        分块读取上传文件写入 RAW_DIR 下的暂存目录，边写边计算 SHA-256
+
+        文件读写均为异步 I/O，不阻塞事件循环。
 
-        # 保存文件
-        with open(file_path, 'wb') as f:
-            f.write(file_content)
+        Args:
+            upload: 上传文件对象（需提供 filename 和 async read(size)）
+            max_bytes: 允许写入的最大字节数
+
+        Returns:
+            已保存文件的信息
+
+        Raises:
+            UploadTooLargeError: 文件超过 max_bytes
+        """
+        filename = os.path.basename(upload.filename or "upload")
+        file_path = self._new_staging_path()
+        part_path = file_path.with_suffix(".part")
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(part_path, 'wb') as f:
+                while True:
+                    chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLargeError(
+                            f"File {filename} exceeds the upload limit of {max_bytes} bytes"
+                        )
+                    digest.update(chunk)
+                    await f.write(chunk)
+            await aiofiles.os.replace(part_path, file_path)
+        except BaseException:
+            if await aiofiles.os.path.exists(part_path):
+                await aiofiles.os.remove(part_path)
+            raise
+
+        return StoredFile(filename, str(file_path), digest.hexdigest(), size)
+
+    def stage_stream(self, stream: BinaryIO, filename: str, max_bytes: int) -> StoredFile:
+        """
+        save_upload_stream 的同步版本，用于从压缩包等文件对象中分块落盘
+
+        Args:
+            stream: 可分块读取的二进制文件对象
+            filename: 原始文件名
+            max_bytes: 允许写入的最大字节数
+
+        Returns:
+            已保存文件的信息
+
+        Raises:
+            UploadTooLargeError: 文件超过 max_bytes
+        """
+        filename = os.path.basename(filename or "upload")
+        file_path = self._new_staging_path()
+        part_path = file_path.with_suffix(".part")
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(part_path, 'wb') as f:
+                while True:
+                    chunk = stream.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLargeError(
+                            f"File {filename} exceeds the upload limit of {max_bytes} bytes"
+                        )
+                    digest.update(chunk)
+                    f.write(chunk)
+            os.replace(part_path, file_path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+
+        return StoredFile(filename, str(file_path), digest.hexdigest(), size)
+
+    def _new_staging_path(self) -> Path:
+        """暂存目录下的唯一文件路径"""
+        staging_dir = RAW_DIR / "incoming"
+        staging_dir.mkdir(exist_ok=True)
+        return staging_dir / f"{uuid.uuid4()}"
+
+    def discard_stored_files(self, stored_files: List[StoredFile]):
+        """删除尚未纳入 BlobStore 的暂存文件"""
+        for stored in stored_files:
+            Path(stored.file_path).unlink(missing_ok=True)
+
+    def add_contract_file(self, db: Session, contract_id, stored: StoredFile, order: int) -> ContractFile:
+        """将暂存文件纳入 BlobStore 并创建 ContractFile（调用方提交事务）"""
+        blob = self.blob_store.add_file(db, stored.file_path, stored.sha256, stored.file_size, stored.filename)
+        contract_file = ContractFile(
+            contract_id=contract_id,
+            file_path=blob.file_path,
+            filename=stored.filename,
+            file_order=order,
+            sha256=stored.sha256,
+            file_size=stored.file_size
+        )
+        db.add(contract_file)
+        return contract_file
 
-        return str(file_path)
+    def release_contract_file(self, db: Session, contract_file: ContractFile):
+        """释放 ContractFile 对存储内容的引用（调用方删除记录并提交事务）"""
+        self.blob_store.release(db, contract_file.sha256, contract_file.file_path)
 
     def create_contract(
         self,
         db: Session,
         contract_data: ContractCreate,
-        files_content: List[tuple],  # List of (filename, file_content) tuples
+        stored_files: List[StoredFile],
         created_by: str = None
     ) -> Contract:
         """
@@ -43,7 +167,7 @@ class ContractService:
         Args:
             db: 数据库会话
             contract_data: 合同数据
-            files_content: 文件列表 [(filename, content), ...]
+            stored_files: 已通过 save_upload_stream 落盘的文件列表
             created_by: 创建者
 
         Returns:
@@ -61,17 +185,9 @@ class ContractService:
         db.commit()
         db.refresh(db_contract)
 
-        # 保存所有文件并关联到合同
-        for order, (filename, file_content) in enumerate(files_content):
-            file_path = self.save_file_locally(file_content, filename)
-
-            contract_file = ContractFile(
-                contract_id=db_contract.id,
-                file_path=file_path,
-                filename=filename,
-                file_order=order
-            )
-            db.add(contract_file)
+        # 关联所有已落盘的文件（相同内容只保存一份）
+        for order, stored in enumerate(stored_files):
+            self.add_contract_file(db, db_contract.id, stored, order)
 
         db.commit()
         db.refresh(db_contract)
@@ -0,0 +1,52 @@
+"""OCR engine interface"""
+
+from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional
+
+
+class PageOCRResult(NamedTuple):
+    text: str
+    # 按字符数加权的平均行置信度（0~1），引擎不提供时为 None
+    confidence: Optional[float] = None
+    # 实际识别该页的引擎（分级识别时记录使用了哪一级）
+    tier: str = ""
+
+
+class OCREngine(ABC):
+    """
+    OCR 引擎接口，OCRService 通过它识别图片和 PDF 页面
+
+    实现需要线程安全：PDF 页面和多个文件会从线程池并发调用。
+    """
+
+    # 引擎名称，用于 OCR 结果缓存的键
+    name = ""
+
+    @property
+    def tier(self) -> str:
+        """引擎及接口标识，记录在逐页识别结果中"""
+        return self.name
+
+    @abstractmethod
+    def extract_text_from_image(self, image_path: str, use_cache: bool = True) -> str:
+        """识别图片文件；use_cache=False 时不读取页面级结果缓存（重新识别）"""
+
+    @abstractmethod
+    def extract_text_from_bytes(self, image_data: bytes) -> str:
+        """识别内存中的图片字节（PNG/JPEG）"""
+
+    @abstractmethod
+    def extract_text_from_page(self, image_data: bytes) -> str:
+        """识别渲染并预处理好的 PDF 页面（JPEG 字节），不再重复预处理"""
+
+    def recognize_page(self, image_data: bytes, use_cache: bool = True) -> PageOCRResult:
+        """识别 PDF 页面并返回置信度，用于判断是否需要更高分辨率重新识别"""
+        return PageOCRResult(self.extract_text_from_page(image_data), tier=self.tier)
+
+
+def weighted_confidence(lines) -> Optional[float]:
+    """各行置信度按字符数加权平均；lines 为 (文本, 置信度) 序列"""
+    total = sum(len(text) for text, _ in lines)
+    if not total:
+        return None
+    return sum(len(text) * score for text, score in lines) / total
@@ -1,18 +1,42 @@
-"""OCR Task Queue Manager"""
+"""OCR and AI extraction task queue managers"""
 
+import os
 import threading
 import time
-from typing import Optional, Callable
+from collections import deque
+from itertools import islice
+from typing import Optional, Callable, Dict, List, Tuple
+from app.core.config import settings
 from app.tasks.ocr_tasks import process_ocr
 
+# 数据库中表示流程未完成的状态：进程退出或崩溃后，这些合同在启动时重新入队
+OCR_UNFINISHED_STATUSES = ("pending_ocr", "ocr_processing")
+AI_UNFINISHED_STATUSES = ("pending_ai", "ai_processing")
+UNFINISHED_STATUSES = OCR_UNFINISHED_STATUSES + AI_UNFINISHED_STATUSES
+
 
 class OCRQueueManager:
-    """单例模式的 OCR 任务队列管理器"""
+    """
+    单例模式的 OCR 任务队列管理器
+
+    OCR_QUEUE_WORKERS 个工作线程共享同一个队列。OCR 完成后合同进入 pending_ai，
+    由 AIQueueManager（独立的队列、工作线程数和重试策略）做 AI 提取，两个阶段
+    互不阻塞；stats() 记录各阶段的处理量、耗时和排队等待时间。
+
+    本类是进程内队列，重启后排队的任务丢失，由 reconcile() 按数据库状态恢复；
+    OCR_QUEUE_BACKEND=redis 时使用 RedisOCRQueueManager，任务持久化在 Redis 中。
+    同一合同在排队或处理中时不会重复入队。
+    """
 
     _instance = None
     _lock = threading.Lock()
 
-    def __new__(cls):
+    # 流水线阶段名，用于线程名、日志和指标
+    STAGE = "ocr"
+    # 队列状态中最多列出的排队合同数，queue_length 仍是完整长度
+    STATUS_LIST_LIMIT = 100
+
+    def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
@@ -20,69 +44,190 @@ class OCRQueueManager:
                     cls._instance._initialized = False
         return cls._instance
 
-    def __init__(self):
+    def __init__(self, processor: Optional[Callable[[str], dict]] = None, workers: Optional[int] = None):
         if self._initialized:
             return
 
         self._initialized = True
-        self._queue = []
-        self._current_task = None
+        self._processor = processor or self._default_processor()
+        self.workers = workers or self._default_workers()
+        # deque 两端入队出队都是 O(1)；条件变量在有新任务时立即唤醒工作线程
+        self._queue = deque()
+        # 排队或处理中的合同，用于去重
+        self._queued_ids = set()
+        # 工作线程编号 -> 正在处理的任务
+        self._current_tasks: Dict[int, dict] = {}
         self._processing_lock = threading.Lock()
-        self._worker_thread = None
+        self._not_empty = threading.Condition(self._processing_lock)
+        self._worker_threads: List[threading.Thread] = []
         self._stop_event = threading.Event()
+        # 等待退避结束后重新入队的任务
+        self._retry_timers = set()
+        self._metrics = {
+            'processed': 0, 'succeeded': 0, 'failed': 0, 'retried': 0,
+            'seconds': 0.0, 'wait_seconds': 0.0
+        }
 
         # 启动工作线程
-        self._start_worker()
-
-    def _start_worker(self):
-        """启动工作线程处理队列"""
-        if self._worker_thread is None or not self._worker_thread.is_alive():
-            self._stop_event.clear()
-            self._worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
-            self._worker_thread.start()
-            print("OCR Queue Worker started")
-
-    def _worker_loop(self):
-        """工作线程主循环"""
+        self._start_workers()
+
+    # ---- 阶段配置，AIQueueManager 覆盖以下方法 ----
+
+    def _default_processor(self) -> Callable[[str], dict]:
+        return process_ocr
+
+    def _default_workers(self) -> int:
+        return settings.ocr_queue_workers
+
+    def _max_retries(self) -> int:
+        """失败任务在队列中的重试次数；OCR 失败时合同状态已回退，由重新触发或对账恢复"""
+        return 0
+
+    def _retry_delay(self, attempt: int) -> float:
+        """第 attempt 次重试前的等待秒数"""
+        return 0.0
+
+    def _should_reconcile(self, row) -> bool:
+        """启动对账时是否由本阶段恢复该合同"""
+        if row.status not in OCR_UNFINISHED_STATUSES and row.ocr_text_path and os.path.exists(row.ocr_text_path):
+            # OCR 已完成，交给 AI 阶段
+            return False
+        # 没有 ContractFile 的旧数据按 file_path 处理，文件已不存在时无法恢复
+        return bool(row.has_files or (row.file_path and os.path.exists(row.file_path)))
+
+    def _start_workers(self):
+        """启动工作线程处理队列（已退出的线程重新启动）"""
+        self._stop_event.clear()
+        if not self._worker_threads:
+            self._worker_threads = [None] * self.workers
+        for worker_id, thread in enumerate(self._worker_threads):
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(
+                    target=self._worker_loop, args=(worker_id,), name=f"{self.STAGE}-queue-worker-{worker_id}",
+                    daemon=True
+                )
+                self._worker_threads[worker_id] = thread
+                thread.start()
+        print(f"{self.STAGE.upper()} Queue Workers started: {self.workers}")
+
+    def _worker_loop(self, worker_id: int):
+        """工作线程主循环：队列为空时阻塞等待，不轮询"""
         while not self._stop_event.is_set():
             try:
                 # 获取下一个任务
-                task = self._get_next_task()
+                task = self._get_next_task(worker_id)
                 if task:
-                    self._process_task(task)
-                else:
-                    # 没有任务时休眠
-                    time.sleep(1)
+                    self._process_task(worker_id, task)
             except Exception as e:
-                print(f"Error in OCR queue worker: {e}")
-                time.sleep(1)
-
-    def _get_next_task(self) -> Optional[dict]:
-        """从队列中获取下一个任务"""
-        with self._processing_lock:
-            if self._queue:
-                return self._queue.pop(0)
-            return None
+                print(f"Error in {self.STAGE} queue worker {worker_id}: {e}")
+                # 队列后端不可用时避免空转
+                self._stop_event.wait(1)
 
-    def _process_task(self, task: dict):
+    def _process_task(self, worker_id: int, task: dict):
         """处理单个任务"""
         contract_id = task.get('contract_id')
+        stage = self.STAGE.upper()
+        start = time.time()
+        result = None
         try:
-            print(f"Processing OCR for contract: {contract_id}")
-            self._current_task = task
+            print(f"Processing {stage} for contract: {contract_id}")
 
-            # 执行 OCR 任务
-            result = process_ocr(contract_id)
+            # 执行本阶段的任务
+            result = self._processor(contract_id)
 
             status = result.get('status', 'unknown')
-            print(f"OCR completed for contract {contract_id}: {status}")
-
-            # 可以在这里添加回调通知或其他逻辑
+            print(f"{stage} completed for contract {contract_id}: {status}")
 
         except Exception as e:
-            print(f"Error processing OCR for contract {contract_id}: {e}")
+            print(f"Error processing {stage} for contract {contract_id}: {e}")
         finally:
-            self._current_task = None
+            self._ack(task)
+            retry = bool(result and result.get('retryable')) and task.get('attempt', 0) < self._max_retries()
+            with self._processing_lock:
+                self._current_tasks.pop(worker_id, None)
+                self._record(task, result, start, retry)
+            if retry:
+                self._schedule_retry(task)
+
+    def _record(self, task: dict, result: Optional[dict], start: float, retried: bool):
+        """累计阶段指标（调用方持有 _processing_lock）"""
+        metrics = self._metrics
+        metrics['processed'] += 1
+        if result and str(result.get('status', '')).startswith('success'):
+            metrics['succeeded'] += 1
+        else:
+            metrics['failed'] += 1
+        if retried:
+            metrics['retried'] += 1
+        metrics['seconds'] += time.time() - start
+        metrics['wait_seconds'] += max(0.0, start - task.get('added_time', start))
+
+    def _schedule_retry(self, task: dict):
+        """退避后重新入队；进程在等待期间退出时，合同由启动对账恢复"""
+        attempt = task.get('attempt', 0) + 1
+        delay = self._retry_delay(task.get('attempt', 0))
+        print(f"Retrying {self.STAGE.upper()} for contract {task.get('contract_id')} in {delay:.0f}s (attempt {attempt})")
+
+        def requeue():
+            with self._processing_lock:
+                self._retry_timers.discard(timer)
+            if not self._stop_event.is_set():
+                self._enqueue([task.get('contract_id')], attempt=attempt)
+
+        timer = threading.Timer(delay, requeue)
+        timer.daemon = True
+        with self._processing_lock:
+            self._retry_timers.add(timer)
+        timer.start()
+
+    # ---- 队列存储，RedisOCRQueueManager 覆盖以下方法 ----
+
+    def _enqueue(self, contract_ids: List[str], attempt: int = 0) -> Tuple[int, int]:
+        """入队未在排队或处理中的合同，返回 (入队数量, 队列长度)；attempt 为已重试次数"""
+        now = time.time()
+        with self._not_empty:
+            queued = 0
+            for contract_id in contract_ids:
+                if contract_id in self._queued_ids:
+                    continue
+                self._queued_ids.add(contract_id)
+                self._queue.append({'contract_id': contract_id, 'added_time': now, 'attempt': attempt})
+                queued += 1
+            if queued:
+                self._not_empty.notify(queued)
+            return queued, len(self._queue)
+
+    def _get_next_task(self, worker_id: int) -> Optional[dict]:
+        """取出下一个任务并登记为当前任务，队列为空时等待；停止时返回 None"""
+        with self._not_empty:
+            while not self._queue and not self._stop_event.is_set():
+                self._not_empty.wait()
+            if self._stop_event.is_set():
+                return None
+            task = self._queue.popleft()
+            self._current_tasks[worker_id] = task
+            return task
+
+    def _ack(self, task: dict):
+        """任务处理结束"""
+        with self._processing_lock:
+            self._queued_ids.discard(task.get('contract_id'))
+
+    def _queued_contracts(self, limit: int) -> Tuple[int, List[str]]:
+        """排队长度和最前面 limit 个排队中的合同（调用方持有 _processing_lock）"""
+        return len(self._queue), [task.get('contract_id') for task in islice(self._queue, limit)]
+
+    def _wake_workers(self):
+        with self._not_empty:
+            self._not_empty.notify_all()
+
+    # ---- 公共接口 ----
+
+    @property
+    def current_tasks(self) -> List[dict]:
+        """正在处理的任务（快照）"""
+        with self._processing_lock:
+            return list(self._current_tasks.values())
 
     def add_task(self, contract_id: str) -> dict:
         """
@@ -94,39 +239,168 @@ class OCRQueueManager:
         Returns:
             队列状态信息
         """
-        with self._processing_lock:
-            task = {
-                'contract_id': contract_id,
-                'added_time': time.time()
-            }
-            self._queue.append(task)
+        queued, queue_length = self._enqueue([contract_id])
 
         return {
-            'status': 'queued',
+            'status': 'queued' if queued else 'already_queued',
             'contract_id': contract_id,
-            'queue_position': len(self._queue),
-            'current_task': self._current_task.get('contract_id') if self._current_task else None
+            'queue_position': queue_length,
+            'current_tasks': [task.get('contract_id') for task in self.current_tasks]
         }
 
+    def add_tasks(self, contract_ids: List[str]) -> dict:
+        """
+        批量添加任务到队列（一次加锁）
+
+        Args:
+            contract_ids: 合同 ID 列表
+
+        Returns:
+            队列状态信息
+        """
+        queued, queue_length = self._enqueue(contract_ids)
+
+        return {
+            'status': 'queued',
+            'queued_count': queued,
+            'queue_length': queue_length
+        }
+
+    def stats(self) -> dict:
+        """本阶段处理的任务数、成功 / 失败 / 重试次数、平均处理耗时和平均排队等待时间"""
+        with self._processing_lock:
+            metrics = dict(self._metrics)
+            metrics['retry_pending'] = len(self._retry_timers)
+        processed = metrics['processed']
+        metrics['avg_seconds'] = metrics['seconds'] / processed if processed else 0.0
+        metrics['avg_wait_seconds'] = metrics['wait_seconds'] / processed if processed else 0.0
+        return metrics
+
     def get_queue_status(self) -> dict:
-        """获取队列状态"""
+        """获取队列状态（加锁读取，队列长度、当前任务和排队列表来自同一时刻）"""
+        with self._processing_lock:
+            current_tasks = [task.get('contract_id') for task in self._current_tasks.values()]
+            queue_length, queued_contracts = self._queued_contracts(self.STATUS_LIST_LIMIT)
+        return self._status(current_tasks, queue_length, queued_contracts)
+
+    def _status(self, current_tasks: List[str], queue_length: int, queued_contracts: List[str]) -> dict:
         return {
-            'queue_length': len(self._queue),
-            'current_task': self._current_task.get('contract_id') if self._current_task else None,
-            'queued_contracts': [task.get('contract_id') for task in self._queue]
+            'stage': self.STAGE,
+            'queue_length': queue_length,
+            'workers': self.workers,
+            'current_tasks': current_tasks,
+            'queued_contracts': queued_contracts,
+            'metrics': self.stats()
         }
 
     def is_processing(self) -> bool:
         """检查是否有任务正在处理"""
-        return self._current_task is not None
+        with self._processing_lock:
+            return bool(self._current_tasks)
+
+    def reconcile(self) -> int:
+        """
+        启动对账：把数据库中流程未完成（UNFINISHED_STATUSES）的合同重新入队到对应阶段
+
+        OCR 阶段恢复待识别、以及 OCR 文本已丢失的合同（已完成的文件复用缓存的识别文本）；
+        AI 阶段恢复 OCR 文本仍在的 pending_ai / ai_processing 合同。
+
+        只按本队列的去重集合判断合同是否已在处理：进程内队列看不到其他进程的任务，
+        多进程部署时只应在 redis 队列上对账（见 main.startup_event）。
+
+        Returns:
+            新入队的合同数量
+        """
+        from app.core.db import get_db
+        from app.models.models import Contract, ContractFile
+
+        db = next(get_db())
+        try:
+            has_files = db.query(ContractFile.id).filter(ContractFile.contract_id == Contract.id).exists()
+            rows = db.query(
+                Contract.id, Contract.status, Contract.file_path, Contract.ocr_text_path, has_files.label("has_files")
+            )\
+                .filter(Contract.status.in_(UNFINISHED_STATUSES))\
+                .order_by(Contract.upload_time)\
+                .all()
+        finally:
+            db.close()
 
-    def stop(self):
-        """停止工作线程"""
+        contract_ids = [str(row.id) for row in rows if self._should_reconcile(row)]
+        queued, _ = self._enqueue(contract_ids)
+        print(f"{self.STAGE.upper()} queue reconciled: {len(contract_ids)} unfinished contracts, {queued} re-enqueued")
+        return queued
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        停止工作线程
+
+        不再领取新任务，等待处理中的任务完成（最多 OCR_QUEUE_DRAIN_TIMEOUT 秒）。
+        未完成的任务和等待重试的任务由下次启动时的对账（或 Redis 中的超时重领）恢复。
+        """
+        timeout = settings.ocr_queue_drain_timeout if timeout is None else timeout
         self._stop_event.set()
-        if self._worker_thread:
-            self._worker_thread.join(timeout=5)
-            print("OCR Queue Worker stopped")
+        self._wake_workers()
+        with self._processing_lock:
+            for timer in self._retry_timers:
+                timer.cancel()
+            self._retry_timers.clear()
+
+        deadline = time.monotonic() + timeout
+        for thread in self._worker_threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        unfinished = [task.get('contract_id') for task in self.current_tasks]
+        if unfinished:
+            print(f"{self.STAGE.upper()} Queue Workers stopped with unfinished tasks: {unfinished}")
+        else:
+            print(f"{self.STAGE.upper()} Queue Workers stopped")
+
+
+class AIQueueManager(OCRQueueManager):
+    """
+    AI 提取阶段的队列管理器
+
+    OCR 完成后 process_ocr 把合同投递到这里，OCR 工作线程不等待大模型返回。
+    AI_QUEUE_WORKERS 个工作线程；服务商错误或超时（结果带 retryable）按指数退避
+    重试 AI_MAX_RETRIES 次。
+    """
+
+    _instance = None
+
+    STAGE = "ai"
+
+    def _default_processor(self) -> Callable[[str], dict]:
+        from app.tasks.ai_extraction_tasks import process_ai_extraction
+        return process_ai_extraction
+
+    def _default_workers(self) -> int:
+        return settings.ai_queue_workers
+
+    def _max_retries(self) -> int:
+        return settings.ai_max_retries
+
+    def _retry_delay(self, attempt: int) -> float:
+        from app.tasks.ai_extraction_tasks import retry_delay
+        return retry_delay(attempt)
+
+    def _should_reconcile(self, row) -> bool:
+        return (
+            row.status in AI_UNFINISHED_STATUSES
+            and bool(row.ocr_text_path) and os.path.exists(row.ocr_text_path)
+        )
+
+
+def create_queue_manager(stage: str = "ocr") -> OCRQueueManager:
+    """按 OCR_QUEUE_BACKEND 创建指定阶段（ocr / ai）的队列管理器"""
+    backend = settings.ocr_queue_backend
+    if backend == "memory":
+        return AIQueueManager() if stage == "ai" else OCRQueueManager()
+    if backend == "redis":
+        from app.services.redis_ocr_queue import RedisAIQueueManager, RedisOCRQueueManager
+        return RedisAIQueueManager() if stage == "ai" else RedisOCRQueueManager()
+    raise ValueError(f"Unsupported OCR queue backend: {backend}")
 
 
-# 全局队列管理器实例
-ocr_queue_manager = OCRQueueManager()
+# 全局队列管理器实例：OCR 和 AI 提取两个阶段
+ocr_queue_manager = create_queue_manager("ocr")
+ai_queue_manager = create_queue_manager("ai")
@@ -0,0 +1,136 @@
+"""Persistent page-level OCR result cache"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.services.contract_service import UPLOAD_DIR
+
+
+class OCRResultCache:
+    """
+    按归一化后的页面图片哈希缓存 OCR 结果（SQLite 文件）
+
+    键同时包含 OCR 引擎和接口，换引擎或接口不会命中旧结果。
+    总文本大小超过上限时按最近访问时间淘汰（LRU）。
+    """
+
+    def __init__(self, db_path: Path, max_bytes: int):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_results ("
+            " key TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " confidence REAL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(ocr_results)")}
+        if "confidence" not in columns:
+            # 旧版本创建的缓存文件没有置信度列
+            self._conn.execute("ALTER TABLE ocr_results ADD COLUMN confidence REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_ocr_results_last_access ON ocr_results (last_access)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_results").fetchone()[0]
+
+    @staticmethod
+    def make_key(image_data: bytes, engine: str, endpoint: str) -> str:
+        """归一化图片字节的 SHA-256 + 引擎 + 接口"""
+        return f"{engine}:{endpoint}:{hashlib.sha256(image_data).hexdigest()}"
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存的文本，命中时刷新访问时间"""
+        result = self.lookup(key)
+        return result[0] if result else None
+
+    def lookup(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        """读取缓存的 (文本, 置信度)，命中时刷新访问时间"""
+        with self._lock:
+            row = self._conn.execute("SELECT text, confidence FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE ocr_results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return row[0], row[1]
+
+    def put(self, key: str, text: str, confidence: Optional[float] = None):
+        """写入识别结果，超出容量时淘汰最久未访问的条目；空结果不缓存，下次仍重新识别"""
+        if not text.strip():
+            return
+        size = len(text.encode('utf-8'))
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, text, size, last_access, confidence) VALUES (?, ?, ?, ?, ?)",
+                (key, text, size, time.time(), confidence)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """淘汰到容量的 90%，留出余量避免每次写入都触发淘汰"""
+        target = self.max_bytes * 0.9
+        # 其他进程也可能写入同一个缓存文件，以数据库中的实际大小为准
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_results").fetchone()[0]
+        rows = self._conn.execute("SELECT key, size FROM ocr_results ORDER BY last_access").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM ocr_results WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+
+    def stats(self) -> dict:
+        """命中/未命中计数及当前容量"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+
+_cache: Optional[OCRResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_result_cache() -> Optional[OCRResultCache]:
+    """进程内共享的 OCR 结果缓存，未启用时返回 None"""
+    global _cache
+    if not settings.ocr_result_cache_enabled:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = OCRResultCache(
+                UPLOAD_DIR / "cache" / "ocr_results.sqlite3",
+                settings.ocr_result_cache_max_bytes
+            )
+        return _cache
+
+
+def ocr_result_cache_stats() -> Optional[dict]:
+    """进程内缓存的命中指标；缓存未启用或尚未使用时返回 None（不为此创建缓存文件）"""
+    with _cache_lock:
+        cache = _cache
+    return cache.stats() if cache is not None else None
@@ -1,83 +1,153 @@
-"""OCR service using Baidu OCR"""
+"""OCR service using a pluggable OCR engine (Baidu OCR or local PaddleOCR)"""
 
-import io
-import tempfile
 import os
-import base64
-import requests
-from typing import Optional
-from pdfplumber import PDF
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from typing import Dict, Optional, Tuple
+import pypdfium2 as pdfium
 from docx import Document
 from pathlib import Path
 from app.core.config import settings
+from app.services.baidu_ocr_client import AsyncBaiduOCRService, background_loop
+from app.services.ocr_engine import OCREngine, PageOCRResult
+from app.services.page_checkpoint import PageCheckpoint, clear_refresh, refresh_requested
+from app.services.pdf_rasterizer import get_rasterizer
+from app.services.page_classifier import PAGE_MIXED, PAGE_SCANNED, PAGE_TEXT, PageClassifier, page_text
 
 
-class BaiduOCRService:
-    """Baidu OCR service for text extraction from images"""
+class BaiduOCRService(OCREngine):
+    """Baidu OCR service for text extraction from images
 
-    def __init__(self):
-        self.api_key = settings.baidu_ocr_api_key
-        self.secret_key = settings.baidu_ocr_secret_key
-        self.access_token = None
-
-    def get_access_token(self):
-        """Get Baidu OCR access token"""
-        if self.access_token:
-            return self.access_token
-
-        url = "https://aip.baidubce.com/oauth/2.0/token"
-        params = {
-            "grant_type": "client_credentials",
-            "client_id": self.api_key,
-            "client_secret": self.secret_key
-        }
-
-        response = requests.post(url, params=params)
-        result = response.json()
-
-        if "access_token" in result:
-            self.access_token = result["access_token"]
-            return self.access_token
-        else:
-            raise Exception(f"Failed to get access token: {result}")
+    Synchronous facade over AsyncBaiduOCRService: requests from all threads run
+    on one background event loop and share its pooled HTTP connections.
+    """
+
+    name = "baidu"
+
+    def __init__(self, endpoint: str = "accurate_basic"):
+        self.client = AsyncBaiduOCRService(endpoint)
+
+    @property
+    def tier(self) -> str:
+        return f"baidu:{self.client.endpoint}"
 
-    def extract_text_from_image(self, image_path: str) -> str:
+    def extract_text_from_image(self, image_path: str, use_cache: bool = True) -> str:
         """Extract text from image using Baidu OCR"""
-        access_token = self.get_access_token()
+        # 预处理在调用线程完成，后台事件循环只负责网络 I/O
+        image_data = self.client.load_image(image_path)
+        return background_loop.run(self.client.recognize(image_data, use_cache))
 
-        # Read and encode image
-        with open(image_path, 'rb') as f:
-            image_data = f.read()
-            base64_image = base64.b64encode(image_data).decode()
+    def extract_text_from_bytes(self, image_data: bytes) -> str:
+        """Extract text from encoded image bytes (PNG/JPEG) without touching disk"""
+        return background_loop.run(self.client.recognize(self.client.prepare_image(image_data)))
 
-        # Baidu OCR API - 使用高精度版
-        url = f"https://aip.baidubce.com/rest/2.0/ocr/v1/accurate_basic?access_token={access_token}"
+    def extract_text_from_page(self, image_data: bytes) -> str:
+        """Extract text from a rendered, already normalized page (JPEG bytes)"""
+        return background_loop.run(self.client.recognize(image_data))
 
-        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        data = {'image': base64_image}
+    def recognize_page(self, image_data: bytes, use_cache: bool = True) -> PageOCRResult:
+        """Like extract_text_from_page, with the average line confidence"""
+        return background_loop.run(self.client.recognize_page(image_data, use_cache))._replace(tier=self.tier)
 
-        response = requests.post(url, headers=headers, data=data)
-        result = response.json()
 
-        if "words_result" in result:
-            text_lines = [item["words"] for item in result["words_result"]]
-            return '\n'.join(text_lines)
-        else:
-            raise Exception(f"Baidu OCR error: {result}")
+_paddle_engine = None
+_paddle_engine_lock = threading.Lock()
+# 分级引擎按 (OCR_PROVIDER, OCR_FAST_TIER) 进程内复用，各级页数、耗时和升级次数跨合同累计
+_tiered_engines: Dict[Tuple[str, str], OCREngine] = {}
+_tiered_engines_lock = threading.Lock()
+
+
+def create_ocr_engine(provider: Optional[str] = None, fast_tier: Optional[str] = None) -> OCREngine:
+    """
+    按 OCR_PROVIDER 创建 OCR 引擎，配置了 OCR_FAST_TIER 时包装为分级引擎
+
+    PaddleOCR 的进程池和模型加载开销大，进程内只创建一次并复用；分级引擎同样
+    进程内复用，其统计见 ocr_engine_stats()。
+    """
+    provider = (provider or settings.ocr_provider).lower()
+    fast_tier = settings.ocr_fast_tier if fast_tier is None else fast_tier
+    if not fast_tier:
+        return _create_engine(provider)
+
+    with _tiered_engines_lock:
+        tiered = _tiered_engines.get((provider, fast_tier))
+        if tiered is None:
+            from app.services.tiered_ocr_engine import TieredOCREngine
+            engine = _create_engine(provider)
+            fast = BaiduOCRService("general_basic") if fast_tier == "baidu" else _create_engine(fast_tier)
+            if fast.tier == engine.tier:
+                raise ValueError(f"OCR fast tier {fast_tier} is the same engine as OCR_PROVIDER")
+            tiered = _tiered_engines[(provider, fast_tier)] = TieredOCREngine(fast, engine)
+        return tiered
+
+
+def ocr_engine_stats() -> dict:
+    """进程内各分级引擎的累计统计（各级页数、耗时、升级次数），按引擎 tier 区分"""
+    with _tiered_engines_lock:
+        engines = list(_tiered_engines.values())
+    return {engine.tier: engine.stats() for engine in engines}
+
+
+def _create_engine(provider: str) -> OCREngine:
+    global _paddle_engine
+    provider = provider.lower()
+
+    if provider == "baidu":
+        return BaiduOCRService()
+    if provider == "paddle":
+        with _paddle_engine_lock:
+            if _paddle_engine is None:
+                from app.services.paddle_ocr_engine import PaddleOCREngine
+                _paddle_engine = PaddleOCREngine()
+            return _paddle_engine
+    raise ValueError(f"Unsupported OCR provider: {provider}")
+
+
+class MemoryBudget:
+    """
+    进程内所有 PDF 识别共享的在途页面内存预算（OCR_MEMORY_BUDGET_MB）
+
+    多个队列线程、每个合同多个文件同时识别时，在途页面的估算内存总和不超过预算；
+    单页超过预算时等其他页面全部完成后单独处理。
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self._limit = limit
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return settings.ocr_memory_budget if self._limit is None else self._limit
+
+    def acquire(self, size: int):
+        with self._cond:
+            while self.in_use and self.in_use + size > self.limit:
+                self._cond.wait()
+            self.in_use += size
+
+    def release(self, size: int):
+        with self._cond:
+            self.in_use -= size
+            self._cond.notify_all()
+
+
+page_memory_budget = MemoryBudget()
 
 
 class OCRService:
     """Service for OCR text extraction from PDF, images, and DOCX files"""
 
     def __init__(self):
-        """Initialize OCR service - Baidu OCR only"""
-        self.baidu_ocr = None
+        """Initialize OCR service with the engine selected by OCR_PROVIDER"""
+        self.engine = None
+        self.page_classifier = PageClassifier()
         try:
-            self.baidu_ocr = BaiduOCRService()
-            print("Baidu OCR initialized successfully")
+            self.engine = create_ocr_engine()
+            print(f"OCR engine {self.engine.name} initialized successfully")
         except Exception as e:
-            print(f"Warning: Failed to initialize Baidu OCR: {e}")
-            raise Exception("Baidu OCR is required but failed to initialize")
+            print(f"Warning: Failed to initialize OCR engine {settings.ocr_provider}: {e}")
+            raise Exception(f"OCR engine {settings.ocr_provider} is required but failed to initialize")
 
     def extract_text_from_file(self, file_path: str) -> str:
         """
@@ -93,55 +163,212 @@ class OCRService:
         filename = os.path.basename(file_path)
         ext = os.path.splitext(filename)[1].lower()
 
+        # 请求了重新识别（trigger_ocr?refresh=true）时不使用页面级结果缓存
+        refresh = refresh_requested(file_path)
+
         # Extract text based on file type
         if ext == '.pdf':
-            return self._extract_from_pdf(file_path)
+            text = self._extract_from_pdf(file_path, use_cache=not refresh)
         elif ext in ['.png', '.jpg', '.jpeg']:
-            return self._extract_from_image(file_path)
+            text = self._extract_from_image(file_path, use_cache=not refresh)
         elif ext == '.docx':
-            return self._extract_from_docx(file_path)
+            text = self._extract_from_docx(file_path)
         else:
             raise ValueError(f"Unsupported file type: {ext}")
 
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF using pdfplumber"""
-        text_parts = []
+        if refresh:
+            clear_refresh(file_path)
+        return text
+
+    def _extract_from_pdf(self, file_path: str, use_cache: bool = True) -> str:
+        """
+        Extract text from PDF
+
+        A cheap pdfium pre-pass classifies each page as text, scanned or mixed
+        (the result is saved next to the file and reused on reprocessing). Text
+        pages take the text layer directly; scanned and mixed pages are then
+        rendered in a separate process pool (PDF_RENDER_WORKERS, at
+        PDF_RENDER_DPI, re-rendered at PDF_RENDER_HIGH_DPI only when the first
+        pass looks poor) and OCR'd concurrently as one batch (up to
+        OCR_PDF_PAGE_CONCURRENCY requests in flight, and no more pages than
+        fit in OCR_MEMORY_BUDGET_MB, a budget shared by every PDF being
+        extracted in the process). Page objects are closed as soon as they
+        are analyzed, and rendered pages stay in memory from renderer to
+        request body only while in flight.
+
+        Every finished page is appended to a checkpoint next to the file (OCR'd
+        pages along with the engine tier that produced them), so a retried or
+        restarted job only processes the pages still missing. Errors after the
+        document is opened propagate, including pages whose OCR failed (raised
+        once every other page has been checkpointed), so the text is not cached
+        and the retry resumes from the checkpoint. The result is assembled by
+        streaming the checkpoint in page order.
+        """
+        layer_texts = {}
+        ocr_pages = []
+        page_cost = {}
+        pending = {}
+        tiers = {}
+        failed = {}
+        concurrency = settings.ocr_pdf_page_concurrency
+
+        def collect(futures):
+            for future in futures:
+                index = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"OCR error on PDF page {index + 1}: {e}")
+                    failed[index] = e
+                    continue
+                tiers[result.tier] = tiers.get(result.tier, 0) + 1
+                # mixed 页面取文本层和 OCR 中内容更多的一个；按非空白字符数比较，中文几乎没有空格
+                layer_text = layer_texts.pop(index, '')
+                if len(''.join(result.text.split())) >= len(''.join(layer_text.split())):
+                    checkpoint.append(index, result.text, result.tier)
+                else:
+                    checkpoint.append(index, layer_text)
 
         try:
-            with PDF.open(file_path) as pdf:
-                for page in pdf.pages:
-                    # Try to extract text directly first
-                    text = page.extract_text()
-                    if text and text.strip():
-                        text_parts.append(text)
-                    else:
-                        # If no text, try OCR on page image
-                        if self.baidu_ocr:
-                            try:
-                                img = page.to_image()
-                                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-                                    img.save(tmp)
-                                    tmp_path = tmp.name
-                                text = self.baidu_ocr.extract_text_from_image(tmp_path)
-                                os.unlink(tmp_path)
-                                if text:
-                                    text_parts.append(text)
-                            except Exception as e:
-                                print(f"Baidu OCR error on PDF page: {e}")
+            pdf = pdfium.PdfDocument(file_path)
         except Exception as e:
+            # 不返回空文本，避免被当作识别结果缓存
             print(f"PDF extraction error: {e}")
+            raise
 
-        return '\n\n'.join(text_parts)
+        checkpoint = PageCheckpoint(file_path)
+        try:
+            completed = checkpoint.open()
+            if completed:
+                print(f"Resuming {file_path}: {len(completed)} of {len(pdf)} pages already done")
+
+            pages = self.page_classifier.load(file_path, len(pdf))
+            classified = pages is None
+            if classified:
+                pages = []
+
+            for index in range(len(pdf)):
+                if not classified and index in completed:
+                    continue
+                page = pdf[index]
+                try:
+                    if classified:
+                        info, text = self.page_classifier.analyze_page(page)
+                        pages.append(info)
+                        if index in completed:
+                            continue
+                    else:
+                        info, text = pages[index], None
+                    if info.page_type != PAGE_SCANNED:
+                        text = text if text is not None else page_text(page)
+                    if info.page_type == PAGE_TEXT:
+                        checkpoint.append(index, text)
+                    else:
+                        if info.page_type == PAGE_MIXED:
+                            layer_texts[index] = text
+                        ocr_pages.append(index)
+                        page_cost[index] = self._estimate_page_bytes(page)
+                finally:
+                    page.close()
+
+            if classified:
+                self.page_classifier.save(file_path, pages)
+
+            if ocr_pages and self.engine:
+                rasterizer = get_rasterizer()
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    for index in ocr_pages:
+                        # 提交的页面最多领先识别一轮
+                        while len(pending) >= concurrency * 2:
+                            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                            collect(done)
+                        # 进程内所有在途页面的估算内存不超过 OCR_MEMORY_BUDGET_MB，页面识别完即释放
+                        page_memory_budget.acquire(page_cost[index])
+                        try:
+                            future = executor.submit(
+                                self._ocr_page_within_budget, rasterizer, file_path, index, page_cost[index], use_cache
+                            )
+                        except Exception:
+                            page_memory_budget.release(page_cost[index])
+                            raise
+                        pending[future] = index
+
+                    collect(list(as_completed(pending)))
+                print(f"OCR'd {sum(tiers.values())} pages of {file_path} by tier: {tiers}")
+
+            if failed:
+                # 其余页面已写入检查点，重试时只识别失败的页面
+                pages_failed = ', '.join(str(index + 1) for index in sorted(failed))
+                raise RuntimeError(
+                    f"OCR failed on {len(failed)} of {len(pdf)} pages of {file_path} (pages {pages_failed})"
+                ) from next(iter(failed.values()))
+
+            return '\n\n'.join(text for text in checkpoint.iter_pages(len(pdf)) if text.strip())
+        finally:
+            checkpoint.close()
+            pdf.close()
+
+    @staticmethod
+    def _estimate_page_bytes(page) -> int:
+        """在途页面的内存估算：渲染位图（灰度）加上 JPEG 及其 base64 请求体"""
+        width, height = page.get_size()
+        # 低质量页面会以高 DPI 重新渲染，按较大的一次估算
+        scale = max(settings.pdf_render_dpi, settings.pdf_render_high_dpi) / 72
+        return int(width * scale * height * scale) + 3 * settings.ocr_image_target_bytes
+
+    def _ocr_page_within_budget(self, rasterizer, file_path: str, index: int, cost: int,
+                                use_cache: bool = True) -> PageOCRResult:
+        """识别一页，结束后归还该页占用的内存预算"""
+        try:
+            return self._ocr_page(rasterizer, file_path, index, use_cache)
+        finally:
+            page_memory_budget.release(cost)
 
-    def _extract_from_image(self, file_path: str) -> str:
-        """Extract text from image using Baidu OCR"""
-        if not self.baidu_ocr:
-            raise Exception("Baidu OCR is not available")
+    def _ocr_page(self, rasterizer, file_path: str, index: int, use_cache: bool = True) -> PageOCRResult:
+        """
+        Render a page in the rasterizer pool, then OCR it
+
+        The page is first OCR'd at PDF_RENDER_DPI. If the engine reports a low
+        line confidence or too few characters came back (small print blurred
+        at low resolution), it is re-rendered at PDF_RENDER_HIGH_DPI and the
+        better of the two results is kept.
+        """
+        result = self.engine.recognize_page(rasterizer.render(file_path, index), use_cache)
+        high_dpi = settings.pdf_render_high_dpi
+        if high_dpi <= settings.pdf_render_dpi or not self._needs_rerender(result):
+            return result
+
+        retry = self.engine.recognize_page(
+            rasterizer.render(file_path, index, high_dpi, settings.ocr_image_high_max_long_edge), use_cache
+        )
+        best = max(result, retry, key=self._quality_score)
+        print(f"PDF page {index + 1} re-rendered at {high_dpi} dpi "
+              f"(confidence {result.confidence} -> {retry.confidence}), "
+              f"kept {'high' if best is retry else 'low'} resolution result")
+        return best
+
+    @staticmethod
+    def _needs_rerender(result: PageOCRResult) -> bool:
+        """置信度低于 OCR_RERENDER_MIN_CONFIDENCE 或识别字符数少于 OCR_RERENDER_MIN_CHARS"""
+        if result.confidence is not None and result.confidence < settings.ocr_rerender_min_confidence:
+            return True
+        return len(''.join(result.text.split())) < settings.ocr_rerender_min_chars
+
+    @staticmethod
+    def _quality_score(result: PageOCRResult) -> float:
+        """预计识别正确的字符数：非空白字符数乘以置信度（未知时按 1）"""
+        confidence = 1.0 if result.confidence is None else result.confidence
+        return len(''.join(result.text.split())) * confidence
+
+    def _extract_from_image(self, file_path: str, use_cache: bool = True) -> str:
+        """Extract text from image using the OCR engine"""
+        if not self.engine:
+            raise Exception("OCR engine is not available")
 
         try:
-            return self.baidu_ocr.extract_text_from_image(file_path)
+            return self.engine.extract_text_from_image(file_path, use_cache)
         except Exception as e:
-            print(f"Baidu OCR error: {e}")
+            print(f"OCR error: {e}")
             raise e
 
     def _extract_from_docx(self, file_path: str) -> str:
@@ -152,7 +379,7 @@ class OCRService:
             return '\n\n'.join(text_parts)
         except Exception as e:
             print(f"DOCX extraction error: {e}")
-            return ""
+            raise
 
     def extract_and_save_text(self, file_path: str) -> str:
         """
@@ -0,0 +1,142 @@
+"""Local PaddleOCR engine running in a pre-warmed process pool"""
+
+import atexit
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+import numpy as np
+from PIL import Image
+from app.core.config import settings
+from app.services.image_preprocessor import ImagePreprocessor
+from app.services.ocr_engine import OCREngine, PageOCRResult, weighted_confidence
+from app.services.ocr_result_cache import OCRResultCache, get_ocr_result_cache
+
+# 工作进程内的模型实例，每个进程只加载一次
+_model = None
+_use_angle_cls = False
+
+
+def _init_worker(lang: str, use_angle_cls: bool):
+    """工作进程初始化：加载 PaddleOCR 模型"""
+    global _model, _use_angle_cls
+    from paddleocr import PaddleOCR
+    _model = PaddleOCR(lang=lang, use_angle_cls=use_angle_cls, show_log=False)
+    _use_angle_cls = use_angle_cls
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _recognize(image_data: bytes) -> tuple:
+    """在工作进程中识别图片字节，返回 (文本, 平均行置信度)"""
+    with Image.open(io.BytesIO(image_data)) as img:
+        array = np.asarray(img.convert("RGB"))
+    result = _model.ocr(array, cls=_use_angle_cls)
+
+    # 返回值按输入图片分组，没有识别到文字时为 None
+    lines = []
+    for page in result or []:
+        for _box, (text, score) in page or []:
+            lines.append((text, float(score)))
+    return '\n'.join(text for text, _ in lines), weighted_confidence(lines)
+
+
+class PaddleOCREngine(OCREngine):
+    """
+    本地 PaddleOCR 引擎
+
+    模型加载在独立进程中，启动时预热所有进程；识别不走网络，吞吐随 CPU 核数扩展。
+    工作进程崩溃后进程池不可用，下次识别时重建并重新预热。
+    """
+
+    name = "paddle"
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.paddle_ocr_workers
+        self.lang = settings.paddle_ocr_lang
+        self.preprocessor = ImagePreprocessor()
+        self.result_cache = get_ocr_result_cache()
+
+        self._lock = threading.Lock()
+        self._pool = self._start_pool()
+        atexit.register(self._shutdown_now)
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        """创建进程池并预热：每个进程提交一个空任务，确保进程已启动且模型加载成功"""
+        # spawn 启动：调用方可能在多线程环境（队列线程、Celery），fork 不安全
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.lang, settings.paddle_ocr_use_angle_cls)
+        )
+        futures = [pool.submit(_ping) for _ in range(self.workers)]
+        done, _ = wait(futures)
+        for future in done:
+            # 模型加载失败时这里会抛出 BrokenProcessPool
+            future.result()
+        return pool
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """替换已损坏的进程池；多个线程同时发现时只重建一次"""
+        with self._lock:
+            if self._pool is broken:
+                print("PaddleOCR worker died, restarting the process pool")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._start_pool()
+
+    def _run(self, image_data: bytes) -> tuple:
+        """
+        在进程池中识别；进程池损坏（工作进程 OOM 或崩溃）时重建后重试一次，
+        再次失败说明很可能是这张图片本身导致崩溃，异常交给调用方
+        """
+        pool = self._pool
+        try:
+            return pool.submit(_recognize, image_data).result()
+        except BrokenProcessPool:
+            self._restart(pool)
+            return self._pool.submit(_recognize, image_data).result()
+
+    def _recognize(self, image_data: bytes, use_cache: bool = True) -> PageOCRResult:
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = OCRResultCache.make_key(image_data, self.name, self.lang)
+            cached = self.result_cache.lookup(cache_key) if use_cache else None
+            if cached is not None:
+                return PageOCRResult(*cached)
+
+        result = PageOCRResult(*self._run(image_data))
+        if cache_key is not None:
+            self.result_cache.put(cache_key, result.text, result.confidence)
+        return result
+
+    def extract_text_from_image(self, image_path: str, use_cache: bool = True) -> str:
+        with open(image_path, 'rb') as f:
+            return self._recognize(self._normalize(f.read()), use_cache).text
+
+    def extract_text_from_bytes(self, image_data: bytes) -> str:
+        return self._recognize(self._normalize(image_data)).text
+
+    def _normalize(self, image_data: bytes) -> bytes:
+        try:
+            return self.preprocessor.normalize(image_data)
+        except Exception as e:
+            print(f"Image preprocessing failed, using original image: {e}")
+            return image_data
+
+    def extract_text_from_page(self, image_data: bytes) -> str:
+        return self._recognize(image_data).text
+
+    def recognize_page(self, image_data: bytes, use_cache: bool = True) -> PageOCRResult:
+        return self._recognize(image_data, use_cache)._replace(tier=self.tier)
+
+    def _shutdown_now(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
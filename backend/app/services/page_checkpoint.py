@@ -0,0 +1,112 @@
+"""Append-only per-page OCR checkpoints stored next to the raw file"""
+
+import json
+import os
+from typing import Dict, Iterator, Optional
+
+# 检查点文件保存在原文件旁边，随 BlobStore 删除文件时一并删除
+CHECKPOINT_SUFFIX = ".ocr-pages.jsonl"
+# 重新识别标记：存在时删除检查点之后的下一次识别跳过页面级 OCR 结果缓存，成功后删除
+REFRESH_SUFFIX = ".ocr-refresh"
+
+
+def request_refresh(file_path: str):
+    """丢弃文件的逐页检查点，并标记下一次识别不使用页面级结果缓存"""
+    if os.path.exists(file_path + CHECKPOINT_SUFFIX):
+        os.remove(file_path + CHECKPOINT_SUFFIX)
+    with open(file_path + REFRESH_SUFFIX, 'w'):
+        pass
+
+
+def refresh_requested(file_path: str) -> bool:
+    return os.path.exists(file_path + REFRESH_SUFFIX)
+
+
+def clear_refresh(file_path: str):
+    if os.path.exists(file_path + REFRESH_SUFFIX):
+        os.remove(file_path + REFRESH_SUFFIX)
+
+
+class PageCheckpoint:
+    """
+    逐页保存识别结果，任务中断或重试时从缺失的页面继续
+
+    文件为 JSON Lines：首行记录原文件大小和修改时间，之后每完成一页追加一行
+    {"page": 页码, "text": 文本}（OCR 页面另有 "tier"，记录识别所用的引擎）。
+    原文件变化时检查点作废重建。
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.path = file_path + CHECKPOINT_SUFFIX
+        self._offsets: Dict[int, int] = {}
+        self._fd: Optional[int] = None
+
+    def _header(self) -> dict:
+        stat = os.stat(self.file_path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def open(self) -> set:
+        """
+        打开检查点（不存在或已失效时新建）
+
+        Returns:
+            已完成的页码集合
+        """
+        header = self._header()
+        self._offsets = {}
+        valid = False
+        try:
+            with open(self.path, 'rb') as f:
+                valid = json.loads(f.readline()) == header
+                offset = f.tell()
+                for line in iter(f.readline, b''):
+                    try:
+                        record = json.loads(line)
+                        self._offsets[record["page"]] = offset
+                    except (ValueError, KeyError):
+                        # 进程中途退出时最后一行可能不完整
+                        pass
+                    offset = f.tell()
+        except (OSError, ValueError):
+            valid = False
+
+        if not valid:
+            self._offsets = {}
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(header) + '\n')
+
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        return set(self._offsets)
+
+    def append(self, index: int, text: str, tier: Optional[str] = None):
+        """追加一页结果；单次 write 写入整行，不会与其他进程的记录交错"""
+        entry = {"page": index, "text": text}
+        if tier:
+            entry["tier"] = tier
+        record = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        os.write(self._fd, record)
+        self._offsets[index] = os.lseek(self._fd, 0, os.SEEK_CUR) - len(record)
+
+    def iter_pages(self, page_count: int) -> Iterator[str]:
+        """
+        按页码顺序逐页读出已保存的文本
+
+        只在内存中保留当前页，长文档组装时不需要把所有页面同时读入。
+        """
+        with open(self.path, 'rb') as f:
+            for index in range(page_count):
+                if index in self._offsets:
+                    f.seek(self._offsets[index])
+                    yield json.loads(f.readline())["text"]
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,125 @@
+"""Fast text-layer pre-pass classifying PDF pages as text, scanned or mixed"""
+
+import json
+import os
+from typing import List, NamedTuple, Optional, Tuple
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+
+PAGE_TEXT = "text"
+PAGE_SCANNED = "scanned"
+PAGE_MIXED = "mixed"
+
+# 分类结果保存在原文件旁边
+SIDECAR_SUFFIX = ".pages.json"
+
+
+class PageInfo(NamedTuple):
+    page_type: str
+    char_count: int
+    valid_ratio: float
+    image_coverage: float
+
+
+def _is_valid_glyph(ch: str) -> bool:
+    """字体缺少 Unicode 映射时会得到替换字符、私用区字符或控制字符"""
+    return ch.isprintable() and ch != '\ufffd' and not ('\ue000' <= ch <= '\uf8ff')
+
+
+def page_text(page: pdfium.PdfPage) -> str:
+    """读取页面文本层（pdfium，不做版面分析）"""
+    textpage = page.get_textpage()
+    try:
+        return textpage.get_text_range().replace('\r\n', '\n')
+    finally:
+        textpage.close()
+
+
+class PageClassifier:
+    """
+    用 pdfium 读取文本层和图片位置，按字符数、字形有效率和图片覆盖率给页面分类
+
+    - text: 文本层可用，直接取文本
+    - scanned: 没有文本层或只有少量/乱码字符（如扫描仪印章），需要 OCR
+    - mixed: 文本层可用但页面大部分被图片覆盖，文本层和 OCR 都做
+    """
+
+    # 有效字符少于该数量视为没有文本层
+    MIN_TEXT_CHARS = 20
+    # 有效字形比例低于该值视为乱码文本层
+    MIN_VALID_RATIO = 0.8
+    # 图片覆盖页面超过该比例时按 mixed 处理
+    MIXED_IMAGE_COVERAGE = 0.5
+
+    def analyze_page(self, page: pdfium.PdfPage) -> Tuple[PageInfo, str]:
+        """分析单页，返回分类信息和文本层内容"""
+        text = page_text(page)
+        glyphs = [ch for ch in text if not ch.isspace()]
+        valid = sum(1 for ch in glyphs if _is_valid_glyph(ch))
+        valid_ratio = valid / len(glyphs) if glyphs else 0.0
+        coverage = self._image_coverage(page)
+
+        if valid < self.MIN_TEXT_CHARS or valid_ratio < self.MIN_VALID_RATIO:
+            page_type = PAGE_SCANNED
+        elif coverage >= self.MIXED_IMAGE_COVERAGE:
+            page_type = PAGE_MIXED
+        else:
+            page_type = PAGE_TEXT
+        return PageInfo(page_type, len(glyphs), round(valid_ratio, 3), round(coverage, 3)), text
+
+    def _image_coverage(self, page: pdfium.PdfPage) -> float:
+        """图片占页面面积的比例（重叠部分不去重，上限 1）"""
+        width, height = page.get_size()
+        page_area = width * height
+        if page_area <= 0:
+            return 0.0
+
+        covered = 0.0
+        for obj in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE,)):
+            # pypdfium2 5.x 将 get_pos 改名为 get_bounds
+            get_bounds = getattr(obj, "get_bounds", None) or obj.get_pos
+            left, bottom, right, top = get_bounds()
+            left, right = max(left, 0), min(right, width)
+            bottom, top = max(bottom, 0), min(top, height)
+            if right > left and top > bottom:
+                covered += (right - left) * (top - bottom)
+        return min(covered / page_area, 1.0)
+
+    @staticmethod
+    def sidecar_path(file_path: str) -> str:
+        return file_path + SIDECAR_SUFFIX
+
+    def load(self, file_path: str, page_count: int) -> Optional[List[PageInfo]]:
+        """
+        读取已保存的分类结果
+
+        文件大小、修改时间或页数变化时视为失效，返回 None。
+        """
+        path = self.sidecar_path(file_path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            stat = os.stat(file_path)
+            if data["size"] != stat.st_size or data["mtime_ns"] != stat.st_mtime_ns:
+                return None
+            pages = [PageInfo(**page) for page in data["pages"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return pages if len(pages) == page_count else None
+
+    def save(self, file_path: str, pages: List[PageInfo]):
+        """保存分类结果，失败不影响识别"""
+        try:
+            stat = os.stat(file_path)
+            data = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "pages": [page._asdict() for page in pages]
+            }
+            path = self.sidecar_path(file_path)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Failed to save page classification for {file_path}: {e}")
@@ -0,0 +1,128 @@
+"""Multi-process PDF page rasterization"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+import pypdfium2 as pdfium
+from app.core.config import settings
+from app.services.image_preprocessor import ImagePreprocessor
+
+# 工作进程内打开的文档，同一文件的连续页面无需重复解析
+_documents: "OrderedDict[str, tuple]" = OrderedDict()
+_MAX_OPEN_DOCUMENTS = 4
+_preprocessor: Optional[ImagePreprocessor] = None
+
+
+def _open_document(file_path: str) -> pdfium.PdfDocument:
+    mtime_ns = os.stat(file_path).st_mtime_ns
+    cached = _documents.get(file_path)
+    if cached and cached[0] == mtime_ns:
+        _documents.move_to_end(file_path)
+        return cached[1]
+    if cached:
+        cached[1].close()
+
+    pdf = pdfium.PdfDocument(file_path)
+    _documents[file_path] = (mtime_ns, pdf)
+    while len(_documents) > _MAX_OPEN_DOCUMENTS:
+        _, (_, oldest) = _documents.popitem(last=False)
+        oldest.close()
+    return pdf
+
+
+def _render_page(file_path: str, index: int, dpi: int, max_long_edge: Optional[int] = None) -> bytes:
+    """在工作进程中渲染一页并预处理为 OCR 用的 JPEG 字节"""
+    global _preprocessor
+    if _preprocessor is None:
+        _preprocessor = ImagePreprocessor()
+
+    page = _open_document(file_path)[index]
+    try:
+        bitmap = page.render(scale=dpi / 72, grayscale=True)
+        try:
+            return _preprocessor.normalize_image(bitmap.to_pil(), max_long_edge)
+        finally:
+            bitmap.close()
+    finally:
+        page.close()
+
+
+class PDFRasterizer:
+    """
+    常驻的 PDF 渲染进程池
+
+    渲染和 JPEG 编码是 CPU 密集操作，放在独立进程中才能随核数扩展；
+    只传递 (文件路径, 页码, DPI)，返回编码后的图片字节。
+    渲染进程崩溃（超大页面 OOM、pdfium 段错误）后进程池不可用，下次提交时重建。
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.pdf_render_workers
+        self._lock = threading.Lock()
+        self._pool = self._create_pool()
+        atexit.register(self._shutdown_now)
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        # spawn 启动：调用方可能在多线程环境（队列线程、Celery），fork 不安全
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """替换已损坏的进程池；多个线程同时发现时只重建一次"""
+        with self._lock:
+            if self._pool is broken:
+                print("PDF render worker died, restarting the render pool")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._create_pool()
+
+    def submit(self, file_path: str, index: int, dpi: Optional[int] = None,
+               max_long_edge: Optional[int] = None) -> Future:
+        """提交渲染任务，返回结果为 JPEG 字节的 Future"""
+        args = (_render_page, os.path.abspath(file_path), index, dpi or settings.pdf_render_dpi, max_long_edge)
+        pool = self._pool
+        try:
+            return pool.submit(*args)
+        except BrokenProcessPool:
+            self._restart(pool)
+            return self._pool.submit(*args)
+
+    def render(self, file_path: str, index: int, dpi: Optional[int] = None,
+               max_long_edge: Optional[int] = None) -> bytes:
+        """
+        渲染一页
+
+        进程池在渲染途中损坏时（可能是其他页面导致的）重建后重试一次；
+        再次失败说明很可能是这一页本身导致崩溃，异常交给调用方。
+        """
+        pool = self._pool
+        try:
+            return self.submit(file_path, index, dpi, max_long_edge).result()
+        except BrokenProcessPool:
+            self._restart(pool)
+            return self.submit(file_path, index, dpi, max_long_edge).result()
+
+    def _shutdown_now(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+_rasterizer: Optional[PDFRasterizer] = None
+_rasterizer_lock = threading.Lock()
+
+
+def get_rasterizer() -> PDFRasterizer:
+    """进程内共享的渲染进程池"""
+    global _rasterizer
+    with _rasterizer_lock:
+        if _rasterizer is None:
+            _rasterizer = PDFRasterizer()
+        return _rasterizer
@@ -0,0 +1,166 @@
+"""Provider-aware rate limiting with backoff on throttling responses"""
+
+import asyncio
+import math
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class ThrottledError(Exception):
+    """服务商返回限流（HTTP 429、百度 error_code 18 等）"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    令牌桶限流器，同步线程和协程都可以使用
+
+    令牌按 rate 每秒补充，最多积累 burst 个。取令牌时先预留，
+    令牌不足则计算需要等待的时间，在锁外等待，不阻塞其他调用方预留。
+    """
+
+    def __init__(self, name: str, rate: float, burst: Optional[float] = None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+    def _reserve(self) -> float:
+        """预留一个令牌，返回需要等待的秒数"""
+        if self.rate <= 0:
+            # 未配置限流
+            with self._lock:
+                self.acquired += 1
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+            self.acquired += 1
+            if wait > 0:
+                self.waited += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def acquire(self) -> float:
+        """阻塞直到取得令牌，返回等待时间"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """异步等待直到取得令牌，返回等待时间"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_throttle(self):
+        with self._lock:
+            self.throttled += 1
+
+    def stats(self) -> dict:
+        """限流等待指标"""
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "total_wait": round(self.total_wait, 3),
+                "avg_wait": round(self.total_wait / self.acquired, 3) if self.acquired else 0.0,
+                "max_wait": round(self.max_wait, 3),
+                "throttled": self.throttled
+            }
+
+
+def backoff_delay(attempt: int) -> float:
+    """第 attempt 次重试前的等待时间：指数增长并加随机抖动"""
+    delay = min(settings.provider_backoff_max, settings.provider_backoff_base * (2 ** attempt))
+    return random.uniform(delay / 2, delay)
+
+
+async def call_with_backoff(limiter: TokenBucket, request: Callable[[], Awaitable[T]]) -> T:
+    """
+    取得令牌后发起请求，被限流时按抖动指数退避重试
+
+    Args:
+        limiter: 对应服务商/接口的限流器
+        request: 发起一次请求的协程函数，被限流时抛出 ThrottledError
+
+    Raises:
+        ThrottledError: 重试次数用尽仍被限流
+    """
+    for attempt in range(settings.provider_max_retries + 1):
+        await limiter.acquire_async()
+        try:
+            return await request()
+        except ThrottledError as e:
+            limiter.record_throttle()
+            if attempt >= settings.provider_max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            if e.retry_after:
+                delay = max(delay, e.retry_after)
+            print(f"{limiter.name} throttled ({e}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数形式）"""
+    try:
+        seconds = float(value) if value else None
+    except ValueError:
+        return None
+    return seconds if seconds is not None and math.isfinite(seconds) else None
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, endpoint: Optional[str] = None) -> TokenBucket:
+    """
+    进程内共享的限流器
+
+    限额取 PROVIDER_RATE_LIMITS 中的 "provider:endpoint"，没有则取 "provider"，
+    都未配置时不限流。同一服务商的不同接口各自计数。
+    """
+    name = f"{provider}:{endpoint}" if endpoint else provider
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limits = settings.provider_rate_limits
+            rate = limits.get(name, limits.get(provider, 0.0))
+            limiter = TokenBucket(name, rate)
+            _limiters[name] = limiter
+        return limiter
+
+
+def rate_limiter_stats() -> Dict[str, dict]:
+    """所有限流器的等待指标"""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
@@ -0,0 +1,173 @@
+"""Durable OCR and AI extraction queues on Redis Streams"""
+
+import os
+import socket
+import threading
+import time
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.services.ocr_queue import AIQueueManager, OCRQueueManager
+
+# 合同不在排队或处理中时才写入 Stream，去重集合与消息一起原子更新
+_ENQUEUE_SCRIPT = """
+if redis.call('SADD', KEYS[2], ARGV[1]) == 1 then
+    return redis.call('XADD', KEYS[1], '*', 'contract_id', ARGV[1], 'added_time', ARGV[2], 'attempt', ARGV[3])
+end
+return false
+"""
+
+
+class RedisOCRQueueManager(OCRQueueManager):
+    """
+    基于 Redis Streams 的持久化 OCR 队列
+
+    任务写入 Stream，工作线程以消费者组成员的身份读取，处理结束后确认（XACK）并删除。
+    进程崩溃时未确认的消息留在消费者组的待处理列表中，空闲超过可见性超时
+    （OCR_QUEUE_VISIBILITY_TIMEOUT）后由其他工作线程重新领取；处理中的任务由心跳
+    线程定期续期，长文档不会被误领。多个 API 进程可以共享同一个队列。
+    """
+
+    _instance = None
+
+    GROUP = "ocr-workers"
+    # XREADGROUP 阻塞等待的时长，停止时最多延迟这么久退出
+    BLOCK_MS = 2000
+    # 同一消息被领取超过该次数（每次都导致进程崩溃）时丢弃，避免毒消息反复拖垮工作进程
+    MAX_DELIVERIES = 5
+
+    def __init__(self, processor=None, workers: Optional[int] = None, redis_client=None):
+        if self._initialized:
+            return
+
+        if redis_client is None:
+            import redis
+            redis_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+        self._redis = redis_client
+        self.stream = self._stream_name()
+        self._queued_key = f"{self.stream}:queued"
+        self._enqueue_script = self._redis.register_script(_ENQUEUE_SCRIPT)
+        self.visibility_timeout_ms = int(settings.ocr_queue_visibility_timeout * 1000)
+        self._consumer_prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self._ensure_group()
+
+        super().__init__(processor, workers)
+
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop, name=f"{self.STAGE}-queue-heartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def _stream_name(self) -> str:
+        return settings.ocr_queue_stream
+
+    def _ensure_group(self):
+        import redis
+        try:
+            self._redis.xgroup_create(self.stream, self.GROUP, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _consumer(self, worker_id: int) -> str:
+        return f"{self._consumer_prefix}-{worker_id}"
+
+    def _heartbeat_loop(self):
+        """定期重置处理中消息的空闲时间，相当于延长可见性超时"""
+        interval = self.visibility_timeout_ms / 1000 / 3
+        while not self._stop_event.wait(interval):
+            with self._processing_lock:
+                current = list(self._current_tasks.items())
+            for worker_id, task in current:
+                try:
+                    self._redis.xclaim(
+                        self.stream, self.GROUP, self._consumer(worker_id), 0, [task['message_id']], justid=True
+                    )
+                except Exception as e:
+                    print(f"{self.STAGE} queue heartbeat failed for {task.get('contract_id')}: {e}")
+
+    def _enqueue(self, contract_ids: List[str], attempt: int = 0) -> Tuple[int, int]:
+        now = str(time.time())
+        with self._redis.pipeline(transaction=False) as pipe:
+            for contract_id in contract_ids:
+                self._enqueue_script(keys=[self.stream, self._queued_key], args=[contract_id, now, attempt], client=pipe)
+            results = pipe.execute()
+        return sum(1 for message_id in results if message_id), self._redis.xlen(self.stream)
+
+    def _claim_stale(self, consumer: str) -> list:
+        """领取其他消费者超时未确认的消息（进程崩溃或失联）"""
+        result = self._redis.xautoclaim(
+            self.stream, self.GROUP, consumer, self.visibility_timeout_ms, start_id="0-0", count=1
+        )
+        messages = result[1]
+        for message_id, fields in messages:
+            pending = self._redis.xpending_range(self.stream, self.GROUP, message_id, message_id, 1)
+            if fields is None or (pending and pending[0]["times_delivered"] > self.MAX_DELIVERIES):
+                # 消息已被删除，或反复导致崩溃
+                print(f"Dropping {self.STAGE} queue message {message_id}: {fields}")
+                self._ack({'message_id': message_id, 'contract_id': (fields or {}).get('contract_id')})
+                return []
+        return messages
+
+    def _get_next_task(self, worker_id: int) -> Optional[dict]:
+        consumer = self._consumer(worker_id)
+        messages = self._claim_stale(consumer)
+        if not messages:
+            response = self._redis.xreadgroup(self.GROUP, consumer, {self.stream: ">"}, count=1, block=self.BLOCK_MS)
+            messages = response[0][1] if response else []
+        if not messages:
+            return None
+
+        message_id, fields = messages[0]
+        task = {
+            'contract_id': fields['contract_id'],
+            'added_time': float(fields['added_time']),
+            'attempt': int(fields.get('attempt', 0)),
+            'message_id': message_id
+        }
+        with self._processing_lock:
+            self._current_tasks[worker_id] = task
+        return task
+
+    def _ack(self, task: dict):
+        with self._redis.pipeline() as pipe:
+            pipe.xack(self.stream, self.GROUP, task['message_id'])
+            pipe.xdel(self.stream, task['message_id'])
+            if task.get('contract_id'):
+                pipe.srem(self._queued_key, task['contract_id'])
+            pipe.execute()
+
+    def _queued_contracts(self, limit: int) -> Tuple[int, List[str]]:
+        """尚未被任何消费者领取的消息（Stream 中最后投递位置之后的部分），最多列出 limit 个"""
+        with self._redis.pipeline(transaction=False) as pipe:
+            pipe.xinfo_groups(self.stream)
+            pipe.xlen(self.stream)
+            pipe.xpending(self.stream, self.GROUP)
+            groups, length, pending = pipe.execute()
+        last_delivered = next(group["last-delivered-id"] for group in groups if group["name"] == self.GROUP)
+        entries = self._redis.xrange(self.stream, min=last_delivered, count=limit + 1)
+        queued = [fields['contract_id'] for message_id, fields in entries if message_id != last_delivered]
+        # 确认后的消息会被删除，Stream 里只剩未领取和已领取未确认的消息
+        return max(length - pending["pending"], 0), queued[:limit]
+
+    def _wake_workers(self):
+        # 工作线程阻塞在 XREADGROUP 上，超时后检查停止标志
+        pass
+
+    def get_queue_status(self) -> dict:
+        """获取队列状态：只在读取本进程的当前任务时加锁，Redis 查询不阻塞工作线程"""
+        with self._processing_lock:
+            current_tasks = [task.get('contract_id') for task in self._current_tasks.values()]
+        queue_length, queued_contracts = self._queued_contracts(self.STATUS_LIST_LIMIT)
+        status = self._status(current_tasks, queue_length, queued_contracts)
+        # 所有进程已领取、尚未确认的消息数
+        status['in_flight'] = self._redis.xpending(self.stream, self.GROUP)["pending"]
+        return status
+
+
+class RedisAIQueueManager(RedisOCRQueueManager, AIQueueManager):
+    """基于 Redis Streams 的持久化 AI 提取队列（AI_QUEUE_STREAM）"""
+
+    _instance = None
+
+    def _stream_name(self) -> str:
+        return settings.ai_queue_stream
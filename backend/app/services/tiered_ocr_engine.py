@@ -0,0 +1,123 @@
+"""Tiered OCR: a fast engine first, the accurate engine only when needed"""
+
+import threading
+import time
+from typing import Dict, Optional
+from app.core.config import settings
+from app.services.image_preprocessor import ImagePreprocessor
+from app.services.ocr_engine import OCREngine, PageOCRResult
+
+
+class TieredOCREngine(OCREngine):
+    """
+    分级 OCR 引擎
+
+    先用快速引擎（百度 general_basic 或本地 PaddleOCR）识别，按行置信度和合同
+    关键词密度判断结果是否可信，不可信时升级到精确引擎（accurate_basic）重新识别。
+    返回结果的 tier 记录实际使用的引擎，stats() 汇总各级的页数和耗时。
+    """
+
+    name = "tiered"
+
+    # 合同关键字段所在页面的标志词，密度越高越需要精确识别
+    CONTRACT_KEYWORDS = ("甲方", "乙方", "金额", "价款", "人民币", "合同", "签订")
+    # 每百字出现的关键词数达到该值时视为关键页面
+    KEY_PAGE_DENSITY = 1.0
+    # 关键页面要求更高的置信度
+    KEY_PAGE_MIN_CONFIDENCE = 0.97
+
+    def __init__(self, fast: OCREngine, accurate: OCREngine):
+        self.fast = fast
+        self.accurate = accurate
+        self.min_confidence = settings.ocr_tier_min_confidence
+        self.preprocessor = ImagePreprocessor()
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, dict] = {}
+        self.escalations = 0
+
+    @property
+    def tier(self) -> str:
+        return f"{self.fast.tier}>{self.accurate.tier}"
+
+    def keyword_density(self, text: str) -> float:
+        """每百个非空白字符中出现的合同关键词数"""
+        chars = len(''.join(text.split()))
+        if not chars:
+            return 0.0
+        hits = sum(text.count(keyword) for keyword in self.CONTRACT_KEYWORDS)
+        return hits * 100 / chars
+
+    def should_escalate(self, result: Optional[PageOCRResult]) -> bool:
+        """快速引擎失败、置信度低，或关键页面置信度不够高时升级"""
+        if result is None:
+            return True
+        if result.confidence is None:
+            # 引擎不提供置信度时，只有关键页面升级
+            return self.keyword_density(result.text) >= self.KEY_PAGE_DENSITY
+        if result.confidence < self.min_confidence:
+            return True
+        return (
+            result.confidence < self.KEY_PAGE_MIN_CONFIDENCE
+            and self.keyword_density(result.text) >= self.KEY_PAGE_DENSITY
+        )
+
+    def _run(self, engine: OCREngine, image_data: bytes, use_cache: bool = True) -> PageOCRResult:
+        """识别一次并记录该级引擎的页数和耗时"""
+        start = time.perf_counter()
+        try:
+            return engine.recognize_page(image_data, use_cache)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self._stats.setdefault(engine.tier, {"pages": 0, "seconds": 0.0})
+                stats["pages"] += 1
+                stats["seconds"] += elapsed
+
+    def recognize_page(self, image_data: bytes, use_cache: bool = True) -> PageOCRResult:
+        try:
+            result = self._run(self.fast, image_data, use_cache)
+        except Exception as e:
+            print(f"Fast OCR tier {self.fast.tier} failed, escalating: {e}")
+            result = None
+
+        if not self.should_escalate(result):
+            return result
+        with self._lock:
+            self.escalations += 1
+        return self._run(self.accurate, image_data, use_cache)
+
+    def extract_text_from_image(self, image_path: str, use_cache: bool = True) -> str:
+        with open(image_path, 'rb') as f:
+            return self.recognize_page(self._normalize(f.read()), use_cache).text
+
+    def extract_text_from_bytes(self, image_data: bytes) -> str:
+        return self.recognize_page(self._normalize(image_data)).text
+
+    def _normalize(self, image_data: bytes) -> bytes:
+        # 两级引擎使用相同的预处理参数，只预处理一次
+        try:
+            return self.preprocessor.normalize(image_data)
+        except Exception as e:
+            print(f"Image preprocessing failed, using original image: {e}")
+            return image_data
+
+    def extract_text_from_page(self, image_data: bytes) -> str:
+        return self.recognize_page(image_data).text
+
+    def stats(self) -> dict:
+        """
+        各级引擎识别的页数、总耗时和平均耗时，升级次数，以及只用快速引擎完成
+        （省下一次精确识别调用）的页数
+        """
+        with self._lock:
+            tiers = {
+                tier: dict(stats, avg_seconds=stats["seconds"] / stats["pages"] if stats["pages"] else 0.0)
+                for tier, stats in self._stats.items()
+            }
+            fast_pages = self._stats.get(self.fast.tier, {}).get("pages", 0)
+            return {
+                "tiers": tiers,
+                "escalations": self.escalations,
+                "fast_only_pages": fast_pages - self.escalations
+            }
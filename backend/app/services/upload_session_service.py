@@ -0,0 +1,187 @@
+"""Resumable chunked upload sessions"""
+
+import hashlib
+import os
+import uuid
+from typing import AsyncIterator, Optional
+import aiofiles
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Contract, ContractFile, UploadSession
+from app.schemas.contract import ContractCreate
+from app.schemas.upload import UploadSessionCreate
+from app.services.contract_service import (
+    RAW_DIR,
+    UPLOAD_CHUNK_SIZE,
+    ContractService,
+    StoredFile,
+    UploadTooLargeError,
+)
+
+
+# 合同正在识别或提取时不能追加文件：OCR 任务已读取文件列表，新文件不会被识别
+PROCESSING_STATUSES = ("ocr_processing", "pending_ai", "ai_processing")
+
+
+class UploadSessionError(ValueError):
+    """会话状态不允许当前操作"""
+
+
+class UploadOffsetError(ValueError):
+    """分片偏移量超过已接收的字节数"""
+
+    def __init__(self, expected_offset: int):
+        super().__init__(f"Chunk offset must not exceed {expected_offset}")
+        self.expected_offset = expected_offset
+
+
+class UploadSessionService:
+    """断点续传：创建会话、按偏移量追加分片、完成后生成 ContractFile"""
+
+    def __init__(self):
+        self.contract_service = ContractService()
+
+    def create_session(self, db: Session, data: UploadSessionCreate) -> UploadSession:
+        """创建上传会话并预先创建空的临时文件"""
+        if data.total_size > settings.max_resumable_upload_size:
+            raise UploadTooLargeError(
+                f"File {data.filename} exceeds the upload limit of {settings.max_resumable_upload_size} bytes"
+            )
+
+        session_id = uuid.uuid4()
+        upload_dir = RAW_DIR / "uploads"
+        upload_dir.mkdir(exist_ok=True)
+        temp_path = upload_dir / f"{session_id}.part"
+        temp_path.touch()
+
+        upload_session = UploadSession(
+            id=session_id,
+            contract_number=data.contract_number,
+            contract_type=data.contract_type.lower(),
+            filename=os.path.basename(data.filename),
+            total_size=data.total_size,
+            received_size=0,
+            temp_path=str(temp_path),
+            status="uploading"
+        )
+        db.add(upload_session)
+        db.commit()
+        db.refresh(upload_session)
+        return upload_session
+
+    def get_session(self, db: Session, session_id, for_update: bool = False) -> Optional[UploadSession]:
+        """
+        查询上传会话
+
+        for_update=True 时锁定会话行直到事务提交，同一会话的并发分片和完成请求依次执行，
+        不会基于过期的 received_size 写入同一个临时文件。
+        """
+        query = db.query(UploadSession).filter(UploadSession.id == session_id)
+        if for_update:
+            query = query.with_for_update()
+        return query.first()
+
+    async def write_chunk(self, upload_session: UploadSession, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """
+        从 offset 处写入一个分片，返回写入后的文件长度
+
+        offset 小于已接收字节数时视为重传，先截断到 offset 再写入；
+        大于已接收字节数时拒绝，客户端应按返回的偏移量续传。
+
+        Raises:
+            UploadSessionError: 会话已结束
+            UploadOffsetError: 偏移量超出已接收范围
+            UploadTooLargeError: 写入后超过声明的文件大小
+        """
+        if upload_session.status != "uploading":
+            raise UploadSessionError(f"Upload session is {upload_session.status}")
+        if offset < 0 or offset > upload_session.received_size:
+            raise UploadOffsetError(upload_session.received_size)
+
+        end = offset
+        async with aiofiles.open(upload_session.temp_path, 'r+b') as f:
+            await f.truncate(offset)
+            await f.seek(offset)
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                end += len(chunk)
+                if end > upload_session.total_size:
+                    await f.truncate(offset)
+                    raise UploadTooLargeError(
+                        f"Chunk exceeds the declared size of {upload_session.total_size} bytes"
+                    )
+                await f.write(chunk)
+        return end
+
+    def record_progress(self, db: Session, upload_session: UploadSession, received_size: int) -> UploadSession:
+        """保存已接收字节数"""
+        upload_session.received_size = received_size
+        db.commit()
+        db.refresh(upload_session)
+        return upload_session
+
+    def complete(self, db: Session, upload_session: UploadSession) -> Contract:
+        """
+        完成上传：校验大小、计算哈希并纳入 BlobStore，创建或追加到合同
+
+        Returns:
+            关联的合同对象
+
+        Raises:
+            UploadSessionError: 会话已结束、未传完，或要追加的合同正在处理中（稍后重试）
+        """
+        if upload_session.status != "uploading":
+            raise UploadSessionError(f"Upload session is {upload_session.status}")
+        if upload_session.received_size != upload_session.total_size:
+            raise UploadSessionError(
+                f"Upload incomplete: received {upload_session.received_size} of {upload_session.total_size} bytes"
+            )
+
+        digest = hashlib.sha256()
+        with open(upload_session.temp_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        stored = StoredFile(
+            upload_session.filename,
+            upload_session.temp_path,
+            digest.hexdigest(),
+            upload_session.total_size
+        )
+
+        contract = db.query(Contract).filter(
+            Contract.contract_number == upload_session.contract_number
+        ).with_for_update().first()
+        if contract is not None and contract.status in PROCESSING_STATUSES:
+            raise UploadSessionError(
+                f"Contract {contract.contract_number} is {contract.status}, retry after processing finishes"
+            )
+        if contract is None:
+            contract = self.contract_service.create_contract(
+                db,
+                ContractCreate(
+                    contract_number=upload_session.contract_number,
+                    contract_type=upload_session.contract_type
+                ),
+                [stored]
+            )
+        else:
+            # 追加到已有合同，排在现有文件之后
+            order = db.query(ContractFile).filter(ContractFile.contract_id == contract.id).count()
+            self.contract_service.add_contract_file(db, contract.id, stored, order)
+            contract.status = "pending_ocr"
+
+        upload_session.status = "completed"
+        upload_session.contract_id = contract.id
+        db.commit()
+        db.refresh(contract)
+        return contract
+
+    def abort(self, db: Session, upload_session: UploadSession):
+        """取消上传并删除临时文件"""
+        if upload_session.status == "completed":
+            raise UploadSessionError("Upload session is completed")
+        if os.path.exists(upload_session.temp_path):
+            os.remove(upload_session.temp_path)
+        upload_session.status = "aborted"
+        db.commit()
@@ -3,6 +3,7 @@
 import json
 from celery import shared_task
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.core.db import get_db
 from app.models.models import Contract, ContractParty, AIExtractionResult
 from app.models.enums import ContractStatus, PartyType
@@ -10,17 +11,35 @@ from app.services.ai_extraction_service import AIExtractionService
 from datetime import datetime
 
 
-@shared_task(name="app.tasks.ai_extraction_tasks.process_ai_extraction")
-def process_ai_extraction(contract_id: str) -> dict:
+def retry_delay(attempt: int) -> float:
+    """第 attempt 次重试前的等待秒数（指数退避）"""
+    return settings.ai_retry_backoff * 2 ** attempt
+
+
+@shared_task(bind=True, name="app.tasks.ai_extraction_tasks.process_ai_extraction")
+def process_ai_extraction(self, contract_id: str) -> dict:
     """
     Process AI extraction for a contract
 
+    Retryable failures (provider errors, timeouts) are retried up to
+    AI_MAX_RETRIES times with exponential backoff when running on a Celery
+    worker; when called directly (the in-process AI queue) the caller retries.
+
     Args:
         contract_id: UUID of the contract to process
 
     Returns:
         Dict with processing status and extracted fields
     """
+    result = _extract_fields(contract_id)
+    if result.get("retryable") and not self.request.called_directly \
+            and self.request.retries < settings.ai_max_retries:
+        raise self.retry(countdown=retry_delay(self.request.retries))
+    return result
+
+
+def _extract_fields(contract_id: str) -> dict:
+    """Run AI extraction and save the fields; errors are returned, not raised"""
     import asyncio
 
     db: Session = next(get_db())
@@ -62,6 +81,8 @@ def process_ai_extraction(contract_id: str) -> dict:
         contract.requires_review = confidence < 0.8
 
         # Save extraction results to AIExtractionResult table
+        # 重新识别（trigger_ocr?refresh=true）后再次提取时替换上一次的结果
+        db.query(AIExtractionResult).filter(AIExtractionResult.contract_id == contract.id).delete()
         for field_name, value in extracted.items():
             if field_name != "parties" and value is not None:
                 extraction_result = AIExtractionResult(
@@ -115,7 +136,9 @@ def process_ai_extraction(contract_id: str) -> dict:
         return {
             "status": "error",
             "contract_id": str(contract_id),
-            "message": str(e)
+            "message": str(e),
+            # 合同和 OCR 文本都在，失败来自服务商或解析，可以重试
+            "retryable": True
         }
     finally:
         db.close()
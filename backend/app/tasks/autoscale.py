@@ -0,0 +1,58 @@
+"""Celery worker autoscaling driven by broker queue depth"""
+
+from typing import Dict, Iterable
+from celery.worker import state
+from celery.worker.autoscale import Autoscaler
+
+
+def broker_queue_depths(app, queues: Iterable[str]) -> Dict[str, int]:
+    """查询 broker 中各队列等待中的消息数"""
+    depths = {}
+    with app.connection_for_read() as connection:
+        channel = connection.default_channel
+        for queue in queues:
+            try:
+                depths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+            except Exception:
+                # 队列尚未创建
+                depths[queue] = 0
+    return depths
+
+
+class QueueDepthAutoscaler(Autoscaler):
+    """
+    按 broker 队列长度扩缩进程数
+
+    默认的 Autoscaler 只看本节点已预取的任务，而 worker_prefetch_multiplier=1 时
+    预取量最多等于进程数，积压再多也不会扩容。这里把本节点消费的队列中等待的
+    消息也计入需求：积压时扩到 --autoscale 的上限，队列清空后（keepalive 之后）缩回下限。
+    """
+
+    # 队列长度每隔多少秒查询一次（body 每秒执行一次）
+    DEPTH_INTERVAL = 5
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._depth = 0
+        self._ticks = 0
+
+    def _consumed_queues(self):
+        consumer = getattr(self.worker, "consumer", None)
+        task_consumer = getattr(consumer, "task_consumer", None)
+        if task_consumer is None:
+            return []
+        return [queue.name for queue in task_consumer.queues]
+
+    def queue_depth(self) -> int:
+        if self._ticks % self.DEPTH_INTERVAL == 0:
+            try:
+                self._depth = sum(broker_queue_depths(self.worker.app, self._consumed_queues()).values())
+            except Exception:
+                # broker 暂时不可用时保留上次的值
+                pass
+        self._ticks += 1
+        return self._depth
+
+    @property
+    def qty(self):
+        return len(state.reserved_requests) + self.queue_depth()
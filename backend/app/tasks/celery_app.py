@@ -3,6 +3,9 @@
 from celery import Celery
 from app.core.config import settings
 
+# OCR 和 AI 提取各自独立的队列，分别由不同的工作节点消费、独立扩缩容
+PIPELINE_QUEUES = ("ocr", "ai_extraction")
+
 # Create Celery app with Redis broker
 celery_app = Celery(
     "contract_scanner",
@@ -29,6 +32,8 @@ celery_app.conf.update(
     # Task execution
     task_acks_late=True,
     worker_prefetch_multiplier=1,
+    # --autoscale 时按队列积压扩缩进程数
+    worker_autoscaler="app.tasks.autoscale:QueueDepthAutoscaler",
 
     # Result settings
     result_expires=3600,  # 1 hour
@@ -0,0 +1,69 @@
+"""Dispatch OCR and AI extraction work to Celery workers or the in-process queues"""
+
+from typing import Dict, List
+from app.core.config import settings
+
+OCR_TASK = "app.tasks.ocr_tasks.process_ocr"
+AI_TASK = "app.tasks.ai_extraction_tasks.process_ai_extraction"
+
+
+def dispatch_ocr(contract_id: str) -> dict:
+    """
+    提交单个合同的 OCR 任务
+
+    CELERY_ENABLED 时发送到 Celery 的 ocr 队列，由独立的工作节点处理；
+    否则加入进程内队列（开发环境）。
+    """
+    if settings.celery_enabled:
+        from app.tasks.celery_app import celery_app
+        result = celery_app.send_task(OCR_TASK, args=[contract_id])
+        return {'status': 'dispatched', 'contract_id': contract_id, 'task_id': result.id}
+
+    from app.services.ocr_queue import ocr_queue_manager
+    return ocr_queue_manager.add_task(contract_id)
+
+
+def dispatch_ocr_batch(contract_ids: List[str]) -> dict:
+    """批量提交 OCR 任务"""
+    if settings.celery_enabled:
+        from app.tasks.celery_app import celery_app
+        # 复用同一个 broker 连接发送整批任务
+        with celery_app.producer_or_acquire() as producer:
+            for contract_id in contract_ids:
+                celery_app.send_task(OCR_TASK, args=[contract_id], producer=producer)
+        return {'status': 'dispatched', 'queued_count': len(contract_ids)}
+
+    from app.services.ocr_queue import ocr_queue_manager
+    return ocr_queue_manager.add_tasks(contract_ids)
+
+
+def dispatch_ai_extraction(contract_id: str) -> dict:
+    """
+    提交 OCR 已完成（pending_ai）合同的 AI 提取任务
+
+    CELERY_ENABLED 时发送到 Celery 的 ai_extraction 队列；否则加入进程内的 AI 队列。
+    两种方式都由独立的工作线程 / 工作节点处理，调用方不等待提取完成。
+    """
+    if settings.celery_enabled:
+        from app.tasks.celery_app import celery_app
+        result = celery_app.send_task(AI_TASK, args=[contract_id])
+        return {'status': 'dispatched', 'contract_id': contract_id, 'task_id': result.id}
+
+    from app.services.ocr_queue import ai_queue_manager
+    return ai_queue_manager.add_task(contract_id)
+
+
+def pipeline_queue_depths() -> Dict[str, int]:
+    """
+    各阶段排队中的任务数，供外部自动扩缩容（如按队列长度扩缩工作节点）使用
+    """
+    if settings.celery_enabled:
+        from app.tasks.autoscale import broker_queue_depths
+        from app.tasks.celery_app import celery_app, PIPELINE_QUEUES
+        return broker_queue_depths(celery_app, PIPELINE_QUEUES)
+
+    from app.services.ocr_queue import ai_queue_manager, ocr_queue_manager
+    return {
+        'ocr': ocr_queue_manager.get_queue_status()['queue_length'],
+        'ai_extraction': ai_queue_manager.get_queue_status()['queue_length']
+    }
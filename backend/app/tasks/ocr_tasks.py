@@ -1,13 +1,88 @@
 """OCR processing functions"""
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from celery import shared_task
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.core.db import get_db
 from app.models.models import Contract, ContractFile
 from app.services.ocr_service import OCRService
+from app.services.contract_service import BLOB_DIR, RAW_DIR
+from app.services.blob_store import BlobStore
 import tempfile
+import threading
 import os
 
+FILE_SEPARATOR = "\n\n=== 下一页 ===\n\n"
 
+
+class OrderedTextWriter:
+    """按文件顺序写出识别结果：先完成的后续文件暂存，前面的文件一到就依次写入并释放"""
+
+    def __init__(self, out, separator: str):
+        self.out = out
+        self.separator = separator
+        self._next = 0
+        self._waiting = {}
+
+    def add(self, index: int, text: str):
+        self._waiting[index] = text
+        while self._next in self._waiting:
+            if self._next > 0:
+                self.out.write(self.separator)
+            self.out.write(self._waiting.pop(self._next))
+            self._next += 1
+
+
+def _extract_contract_files(db: Session, ocr_service: OCRService, blob_store: BlobStore,
+                            contract_files: list, writer: OrderedTextWriter) -> list:
+    """
+    并发提取合同各文件文本，结果按 file_order 交给 writer 写出
+
+    相同内容已识别过时直接复用；同一合同内重复的文件只识别一次。
+    识别失败的文件写入占位文本，不缓存（PDF 已完成的页面保留在检查点中）。
+
+    Returns:
+        识别失败的文件名列表
+    """
+    failed = []
+    pending = {}
+    for index, cf in enumerate(contract_files):
+        # 相同内容已识别过时直接复用，不再调用 OCR 服务
+        cached_text = blob_store.get_ocr_text(db, cf.sha256)
+        if cached_text is not None:
+            print(f"Reusing OCR text for file {cf.filename} ({cf.sha256})")
+            writer.add(index, cached_text)
+            continue
+        # 同一合同内重复的文件只识别一次
+        key = cf.sha256 or cf.file_path
+        pending.setdefault(key, []).append(index)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=settings.ocr_file_concurrency) as executor:
+            futures = {
+                executor.submit(ocr_service.extract_text_from_file, contract_files[indexes[0]].file_path): indexes
+                for indexes in pending.values()
+            }
+            for future in as_completed(futures):
+                indexes = futures.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    for index in indexes:
+                        cf = contract_files[index]
+                        print(f"Error processing file {cf.filename}: {e}")
+                        writer.add(index, f"[文件 {cf.filename} 识别失败]")
+                        failed.append(cf.filename)
+                    continue
+                # 数据库会话只在当前线程使用
+                blob_store.save_ocr_text(db, contract_files[indexes[0]].sha256, text)
+                for index in indexes:
+                    writer.add(index, text)
+    return failed
+
+
+@shared_task(name="app.tasks.ocr_tasks.process_ocr")
 def process_ocr(contract_id: str) -> dict:
     """
     Process OCR for a contract (supports multiple files)
@@ -20,6 +95,7 @@ def process_ocr(contract_id: str) -> dict:
     """
     db: Session = next(get_db())
     ocr_service = OCRService()
+    blob_store = BlobStore(BLOB_DIR)
 
     try:
         # Get contract from database
@@ -37,45 +113,50 @@ def process_ocr(contract_id: str) -> dict:
             .order_by(ContractFile.file_order)\
             .all()
 
-        if not contract_files:
-            # 兼容旧数据：如果没有 ContractFile，使用 file_path
-            if not contract.file_path:
-                return {"status": "error", "message": "No files found for contract"}
-
-            # 单文件处理（旧数据）
-            text = ocr_service.extract_text_from_file(contract.file_path)
-            all_text_parts = [text]
-        else:
-            # 多文件处理：按顺序提取每个文件的文本
-            all_text_parts = []
-            for cf in contract_files:
-                try:
-                    text = ocr_service.extract_text_from_file(cf.file_path)
-                    all_text_parts.append(text)
-                except Exception as e:
-                    print(f"Error processing file {cf.filename}: {e}")
-                    all_text_parts.append(f"[文件 {cf.filename} 识别失败]")
+        if not contract_files and not contract.file_path:
+            return {"status": "error", "message": "No files found for contract"}
 
-        # 合并所有文本（按页顺序）
-        combined_text = "\n\n=== 下一页 ===\n\n".join(all_text_parts)
+        text_dir = RAW_DIR if contract_files else os.path.dirname(contract.file_path)
+        text_path = os.path.join(text_dir, f"{contract.contract_number}_ocr.txt")
+        # 边识别边写入临时文件，完成后替换，不在内存中拼接整份合同文本
+        tmp_text_path = f"{text_path}.{os.getpid()}.{threading.get_ident()}.tmp"
 
-        # 保存合并后的文本到文件
-        text_path = os.path.join(
-            os.path.dirname(contract_files[0].file_path if contract_files else contract.file_path),
-            f"{contract.contract_number}_ocr.txt"
-        )
-        with open(text_path, 'w', encoding='utf-8') as f:
-            f.write(combined_text)
+        failed_files = []
+        try:
+            with open(tmp_text_path, 'w', encoding='utf-8') as out:
+                writer = OrderedTextWriter(out, FILE_SEPARATOR)
+
+                if not contract_files:
+                    # 兼容旧数据：没有 ContractFile 时按单文件处理
+                    writer.add(0, ocr_service.extract_text_from_file(contract.file_path))
+                else:
+                    failed_files = _extract_contract_files(db, ocr_service, blob_store, contract_files, writer)
+        except Exception:
+            if os.path.exists(tmp_text_path):
+                os.remove(tmp_text_path)
+            raise
+        os.replace(tmp_text_path, text_path)
 
         # Update contract with OCR result
         contract.ocr_text_path = text_path
+        if failed_files:
+            # 有文件识别失败时不做 AI 提取；重新触发 OCR 时复用已成功的文件和页面，只补做失败的部分
+            contract.status = "ocr_failed"
+            db.commit()
+            return {
+                "status": "error",
+                "contract_id": str(contract_id),
+                "text_path": text_path,
+                "failed_files": failed_files,
+                "message": f"OCR failed for {len(failed_files)} files: {', '.join(failed_files)}"
+            }
         contract.status = "pending_ai"  # 待AI提取
         db.commit()
 
-        # 自动触发 AI 提取
+        # AI 提取交给独立的 AI 队列，OCR 工作线程不等待服务商返回，直接处理下一个合同
         try:
-            from app.tasks.ai_extraction_tasks import process_ai_extraction
-            ai_result = process_ai_extraction(contract_id)
+            from app.tasks.dispatch import dispatch_ai_extraction
+            ai_result = dispatch_ai_extraction(str(contract_id))
             return {
                 "status": "success",
                 "contract_id": str(contract_id),
@@ -84,13 +165,13 @@ def process_ocr(contract_id: str) -> dict:
                 "ai_extraction": ai_result
             }
         except Exception as ai_error:
-            # AI 提取失败不影响 OCR 结果
+            # AI 提取入队失败不影响 OCR 结果，合同保持 pending_ai，可由启动对账恢复
             return {
                 "status": "success_with_ai_warning",
                 "contract_id": str(contract_id),
                 "text_path": text_path,
                 "files_processed": len(contract_files) if contract_files else 1,
-                "message": f"OCR completed, but AI extraction failed: {str(ai_error)}"
+                "message": f"OCR completed, but AI extraction could not be queued: {str(ai_error)}"
             }
 
     except Exception as e:
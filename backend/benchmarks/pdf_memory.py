@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+大体积扫描版 PDF 内存基准测试
+
+生成 N 页的合成扫描 PDF（每页一张整页灰度噪点图，没有文本层），用模拟的
+OCR 引擎（固定延迟、不访问网络）跑完整的 _extract_from_pdf 流程，统计不同
+OCR_MEMORY_BUDGET_MB 下主进程和渲染进程的峰值 RSS 及耗时。每组配置在独立
+子进程中运行，峰值互不影响。
+
+用法:
+    python benchmarks/pdf_memory.py --pages 800 --budgets 64 256 1024 \\
+        --dpi 150 --ocr-latency-ms 20
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def write_synthetic_pdf(path: Path, pages: int, width: int = 1240, height: int = 1754):
+    """写入 pages 页、每页引用同一张噪声图片的 PDF（文件小，渲染开销与真实扫描件相当）"""
+    # 白底上约 5% 的随机黑点，压缩率接近真实扫描的文字页
+    pixels = bytes(0 if b < 13 else 255 for b in os.urandom(width * height))
+    image = zlib.compress(pixels, 1)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # 页面树，页面对象编号确定后再填
+        b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+        b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n" % (width, height, len(image))
+        + image + b"\nendstream",
+    ]
+    content = b"q 595 0 0 842 0 0 cm /Im0 Do Q"
+    objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+    content_id = len(objects)
+
+    page_ids = []
+    for _ in range(pages):
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /XObject << /Im0 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def run_worker(pdf_path: str, latency: float):
+    """子进程：跑一次 PDF 提取并输出峰值内存（JSON）"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    from app.services.ocr_engine import PageOCRResult
+    from app.services.ocr_service import OCRService
+    from app.services.pdf_rasterizer import get_rasterizer
+
+    class SimulatedOCR:
+        name = "simulated"
+
+        def recognize_page(self, image_data: bytes) -> PageOCRResult:
+            time.sleep(latency)
+            return PageOCRResult(f"甲方：某某公司 乙方：某某公司 金额：{len(image_data)} 元", 0.95)
+
+    service = OCRService()
+    service.engine = SimulatedOCR()
+
+    start = time.perf_counter()
+    text = service.extract_text_from_file(pdf_path)
+    elapsed = time.perf_counter() - start
+    get_rasterizer().shutdown()
+
+    # Linux 下 ru_maxrss 单位为 KB
+    print(json.dumps({
+        "seconds": round(elapsed, 2),
+        "pages_out": text.count("甲方"),
+        "main_peak_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "renderer_peak_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scanned PDF memory benchmark")
+    parser.add_argument("--pages", type=int, default=800, help="合成 PDF 页数")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[64, 256, 1024], help="OCR_MEMORY_BUDGET_MB 取值")
+    parser.add_argument("--dpi", type=int, default=150, help="PDF_RENDER_DPI")
+    parser.add_argument("--concurrency", type=int, default=8, help="OCR_PDF_PAGE_CONCURRENCY")
+    parser.add_argument("--render-workers", type=int, default=0, help="PDF_RENDER_WORKERS，0 为 CPU 核数")
+    parser.add_argument("--ocr-latency-ms", type=float, default=20, help="模拟 OCR 每页耗时")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.ocr_latency_ms / 1000)
+        return
+
+    work_dir = Path(tempfile.mkdtemp(prefix="pdf_memory_"))
+    try:
+        pdf_path = work_dir / "synthetic.pdf"
+        write_synthetic_pdf(pdf_path, args.pages)
+        print(f"Synthetic PDF: {args.pages} pages, {pdf_path.stat().st_size / 1024 / 1024:.1f} MB, "
+              f"dpi={args.dpi}, concurrency={args.concurrency}")
+        print(f"{'budget_mb':>10} {'seconds':>8} {'main_peak_mb':>13} {'renderer_peak_mb':>17}")
+
+        for budget in args.budgets:
+            # 每次运行前清理检查点和分类结果，保证从头处理
+            for sidecar in work_dir.glob("synthetic.pdf.*"):
+                sidecar.unlink()
+            env = dict(
+                os.environ,
+                OCR_MEMORY_BUDGET_MB=str(budget),
+                PDF_RENDER_DPI=str(args.dpi),
+                OCR_PDF_PAGE_CONCURRENCY=str(args.concurrency),
+                PDF_RENDER_WORKERS=str(args.render_workers),
+            )
+            output = subprocess.run(
+                [sys.executable, __file__, "--worker", str(pdf_path), "--ocr-latency-ms", str(args.ocr_latency_ms)],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            assert result["pages_out"] == args.pages, result
+            print(f"{budget:>10} {result['seconds']:>8} {result['main_peak_mb']:>13} {result['renderer_peak_mb']:>17}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
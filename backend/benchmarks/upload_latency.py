@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+上传接口延迟基准测试
+
+对运行中的后端并发调用 /api/contracts/upload，统计不同并发上传数下的
+p50 / p95 / p99 延迟，用于观察事件循环是否被阻塞。
+
+用法:
+    python benchmarks/upload_latency.py --base-url http://localhost:8001 \\
+        --concurrency 1 4 16 32 --requests 64 --file-size-kb 2048
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def percentile(values: list, pct: float) -> float:
+    """返回升序列表的百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+async def upload_once(client: httpx.AsyncClient, file_size: int, run_id: str, index: int) -> float:
+    """上传一份合同，返回耗时（秒）"""
+    # 随机内容，避免被去重存储命中
+    payload = os.urandom(file_size)
+    files = [("files", (f"bench_{index}.jpg", payload, "image/jpeg"))]
+    data = {
+        "contract_number": f"BENCH-{run_id}-{index}",
+        "contract_type": "purchase",
+    }
+    start = time.perf_counter()
+    response = await client.post("/api/contracts/upload", files=files, data=data)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed
+
+
+async def run_level(base_url: str, concurrency: int, total: int, file_size: int) -> list:
+    """以固定并发数完成 total 次上传，返回每次的耗时"""
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300.0) as client:
+        async def worker(index: int):
+            async with semaphore:
+                latencies.append(await upload_once(client, file_size, run_id, index))
+
+        await asyncio.gather(*(worker(i) for i in range(total)))
+
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Upload latency vs. concurrency benchmark")
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--requests", type=int, default=64, help="uploads per concurrency level")
+    parser.add_argument("--file-size-kb", type=int, default=1024)
+    args = parser.parse_args()
+
+    print(f"{'concurrency':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'req/s':>8}")
+    for concurrency in args.concurrency:
+        start = time.perf_counter()
+        latencies = await run_level(args.base_url, concurrency, args.requests, args.file_size_kb * 1024)
+        wall = time.perf_counter() - start
+        ms = [v * 1000 for v in latencies]
+        print(
+            f"{concurrency:>11} {percentile(ms, 50):>9.1f} {percentile(ms, 95):>9.1f} "
+            f"{percentile(ms, 99):>9.1f} {statistics.mean(ms):>9.1f} {len(ms) / wall:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
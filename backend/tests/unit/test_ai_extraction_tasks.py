@@ -0,0 +1,37 @@
+"""Tests for saving AI extraction results"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.models import AIExtractionResult, Contract, ContractParty
+
+
+def test_reextraction_replaces_previous_results():
+    contract = MagicMock(id="contract-id", ocr_text_path="/raw/HT001_ocr.txt")
+    queries = {}
+
+    def query(model):
+        q = queries.setdefault(model, MagicMock())
+        q.filter.return_value.first.return_value = contract
+        return q
+
+    db = MagicMock()
+    db.query.side_effect = query
+    extracted = {
+        "extracted_data": {"total_amount": 1000, "subject_matter": "设备采购"},
+        "confidence_score": 0.9,
+        "model_version": "qwen-plus",
+    }
+
+    with patch("app.tasks.ai_extraction_tasks.get_db", return_value=iter([db])), \
+            patch("app.tasks.ai_extraction_tasks.AIExtractionService") as service_cls:
+        service_cls.return_value.extract_from_minio_file = AsyncMock(return_value=extracted)
+        from app.tasks.ai_extraction_tasks import process_ai_extraction
+        result = process_ai_extraction("contract-id")
+
+    assert result["status"] == "success"
+    # 刷新后再次提取不会累积重复的结果行
+    queries[AIExtractionResult].filter.return_value.delete.assert_called_once()
+    added = [call.args[0] for call in db.add.call_args_list]
+    assert sorted(row.field_name for row in added) == ["subject_matter", "total_amount"]
+    assert ContractParty not in queries
+    assert Contract in queries
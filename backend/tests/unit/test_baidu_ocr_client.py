@@ -0,0 +1,174 @@
+"""Tests for the pooled async Baidu OCR client"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.services import baidu_token_cache
+from app.services.baidu_ocr_client import AsyncBaiduOCRService
+from app.services.baidu_token_cache import BaiduTokenCache
+from app.services.ocr_result_cache import OCRResultCache
+from app.services.ocr_service import BaiduOCRService
+
+
+@pytest.fixture(autouse=True)
+def token_fetches(monkeypatch):
+    """Hand out token-1, token-2, ... instead of calling the Baidu token endpoint"""
+    fetched = []
+
+    def fake_fetch(self):
+        fetched.append(f"token-{len(fetched) + 1}")
+        return fetched[-1], time.time() + 2592000
+
+    monkeypatch.setattr(baidu_token_cache, "_caches", {})
+    monkeypatch.setattr(BaiduTokenCache, "_fetch", fake_fetch)
+    monkeypatch.setattr("app.services.baidu_ocr_client.get_ocr_result_cache", lambda: None)
+    return fetched
+
+
+class FakeBaidu:
+    """MockTransport handler tracking how many OCR requests are in flight"""
+
+    def __init__(self, valid_token="token-1"):
+        self.valid_token = valid_token
+        self.active = 0
+        self.max_active = 0
+        self.ocr_requests = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.params["access_token"] != self.valid_token:
+            return httpx.Response(200, json={"error_code": 110, "error_msg": "Access token invalid or no longer valid"})
+        self.ocr_requests += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        return httpx.Response(200, json={"words_result": [{"words": "甲方"}, {"words": "乙方"}]})
+
+
+def test_async_client_recognizes_image():
+    fake = FakeBaidu()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+
+    with patch("app.services.baidu_ocr_client.get_http_client", return_value=client):
+        text = asyncio.run(AsyncBaiduOCRService().recognize(b"image"))
+
+    assert text == "甲方\n乙方"
+
+
+def test_line_confidence_is_weighted_by_length():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        assert b"probability=true" in request.content
+        return httpx.Response(200, json={"words_result": [
+            {"words": "甲方", "probability": {"average": 0.9, "min": 0.8, "variance": 0.01}},
+            {"words": "合同金额", "probability": {"average": 0.6, "min": 0.4, "variance": 0.02}},
+        ]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch("app.services.baidu_ocr_client.get_http_client", return_value=client):
+        result = asyncio.run(AsyncBaiduOCRService().recognize_page(b"image"))
+
+    assert result.text == "甲方\n合同金额"
+    assert result.confidence == pytest.approx((2 * 0.9 + 4 * 0.6) / 6)
+
+
+def test_cached_result_skips_provider(tmp_path):
+    fake = FakeBaidu()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+    service = AsyncBaiduOCRService()
+    service.result_cache = OCRResultCache(tmp_path / "ocr.sqlite3", max_bytes=1024 * 1024)
+
+    async def recognize_twice():
+        return [await service.recognize(b"image"), await service.recognize(b"image")]
+
+    with patch("app.services.baidu_ocr_client.get_http_client", return_value=client):
+        texts = asyncio.run(recognize_twice())
+
+    assert texts == ["甲方\n乙方"] * 2
+    assert fake.ocr_requests == 1
+    assert service.result_cache.stats()["hits"] == 1
+
+
+def test_refresh_bypasses_cached_result(tmp_path):
+    fake = FakeBaidu()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+    service = AsyncBaiduOCRService()
+    service.result_cache = OCRResultCache(tmp_path / "ocr.sqlite3", max_bytes=1024 * 1024)
+
+    async def recognize_then_refresh():
+        await service.recognize(b"image")
+        await service.recognize(b"image", use_cache=False)
+
+    with patch("app.services.baidu_ocr_client.get_http_client", return_value=client):
+        asyncio.run(recognize_then_refresh())
+
+    # 重新识别时不读缓存，再次请求百度
+    assert fake.ocr_requests == 2
+    assert service.result_cache.stats()["hits"] == 0
+
+
+def test_qps_limit_error_is_retried(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "PROVIDER_BACKOFF_BASE", 0.001)
+    fake = FakeBaidu()
+    responses = [{"error_code": 18, "error_msg": "Open api qps request limit reached"}]
+
+    async def throttled_once(request):
+        if responses:
+            return httpx.Response(200, json=responses.pop())
+        return await fake(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(throttled_once))
+    service = AsyncBaiduOCRService()
+
+    with patch("app.services.baidu_ocr_client.get_http_client", return_value=client):
+        text = asyncio.run(service.recognize(b"image"))
+
+    assert text == "甲方\n乙方"
+    assert fake.ocr_requests == 1
+
+
+def test_invalid_token_is_refreshed_and_retried(token_fetches):
+    fake = FakeBaidu(valid_token="token-2")
+    client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+
+    with patch("app.services.baidu_ocr_client.get_http_client", return_value=client):
+        text = asyncio.run(AsyncBaiduOCRService().recognize(b"image"))
+
+    assert text == "甲方\n乙方"
+    assert token_fetches == ["token-1", "token-2"]
+
+
+def test_sync_facade_keeps_many_pages_in_flight(token_fetches):
+    fake = FakeBaidu()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+    service = BaiduOCRService()
+
+    with patch("app.services.baidu_ocr_client.get_http_client", return_value=client), \
+            patch.object(service.client, "load_image", return_value=b"image"):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(service.extract_text_from_image, ["page.png"] * 8))
+
+    assert results == ["甲方\n乙方"] * 8
+    assert fake.max_active > 1
+    assert token_fetches == ["token-1"]
+
+
+def test_sync_facade_accepts_image_bytes_and_rendered_pages():
+    import io
+    from PIL import Image
+
+    fake = FakeBaidu()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+    service = BaiduOCRService()
+    page = Image.new("RGB", (300, 200), "white")
+    buffer = io.BytesIO()
+    page.save(buffer, format="PNG")
+
+    with patch("app.services.baidu_ocr_client.get_http_client", return_value=client):
+        assert service.extract_text_from_bytes(buffer.getvalue()) == "甲方\n乙方"
+        assert service.extract_text_from_page(buffer.getvalue()) == "甲方\n乙方"
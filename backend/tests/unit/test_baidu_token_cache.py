@@ -0,0 +1,63 @@
+"""Tests for the shared Baidu access-token cache"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.baidu_token_cache import BaiduTokenCache
+
+
+class CountingTokenCache(BaiduTokenCache):
+    """Token cache whose fetch is slow and counted instead of calling Baidu"""
+
+    def __init__(self, expires_in=2592000):
+        super().__init__("key", "secret")
+        self.expires_in = expires_in
+        self.fetches = 0
+        self.fetch_lock = threading.Lock()
+
+    def _fetch(self):
+        time.sleep(0.05)
+        with self.fetch_lock:
+            self.fetches += 1
+            return f"token-{self.fetches}", time.time() + self.expires_in
+
+
+def test_concurrent_callers_share_one_fetch():
+    cache = CountingTokenCache()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tokens = list(executor.map(lambda _: cache.get_token(), range(8)))
+
+    assert tokens == ["token-1"] * 8
+    assert cache.fetches == 1
+
+
+def test_token_is_reused_until_invalidated():
+    cache = CountingTokenCache()
+
+    assert cache.get_token() == "token-1"
+    assert cache.get_token() == "token-1"
+
+    # 其他请求已经换过 token 时，旧 token 的失效通知不影响新 token
+    cache.invalidate("stale")
+    assert cache.get_token() == "token-1"
+
+    cache.invalidate("token-1")
+    assert cache.get_token() == "token-2"
+
+
+def test_token_near_expiry_is_refreshed_in_background():
+    # 有效期 1000 秒，刷新点在过期前 100 秒
+    cache = CountingTokenCache(expires_in=1000)
+    assert cache.get_token() == "token-1"
+
+    cache._refresh_at = time.time() - 1
+    # 刷新期间调用方继续拿到旧 token
+    assert cache.get_token() == "token-1"
+
+    deadline = time.time() + 2
+    while cache.get_token() != "token-2" and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get_token() == "token-2"
+    assert cache.fetches == 2
@@ -0,0 +1,101 @@
+"""Tests for the content-addressed BlobStore"""
+
+import hashlib
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.models import FileBlob
+from app.services.blob_store import BlobStore
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    FileBlob.__table__.create(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def stage(tmp_path, name: str, content: bytes) -> tuple:
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path), hashlib.sha256(content).hexdigest()
+
+
+def test_duplicate_content_is_stored_once(db, tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    first, sha = stage(tmp_path, "a.part", b"page")
+    second, _ = stage(tmp_path, "b.part", b"page")
+
+    blob = store.add_file(db, first, sha, 4, "scan.JPG")
+    again = store.add_file(db, second, sha, 4, "scan copy.jpg")
+    db.commit()
+
+    assert blob is again
+    assert blob.ref_count == 2
+    assert blob.file_path.endswith(f"{sha[:2]}/{sha}.jpg")
+    assert open(blob.file_path, "rb").read() == b"page"
+    assert not (tmp_path / "a.part").exists()
+    assert not (tmp_path / "b.part").exists()
+
+
+def test_release_deletes_file_with_last_reference(db, tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    staged, sha = stage(tmp_path, "a.part", b"page")
+    blob = store.add_file(db, staged, sha, 4, "scan.pdf")
+    store.add_file(db, stage(tmp_path, "b.part", b"page")[0], sha, 4, "scan.pdf")
+    db.commit()
+    path = blob.file_path
+    sidecar = tmp_path / "blobs" / sha[:2] / f"{sha}.pdf.pages.json"
+    sidecar.write_text("{}")
+
+    store.release(db, sha, path)
+    db.commit()
+    assert store.get(db, sha).ref_count == 1
+    assert sidecar.exists()
+
+    store.release(db, sha, path)
+    db.commit()
+    assert store.get(db, sha) is None
+    assert not (tmp_path / "blobs" / sha[:2] / f"{sha}.pdf").exists()
+    assert not sidecar.exists()
+
+
+def test_ocr_text_is_reused_by_hash(db, tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    staged, sha = stage(tmp_path, "a.part", b"page")
+    store.add_file(db, staged, sha, 4, "scan.png")
+
+    assert store.get_ocr_text(db, sha) is None
+    store.save_ocr_text(db, sha, "甲方：测试公司")
+    db.commit()
+
+    assert store.get_ocr_text(db, sha) == "甲方：测试公司"
+    assert store.get_ocr_text(db, None) is None
+
+
+def test_empty_ocr_text_is_not_cached_and_cache_can_be_cleared(db, tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    staged, sha = stage(tmp_path, "a.part", b"page")
+    blob = store.add_file(db, staged, sha, 4, "scan.pdf")
+    checkpoint = tmp_path / "blobs" / sha[:2] / f"{sha}.pdf.ocr-pages.jsonl"
+    checkpoint.write_text("{}\n")
+
+    # 无法打开的文件等返回空文本，不应被之后相同内容的文件复用
+    store.save_ocr_text(db, sha, "  \n")
+    db.commit()
+    assert store.get_ocr_text(db, sha) is None
+
+    store.save_ocr_text(db, sha, "甲方：测试公司")
+    db.commit()
+    assert store.clear_ocr_text(db, [sha, None]) == 1
+    db.commit()
+
+    assert store.get_ocr_text(db, sha) is None
+    assert blob.ocr_time is None
+    assert not checkpoint.exists()
@@ -0,0 +1,67 @@
+"""Tests for bulk ingestion planning"""
+
+import json
+import zipfile
+
+import pytest
+
+from app.services.bulk_ingest_service import BulkIngestService, ManifestError
+
+
+def make_zip(path, entries: dict) -> str:
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, content in entries.items():
+            zf.writestr(name, content)
+    return str(path)
+
+
+def test_plan_from_directory_layout(tmp_path):
+    archive = make_zip(tmp_path / "batch.zip", {
+        "HT001/2.jpg": b"b",
+        "HT001/1.jpg": b"a",
+        "HT002/scan.pdf": b"c",
+        "HT002/notes.txt": b"ignored",
+        "__MACOSX/HT001/._1.jpg": b"",
+    })
+
+    plan = BulkIngestService().build_plan(archive, "purchase")
+
+    assert [entry["contract_number"] for entry in plan] == ["HT001", "HT002"]
+    assert plan[0]["files"] == [("HT001/1.jpg", "1.jpg"), ("HT001/2.jpg", "2.jpg")]
+    assert plan[1]["files"] == [("HT002/scan.pdf", "scan.pdf")]
+    assert all(entry["contract_type"] == "purchase" for entry in plan)
+
+
+def test_plan_from_embedded_json_manifest(tmp_path):
+    manifest = [{"contract_number": "HT010", "contract_type": "Lease", "files": ["a.jpg", "b.jpg"]}]
+    archive = make_zip(tmp_path / "batch.zip", {
+        "manifest.json": json.dumps(manifest),
+        "a.jpg": b"a",
+        "b.jpg": b"b",
+    })
+
+    plan = BulkIngestService().build_plan(archive, "purchase")
+
+    assert plan == [{
+        "contract_number": "HT010",
+        "contract_type": "lease",
+        "files": [("a.jpg", "a.jpg"), ("b.jpg", "b.jpg")],
+    }]
+
+
+def test_plan_from_uploaded_csv_manifest(tmp_path):
+    archive = make_zip(tmp_path / "batch.zip", {"p1.jpg": b"1", "p2.jpg": b"2"})
+    manifest = "contract_number,file\nHT020,p1.jpg\nHT020,p2.jpg\n".encode()
+
+    plan = BulkIngestService().build_plan(archive, "sales", manifest, "manifest.csv")
+
+    assert plan[0]["contract_number"] == "HT020"
+    assert [name for name, _ in plan[0]["files"]] == ["p1.jpg", "p2.jpg"]
+
+
+def test_manifest_referencing_missing_file_is_rejected(tmp_path):
+    archive = make_zip(tmp_path / "batch.zip", {"a.jpg": b"a"})
+    manifest = json.dumps({"HT030": ["missing.jpg"]}).encode()
+
+    with pytest.raises(ManifestError):
+        BulkIngestService().build_plan(archive, "purchase", manifest)
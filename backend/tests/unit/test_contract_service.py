@@ -0,0 +1,53 @@
+"""Tests for streaming uploads in ContractService"""
+
+import asyncio
+import hashlib
+import io
+
+import pytest
+
+from app.services import contract_service
+from app.services.contract_service import ContractService, UploadTooLargeError
+
+
+class FakeUpload:
+    """Minimal async upload object yielding data in small reads"""
+
+    def __init__(self, filename: str, content: bytes):
+        self.filename = filename
+        self._buffer = io.BytesIO(content)
+        self.read_sizes = []
+
+    async def read(self, size: int = -1) -> bytes:
+        self.read_sizes.append(size)
+        return self._buffer.read(size)
+
+
+@pytest.fixture
+def raw_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(contract_service, "RAW_DIR", tmp_path)
+    monkeypatch.setattr(contract_service, "UPLOAD_CHUNK_SIZE", 4)
+    return tmp_path
+
+
+def test_save_upload_stream_writes_chunks_and_hashes(raw_dir):
+    content = b"scanned contract page"
+    upload = FakeUpload("../page.jpg", content)
+
+    stored = asyncio.run(ContractService().save_upload_stream(upload, max_bytes=1024))
+
+    assert stored.filename == "page.jpg"
+    assert stored.file_size == len(content)
+    assert stored.sha256 == hashlib.sha256(content).hexdigest()
+    assert open(stored.file_path, "rb").read() == content
+    assert all(size == 4 for size in upload.read_sizes)
+    assert not list(raw_dir.glob("incoming/*.part"))
+
+
+def test_save_upload_stream_enforces_limit(raw_dir):
+    upload = FakeUpload("big.pdf", b"x" * 64)
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(ContractService().save_upload_stream(upload, max_bytes=16))
+
+    assert list((raw_dir / "incoming").iterdir()) == []
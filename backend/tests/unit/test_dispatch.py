@@ -0,0 +1,86 @@
+"""Tests for dispatching OCR and AI extraction work to Celery or the in-process queues"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.core.config import settings
+from app.tasks import dispatch
+from app.tasks.autoscale import QueueDepthAutoscaler
+from app.tasks.celery_app import celery_app
+
+
+def test_ocr_is_sent_to_celery_when_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "CELERY_ENABLED", True)
+
+    with patch.object(celery_app, "send_task", return_value=SimpleNamespace(id="task-1")) as send_task:
+        status = dispatch.dispatch_ocr("c-1")
+
+    send_task.assert_called_once_with("app.tasks.ocr_tasks.process_ocr", args=["c-1"])
+    assert status == {"status": "dispatched", "contract_id": "c-1", "task_id": "task-1"}
+
+
+def test_ocr_falls_back_to_in_process_queue(monkeypatch):
+    monkeypatch.setattr(settings, "CELERY_ENABLED", False)
+    queue = MagicMock()
+    queue.add_tasks.return_value = {"status": "queued", "queued_count": 2}
+
+    with patch("app.services.ocr_queue.ocr_queue_manager", queue), \
+            patch.object(celery_app, "send_task") as send_task:
+        status = dispatch.dispatch_ocr_batch(["c-1", "c-2"])
+
+    queue.add_tasks.assert_called_once_with(["c-1", "c-2"])
+    send_task.assert_not_called()
+    assert status["queued_count"] == 2
+
+
+def test_ai_extraction_goes_to_its_own_stage(monkeypatch):
+    monkeypatch.setattr(settings, "CELERY_ENABLED", True)
+    with patch.object(celery_app, "send_task", return_value=SimpleNamespace(id="task-2")) as send_task:
+        dispatch.dispatch_ai_extraction("c-1")
+    send_task.assert_called_once_with("app.tasks.ai_extraction_tasks.process_ai_extraction", args=["c-1"])
+
+    monkeypatch.setattr(settings, "CELERY_ENABLED", False)
+    ocr_queue, ai_queue = MagicMock(), MagicMock()
+    ocr_queue.get_queue_status.return_value = {"queue_length": 1}
+    ai_queue.get_queue_status.return_value = {"queue_length": 5}
+    with patch("app.services.ocr_queue.ocr_queue_manager", ocr_queue), \
+            patch("app.services.ocr_queue.ai_queue_manager", ai_queue):
+        dispatch.dispatch_ai_extraction("c-2")
+        depths = dispatch.pipeline_queue_depths()
+
+    ai_queue.add_task.assert_called_once_with("c-2")
+    ocr_queue.add_task.assert_not_called()
+    assert depths == {"ocr": 1, "ai_extraction": 5}
+
+
+def test_process_ocr_is_a_celery_task_on_the_ocr_queue():
+    import app.tasks.ocr_tasks  # noqa: F401
+
+    assert "app.tasks.ocr_tasks.process_ocr" in celery_app.tasks
+    assert celery_app.conf.worker_autoscaler == "app.tasks.autoscale:QueueDepthAutoscaler"
+
+
+def test_autoscaler_scales_with_broker_backlog():
+    pool = MagicMock(num_processes=1)
+    worker = SimpleNamespace(app=celery_app, consumer=None)
+    autoscaler = QueueDepthAutoscaler(pool, max_concurrency=8, min_concurrency=1, worker=worker)
+
+    with patch("app.tasks.autoscale.broker_queue_depths", return_value={"ocr": 20}):
+        autoscaler._maybe_scale()
+
+    # 积压 20 个任务，扩到上限 8
+    pool.grow.assert_called_once_with(7)
+
+
+def test_ai_extraction_task_retries_retryable_failures_on_celery(monkeypatch):
+    from app.tasks.ai_extraction_tasks import process_ai_extraction
+    monkeypatch.setattr(settings, "AI_MAX_RETRIES", 2)
+    extract = MagicMock(return_value={"status": "error", "retryable": True})
+
+    with patch("app.tasks.ai_extraction_tasks._extract_fields", extract):
+        # 直接调用（进程内 AI 队列）由队列负责重试
+        assert process_ai_extraction("c-1")["status"] == "error"
+        assert extract.call_count == 1
+        process_ai_extraction.apply(args=["c-1"])
+
+    assert extract.call_count == 1 + 3
@@ -0,0 +1,56 @@
+"""Tests for OCR image preprocessing"""
+
+import io
+
+from PIL import Image, ImageDraw
+
+from app.services.image_preprocessor import ImagePreprocessor
+
+
+def make_page(width: int, height: int, angle: float = 0.0) -> Image.Image:
+    page = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(page)
+    for y in range(60, height - 60, 40):
+        draw.rectangle([60, y, width - 60, y + 12], fill="black")
+    if angle:
+        page = page.rotate(angle, fillcolor="white")
+    return page
+
+
+def encode(img: Image.Image, fmt: str = "PNG") -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def preprocessor(**overrides) -> ImagePreprocessor:
+    pre = ImagePreprocessor()
+    pre.max_long_edge = overrides.get("max_long_edge", 1000)
+    pre.target_bytes = overrides.get("target_bytes", 200 * 1024)
+    pre.deskew = overrides.get("deskew", False)
+    return pre
+
+
+def test_normalize_downscales_and_grayscales():
+    original = encode(make_page(4000, 3000))
+
+    result = preprocessor().normalize(original)
+
+    with Image.open(io.BytesIO(result)) as img:
+        assert img.format == "JPEG"
+        assert img.mode == "L"
+        assert max(img.size) == 1000
+    assert len(result) <= 200 * 1024
+
+
+def test_normalize_is_deterministic():
+    # 页面级 OCR 结果缓存按归一化字节的哈希命中
+    original = encode(make_page(1200, 800))
+
+    assert preprocessor(deskew=True).normalize(original) == preprocessor(deskew=True).normalize(original)
+
+
+def test_estimate_skew_recovers_rotation():
+    page = make_page(1000, 800, angle=2.0).convert("L")
+
+    assert abs(preprocessor().estimate_skew(page) + 2.0) <= 0.5
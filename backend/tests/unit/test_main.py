@@ -5,7 +5,9 @@ import pytest
 @pytest.fixture
 def client():
     """Create a test client with mocked database"""
-    with patch('app.main.Base.metadata.create_all'):
+    from app.core.config import settings
+    with patch('app.main.Base.metadata.create_all'), \
+            patch.object(settings, 'OCR_QUEUE_RECONCILE_ON_STARTUP', False):
         from app.main import app
         with TestClient(app) as test_client:
             yield test_client
@@ -41,3 +43,29 @@ def test_contracts_list(client):
 
     # Clean up
     app.dependency_overrides = {}
+
+def test_health_metrics_include_rate_limiter_waits(client):
+    """Test limiter wait metrics are exposed next to the queue depths"""
+    from app.services.rate_limiter import get_rate_limiter
+
+    get_rate_limiter("metrics-test").acquire()
+
+    response = client.get("/health/metrics")
+    assert response.status_code == 200
+    metrics = response.json()
+    assert metrics["rate_limiters"]["metrics-test"]["acquired"] == 1
+    assert "ocr_result_cache" in metrics
+
+@pytest.mark.parametrize("backend, reconciled", [("memory", False), ("redis", True)])
+def test_startup_reconciles_only_the_shared_redis_queue(backend, reconciled):
+    """In-process queues can't see contracts other workers are processing"""
+    from app.core.config import settings
+    with patch('app.main.Base.metadata.create_all'), \
+            patch.object(settings, 'OCR_QUEUE_BACKEND', backend), \
+            patch.object(settings, 'CELERY_ENABLED', False), \
+            patch('app.main._reconcile_queues') as reconcile:
+        from app.main import app
+        with TestClient(app):
+            pass
+
+    assert reconcile.called == reconciled
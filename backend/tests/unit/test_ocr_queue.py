@@ -0,0 +1,223 @@
+"""Tests for the in-process OCR and AI extraction queues"""
+
+import threading
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.ocr_queue import AIQueueManager, OCRQueueManager
+
+
+@pytest.fixture
+def make_queue():
+    """Fresh queue managers (bypassing the process-wide singleton) stopped after the test"""
+    managers = []
+
+    def make(processor, workers=1, base=OCRQueueManager):
+        class IsolatedQueueManager(base):
+            _instance = None
+
+        manager = IsolatedQueueManager(processor, workers)
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.stop()
+
+
+def test_new_task_wakes_idle_worker_immediately(make_queue):
+    started = threading.Event()
+    manager = make_queue(lambda contract_id: started.set() or {"status": "pending_ai"})
+    time.sleep(0.05)  # 工作线程已进入等待
+
+    begin = time.monotonic()
+    manager.add_task("c-1")
+
+    assert started.wait(1)
+    assert time.monotonic() - begin < 0.5
+
+
+def test_tasks_run_in_fifo_order_and_status_is_consistent(make_queue):
+    release = threading.Event()
+    processed = []
+
+    def processor(contract_id):
+        release.wait(1)
+        processed.append(contract_id)
+        return {"status": "pending_ai"}
+
+    manager = make_queue(processor)
+    manager.add_task("c-1")
+    time.sleep(0.05)
+    manager.add_tasks(["c-2", "c-3"])
+
+    status = manager.get_queue_status()
+    assert status["stage"] == "ocr"
+    assert status["queue_length"] == 2
+    assert status["current_tasks"] == ["c-1"]
+    assert status["queued_contracts"] == ["c-2", "c-3"]
+    assert manager.is_processing()
+
+    release.set()
+    deadline = time.monotonic() + 2
+    while len(processed) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert processed == ["c-1", "c-2", "c-3"]
+
+
+def test_stop_wakes_waiting_worker(make_queue):
+    manager = make_queue(lambda contract_id: {"status": "pending_ai"})
+
+    manager.stop()
+
+    assert not any(thread.is_alive() for thread in manager._worker_threads)
+
+
+def test_worker_pool_processes_tasks_concurrently(make_queue):
+    lock = threading.Lock()
+    active = {"now": 0, "max": 0, "done": 0}
+
+    def processor(contract_id):
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        time.sleep(0.1)
+        with lock:
+            active["now"] -= 1
+            active["done"] += 1
+        return {"status": "pending_ai"}
+
+    manager = make_queue(processor, workers=3)
+    begin = time.monotonic()
+    manager.add_tasks([f"c-{i}" for i in range(6)])
+    time.sleep(0.05)
+    assert len(manager.current_tasks) == 3
+
+    while active["done"] < 6 and time.monotonic() - begin < 2:
+        time.sleep(0.01)
+    # 6 个任务、3 个工作线程：约两轮耗时
+    assert active["max"] == 3
+    assert time.monotonic() - begin < 0.5
+
+
+def test_duplicate_tasks_are_not_queued_twice(make_queue):
+    release = threading.Event()
+    manager = make_queue(lambda contract_id: release.wait(1) and {"status": "pending_ai"})
+    manager.add_task("c-1")
+    time.sleep(0.05)
+
+    # c-1 处理中、c-2 排队中，都不重复入队
+    assert manager.add_task("c-2")["status"] == "queued"
+    assert manager.add_task("c-1")["status"] == "already_queued"
+    assert manager.add_tasks(["c-2", "c-3"])["queued_count"] == 1
+    release.set()
+
+
+def test_stop_drains_in_flight_task(make_queue):
+    finished = threading.Event()
+
+    def processor(contract_id):
+        time.sleep(0.2)
+        finished.set()
+        return {"status": "pending_ai"}
+
+    manager = make_queue(processor)
+    manager.add_tasks(["c-1", "c-2"])
+    time.sleep(0.05)
+
+    manager.stop(timeout=2)
+
+    # 处理中的任务完成后才退出，排队的任务不再领取
+    assert finished.is_set()
+    assert manager.get_queue_status()["queued_contracts"] == ["c-2"]
+
+
+def test_reconcile_requeues_unfinished_contracts(make_queue, tmp_path, monkeypatch):
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    legacy_file = tmp_path / "legacy.pdf"
+    legacy_file.write_bytes(b"%PDF")
+    ocr_text = tmp_path / "HT001_ocr.txt"
+    ocr_text.write_text("text", encoding="utf-8")
+    rows = [
+        SimpleNamespace(id="c-files", status="pending_ocr", file_path="multi", ocr_text_path=None, has_files=True),
+        SimpleNamespace(id="c-legacy", status="ocr_processing", file_path=str(legacy_file), ocr_text_path=None,
+                        has_files=False),
+        # 文件已全部删除的合同无法恢复
+        SimpleNamespace(id="c-deleted", status="pending_ocr", file_path=str(tmp_path / "deleted.pdf"),
+                        ocr_text_path=None, has_files=False),
+        # OCR 已完成的合同交给 AI 阶段；OCR 文本丢失时重新识别
+        SimpleNamespace(id="c-ocr-done", status="pending_ai", file_path="multi", ocr_text_path=str(ocr_text),
+                        has_files=True),
+        SimpleNamespace(id="c-text-lost", status="ai_processing", file_path="multi",
+                        ocr_text_path=str(tmp_path / "lost.txt"), has_files=True),
+    ]
+    db = MagicMock()
+    db.query.return_value.filter.return_value.order_by.return_value.all.return_value = rows
+    monkeypatch.setattr("app.core.db.get_db", lambda: iter([db]))
+
+    release = threading.Event()
+    manager = make_queue(lambda contract_id: release.wait(1) and {"status": "pending_ai"})
+    ai_manager = make_queue(lambda contract_id: release.wait(1) and {"status": "success"}, base=AIQueueManager)
+
+    assert manager.reconcile() == 3
+    assert ai_manager.reconcile() == 1
+    status = manager.get_queue_status()
+    assert sorted(status["current_tasks"] + status["queued_contracts"]) == ["c-files", "c-legacy", "c-text-lost"]
+    ai_status = ai_manager.get_queue_status()
+    assert ai_status["current_tasks"] + ai_status["queued_contracts"] == ["c-ocr-done"]
+    # 再次对账不会重复入队
+    assert manager.reconcile() == 0
+    release.set()
+
+
+def test_ai_stage_retries_retryable_failures_with_backoff(make_queue, monkeypatch):
+    monkeypatch.setattr(settings, "AI_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "AI_RETRY_BACKOFF", 0.05)
+    attempts = []
+
+    def extract(contract_id):
+        attempts.append(time.monotonic())
+        return {"status": "error", "message": "provider timeout", "retryable": True}
+
+    manager = make_queue(extract, base=AIQueueManager)
+    manager.add_task("c-1")
+
+    deadline = time.monotonic() + 2
+    while manager.stats()["processed"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.2)
+
+    # 首次执行 + 重试 2 次，退避时间指数增长
+    assert len(attempts) == 3
+    assert attempts[1] - attempts[0] >= 0.05
+    assert attempts[2] - attempts[1] >= 0.1
+    stats = manager.stats()
+    assert (stats["processed"], stats["failed"], stats["retried"]) == (3, 3, 2)
+    assert stats["retry_pending"] == 0
+
+
+def test_stage_metrics_count_outcomes_and_wait_time(make_queue):
+    release = threading.Event()
+
+    def processor(contract_id):
+        release.wait(1)
+        if contract_id == "c-bad":
+            raise RuntimeError("boom")
+        return {"status": "error"} if contract_id == "c-err" else {"status": "success"}
+
+    manager = make_queue(processor)
+    manager.add_tasks(["c-1", "c-err", "c-bad"])
+    time.sleep(0.1)
+    release.set()
+
+    deadline = time.monotonic() + 2
+    while manager.stats()["processed"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    metrics = manager.get_queue_status()["metrics"]
+    assert (metrics["processed"], metrics["succeeded"], metrics["failed"], metrics["retried"]) == (3, 1, 2, 0)
+    # 后两个任务在第一个任务处理期间排队等待
+    assert metrics["avg_wait_seconds"] > 0.05
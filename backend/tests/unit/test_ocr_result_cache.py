@@ -0,0 +1,73 @@
+"""Tests for the persistent OCR result cache"""
+
+from app.services.ocr_result_cache import OCRResultCache
+
+
+def test_key_depends_on_image_engine_and_endpoint():
+    key = OCRResultCache.make_key(b"page", "baidu", "accurate_basic")
+
+    assert key == OCRResultCache.make_key(b"page", "baidu", "accurate_basic")
+    assert key != OCRResultCache.make_key(b"other", "baidu", "accurate_basic")
+    assert key != OCRResultCache.make_key(b"page", "baidu", "general_basic")
+    assert key != OCRResultCache.make_key(b"page", "paddle", "accurate_basic")
+
+
+def test_results_persist_and_count_hits(tmp_path):
+    cache = OCRResultCache(tmp_path / "ocr.sqlite3", max_bytes=1024)
+    assert cache.get("a") is None
+    cache.put("a", "甲方")
+
+    reopened = OCRResultCache(tmp_path / "ocr.sqlite3", max_bytes=1024)
+    assert reopened.get("a") == "甲方"
+    assert reopened.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_confidence_is_stored_with_text(tmp_path):
+    import sqlite3
+    # 旧版本的缓存文件没有置信度列
+    conn = sqlite3.connect(tmp_path / "ocr.sqlite3")
+    conn.execute("CREATE TABLE ocr_results (key TEXT PRIMARY KEY, text TEXT NOT NULL,"
+                 " size INTEGER NOT NULL, last_access REAL NOT NULL)")
+    conn.execute("INSERT INTO ocr_results VALUES ('old', '乙方', 6, 0)")
+    conn.commit()
+    conn.close()
+
+    cache = OCRResultCache(tmp_path / "ocr.sqlite3", max_bytes=1024)
+    cache.put("a", "甲方", 0.92)
+
+    assert cache.lookup("a") == ("甲方", 0.92)
+    assert cache.lookup("old") == ("乙方", None)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = OCRResultCache(tmp_path / "ocr.sqlite3", max_bytes=250)
+    cache.put("a", "x" * 100)
+    cache.put("b", "x" * 100)
+    # 访问 a 之后，b 成为最久未使用的条目
+    assert cache.get("a") is not None
+
+    cache.put("c", "x" * 100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["total_bytes"] == 200
+
+
+def test_stats_are_not_reported_before_the_cache_is_used(monkeypatch):
+    from app.services import ocr_result_cache
+
+    monkeypatch.setattr(ocr_result_cache, "_cache", None)
+    assert ocr_result_cache.ocr_result_cache_stats() is None
+
+
+def test_empty_results_are_not_cached(tmp_path):
+    cache = OCRResultCache(tmp_path / "ocr.sqlite3", max_bytes=1024)
+
+    cache.put("blank", " \n")
+
+    assert cache.get("blank") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,197 @@
+"""Tests for PDF page OCR in OCRService"""
+
+import io
+import json
+import threading
+import time
+
+from PIL import Image
+
+from app.services.ocr_engine import PageOCRResult
+from app.services.ocr_service import OCRService
+
+
+class FakeOCR:
+    """Identifies a rendered page by its width and records concurrency"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def recognize_page(self, image_data: bytes, use_cache: bool = True) -> PageOCRResult:
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        with Image.open(io.BytesIO(image_data)) as img:
+            width = img.width
+        # Later pages finish first to exercise reordering
+        time.sleep(self.delay * (1 + (1000 - width) / 100))
+        with self.lock:
+            self.active -= 1
+        return PageOCRResult(f"page-{width}", 0.99)
+
+
+def make_scanned_pdf(path, widths) -> str:
+    pages = [Image.new("RGB", (width, 200), "white") for width in widths]
+    pages[0].save(path, format="PDF", save_all=True, append_images=pages[1:], resolution=72)
+    return str(path)
+
+
+def test_scanned_pdf_pages_are_ocrd_concurrently_in_order(tmp_path, monkeypatch):
+    import tempfile
+    # 页面图片不应落盘
+    monkeypatch.setattr(tempfile, "NamedTemporaryFile", None)
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "OCR_PDF_PAGE_CONCURRENCY", 4)
+    monkeypatch.setattr(settings, "PDF_RENDER_DPI", 72)
+    monkeypatch.setattr(settings, "PDF_RENDER_HIGH_DPI", 0)
+    widths = [400, 500, 600, 700, 800, 900]
+    pdf_path = make_scanned_pdf(tmp_path / "scan.pdf", widths)
+
+    service = OCRService()
+    fake = FakeOCR()
+    service.engine = fake
+
+    text = service.extract_text_from_file(pdf_path)
+
+    assert text.split("\n\n") == [f"page-{width}" for width in widths]
+    assert 1 < fake.max_active <= 4
+
+
+def test_engine_is_selected_by_ocr_provider(monkeypatch):
+    import pytest
+    from app.core.config import settings
+    from app.services.ocr_service import BaiduOCRService, create_ocr_engine
+
+    monkeypatch.setattr(settings, "OCR_PROVIDER", "baidu")
+    assert isinstance(OCRService().engine, BaiduOCRService)
+
+    with pytest.raises(ValueError):
+        create_ocr_engine("tesseract")
+
+
+def test_memory_budget_limits_pages_in_flight(tmp_path, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "OCR_PDF_PAGE_CONCURRENCY", 4)
+    monkeypatch.setattr(settings, "PDF_RENDER_DPI", 72)
+    monkeypatch.setattr(settings, "PDF_RENDER_HIGH_DPI", 0)
+    # 预算小于一页的估算内存时，同一时刻只处理一页
+    monkeypatch.setattr(settings, "OCR_MEMORY_BUDGET_MB", 0)
+    widths = [400, 500, 600]
+    pdf_path = make_scanned_pdf(tmp_path / "scan.pdf", widths)
+
+    service = OCRService()
+    fake = FakeOCR(delay=0.01)
+    service.engine = fake
+
+    text = service.extract_text_from_file(pdf_path)
+
+    assert text.split("\n\n") == [f"page-{width}" for width in widths]
+    assert fake.max_active == 1
+
+
+class ResolutionSensitiveOCR:
+    """Low confidence below 600px wide, as if small print were blurred"""
+
+    def __init__(self):
+        self.widths = []
+
+    def recognize_page(self, image_data: bytes, use_cache: bool = True) -> PageOCRResult:
+        with Image.open(io.BytesIO(image_data)) as img:
+            width = img.width
+        self.widths.append(width)
+        if width < 600:
+            return PageOCRResult("甲方 乙?方 金?额", 0.5, "fake")
+        return PageOCRResult("甲方：某某公司 乙方：某某公司 合同金额：壹万元整", 0.98, "fake")
+
+
+def test_low_confidence_pages_are_rerendered_at_high_dpi(tmp_path, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "PDF_RENDER_DPI", 72)
+    monkeypatch.setattr(settings, "PDF_RENDER_HIGH_DPI", 144)
+    widths = [400, 800]
+    pdf_path = make_scanned_pdf(tmp_path / "scan.pdf", widths)
+
+    service = OCRService()
+    fake = ResolutionSensitiveOCR()
+    service.engine = fake
+
+    text = service.extract_text_from_file(pdf_path)
+
+    # 400px 的页面以 2 倍分辨率重新识别，800px 的页面一次通过
+    assert sorted(fake.widths) == [400, 800, 800]
+    assert text.split("\n\n") == ["甲方：某某公司 乙方：某某公司 合同金额：壹万元整"] * 2
+    # 检查点记录每页使用的识别引擎
+    with open(pdf_path + ".ocr-pages.jsonl", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f][1:]
+    assert [record["tier"] for record in records] == ["fake", "fake"]
+
+
+def test_rerender_keeps_the_better_result():
+    low = PageOCRResult("甲方 乙方 合同金额 壹万元整 付款方式 银行转账", 0.8)
+    high = PageOCRResult("甲方", 0.99)
+
+    assert OCRService._needs_rerender(low)
+    assert max(low, high, key=OCRService._quality_score) is low
+    assert not OCRService._needs_rerender(PageOCRResult("甲方 乙方 合同金额 壹万元整 付款方式 银行转账"))
+
+
+def test_failed_page_raises_and_retry_resumes_from_checkpoint(tmp_path, monkeypatch):
+    import pytest
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "PDF_RENDER_DPI", 72)
+    monkeypatch.setattr(settings, "PDF_RENDER_HIGH_DPI", 0)
+    widths = [400, 500, 600]
+    pdf_path = make_scanned_pdf(tmp_path / "scan.pdf", widths)
+
+    calls = []
+
+    class FlakyOCR:
+        fail = True
+
+        def recognize_page(self, image_data: bytes, use_cache: bool = True) -> PageOCRResult:
+            with Image.open(io.BytesIO(image_data)) as img:
+                width = img.width
+            calls.append(width)
+            if width == 500 and self.fail:
+                raise RuntimeError("provider timeout")
+            return PageOCRResult(f"page-{width}", 0.99)
+
+    service = OCRService()
+    service.engine = FlakyOCR()
+
+    # 部分页面失败时不返回残缺文本，避免被当作完整结果缓存
+    with pytest.raises(RuntimeError, match="pages 2"):
+        service.extract_text_from_file(pdf_path)
+
+    calls.clear()
+    service.engine.fail = False
+    assert service.extract_text_from_file(pdf_path) == "page-400\n\npage-500\n\npage-600"
+    # 重试只识别失败的页面
+    assert calls == [500]
+
+
+def test_memory_budget_is_shared_by_concurrent_pdfs(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from app.core.config import settings
+    from app.services.ocr_service import page_memory_budget
+    monkeypatch.setattr(settings, "OCR_PDF_PAGE_CONCURRENCY", 4)
+    monkeypatch.setattr(settings, "PDF_RENDER_DPI", 72)
+    monkeypatch.setattr(settings, "PDF_RENDER_HIGH_DPI", 0)
+    monkeypatch.setattr(settings, "OCR_MEMORY_BUDGET_MB", 0)
+    paths = [make_scanned_pdf(tmp_path / f"scan{i}.pdf", [400, 500]) for i in range(3)]
+
+    fake = FakeOCR(delay=0.01)
+    services = [OCRService() for _ in paths]
+    for service in services:
+        service.engine = fake
+
+    # 多个队列线程同时识别不同的 PDF，预算按进程计算
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        texts = list(executor.map(lambda args: args[0].extract_text_from_file(args[1]), zip(services, paths)))
+
+    assert texts == ["page-400\n\npage-500"] * 3
+    assert fake.max_active == 1
+    assert page_memory_budget.in_use == 0
@@ -0,0 +1,97 @@
+"""Tests for multi-file OCR in process_ocr"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from app.models.models import Contract, ContractFile
+
+
+def make_db(contract, files):
+    db = MagicMock()
+
+    def query(model):
+        q = MagicMock()
+        if model is Contract:
+            q.filter.return_value.first.return_value = contract
+        elif model is ContractFile:
+            q.filter.return_value.order_by.return_value.all.return_value = files
+        return q
+
+    db.query.side_effect = query
+    return db
+
+
+def test_files_are_ocrd_concurrently_and_combined_in_order(tmp_path):
+    contract = MagicMock(contract_number="HT001", file_path="")
+    files = [
+        MagicMock(filename="1.jpg", file_path="/f/1.jpg", sha256="a"),
+        MagicMock(filename="2.jpg", file_path="/f/2.jpg", sha256="b"),
+        MagicMock(filename="3.jpg", file_path="/f/3.jpg", sha256="c"),
+        MagicMock(filename="4.jpg", file_path="/f/4.jpg", sha256="a"),
+        MagicMock(filename="5.jpg", file_path="/f/5.jpg", sha256="d"),
+    ]
+    db = make_db(contract, files)
+
+    calls = []
+    lock = threading.Lock()
+
+    def extract(path):
+        with lock:
+            calls.append(path)
+        # Earlier files finish last
+        time.sleep(0.05 * (6 - int(path[3])))
+        if path == "/f/3.jpg":
+            raise RuntimeError("provider timeout")
+        return f"text {path[3]}"
+
+    blob_store = MagicMock()
+    blob_store.get_ocr_text.side_effect = lambda _db, sha: "cached d" if sha == "d" else None
+
+    with patch("app.tasks.ocr_tasks.get_db", return_value=iter([db])), \
+            patch("app.tasks.ocr_tasks.OCRService") as ocr_cls, \
+            patch("app.tasks.ocr_tasks.BlobStore", return_value=blob_store), \
+            patch("app.tasks.ocr_tasks.RAW_DIR", tmp_path), \
+            patch("app.tasks.dispatch.dispatch_ai_extraction") as dispatch_ai:
+        ocr_cls.return_value.extract_text_from_file.side_effect = extract
+        from app.tasks.ocr_tasks import process_ocr
+        result = process_ocr("contract-id")
+
+    # 有文件识别失败：合同停在 ocr_failed，不进入 AI 提取，失败的文件不缓存
+    assert result["status"] == "error"
+    assert result["failed_files"] == ["3.jpg"]
+    assert contract.status == "ocr_failed"
+    dispatch_ai.assert_not_called()
+    assert sorted(calls) == ["/f/1.jpg", "/f/2.jpg", "/f/3.jpg"]
+    combined = (tmp_path / "HT001_ocr.txt").read_text(encoding="utf-8")
+    assert combined.split("\n\n=== 下一页 ===\n\n") == [
+        "text 1", "text 2", "[文件 3.jpg 识别失败]", "text 1", "cached d"
+    ]
+    saved = {call.args[1] for call in blob_store.save_ocr_text.call_args_list}
+    assert saved == {"a", "b"}
+
+
+def test_ai_extraction_is_queued_without_blocking_the_ocr_worker(tmp_path):
+    contract = MagicMock(contract_number="HT002", file_path="")
+    files = [MagicMock(filename="1.jpg", file_path="/f/1.jpg", sha256="a")]
+    db = make_db(contract, files)
+    blob_store = MagicMock()
+    blob_store.get_ocr_text.return_value = "cached"
+    ai_task = MagicMock()
+    ai_queue = MagicMock()
+    ai_queue.add_task.return_value = {"status": "queued", "contract_id": "contract-id"}
+
+    with patch("app.tasks.ocr_tasks.get_db", return_value=iter([db])), \
+            patch("app.tasks.ocr_tasks.OCRService"), \
+            patch("app.tasks.ocr_tasks.BlobStore", return_value=blob_store), \
+            patch("app.tasks.ocr_tasks.RAW_DIR", tmp_path), \
+            patch("app.tasks.ai_extraction_tasks.process_ai_extraction", ai_task), \
+            patch("app.services.ocr_queue.ai_queue_manager", ai_queue):
+        from app.tasks.ocr_tasks import process_ocr
+        result = process_ocr("contract-id")
+
+    # OCR 工作线程不等待 AI 提取完成，合同交给 AI 队列
+    ai_task.assert_not_called()
+    ai_queue.add_task.assert_called_once_with("contract-id")
+    assert result["ai_extraction"]["status"] == "queued"
+    assert contract.status == "pending_ai"
@@ -0,0 +1,87 @@
+"""Tests for the local PaddleOCR engine"""
+
+import io
+
+import pytest
+from PIL import Image
+
+from app.services import paddle_ocr_engine
+
+
+class FakePaddleModel:
+    def ocr(self, array, cls=False):
+        assert array.shape == (20, 30, 3)
+        return [[
+            [[[0, 0], [1, 0], [1, 1], [0, 1]], ("甲方", 0.99)],
+            [[[0, 2], [1, 2], [1, 3], [0, 3]], ("乙方", 0.97)],
+        ]]
+
+
+def png_bytes(width=30, height=20) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("L", (width, height), 255).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_worker_joins_recognized_lines(monkeypatch):
+    monkeypatch.setattr(paddle_ocr_engine, "_model", FakePaddleModel())
+
+    text, confidence = paddle_ocr_engine._recognize(png_bytes())
+
+    assert text == "甲方\n乙方"
+    assert confidence == pytest.approx(0.98)
+
+
+def test_worker_handles_pages_without_text(monkeypatch):
+    class EmptyModel:
+        def ocr(self, array, cls=False):
+            return [None]
+
+    monkeypatch.setattr(paddle_ocr_engine, "_model", EmptyModel())
+
+    assert paddle_ocr_engine._recognize(png_bytes()) == ("", None)
+
+
+def test_engine_recognizes_in_worker_processes(monkeypatch):
+    pytest.importorskip("paddleocr")
+    monkeypatch.setattr("app.services.paddle_ocr_engine.get_ocr_result_cache", lambda: None)
+
+    engine = paddle_ocr_engine.PaddleOCREngine(workers=1)
+    try:
+        assert engine.extract_text_from_page(png_bytes(200, 100)) == ""
+    finally:
+        engine.shutdown()
+
+
+def test_pool_is_rebuilt_after_a_worker_crash(monkeypatch):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    class FakePool:
+        def __init__(self, result=None):
+            self.result = result
+            self.shut_down = False
+
+        def submit(self, fn, *args):
+            future = Future()
+            if self.result is None:
+                future.set_exception(BrokenProcessPool("worker died"))
+            else:
+                future.set_result(self.result)
+            return future
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    broken, healthy = FakePool(), FakePool(("甲方", 0.99))
+    pools = [broken, healthy]
+    monkeypatch.setattr(paddle_ocr_engine.PaddleOCREngine, "_start_pool", lambda self: pools.pop(0))
+    monkeypatch.setattr("app.services.paddle_ocr_engine.get_ocr_result_cache", lambda: None)
+
+    engine = paddle_ocr_engine.PaddleOCREngine(workers=1)
+
+    # 工作进程崩溃后重建进程池并重试，之后的识别继续使用新进程池
+    assert engine.extract_text_from_page(png_bytes()) == "甲方"
+    assert engine.extract_text_from_page(png_bytes()) == "甲方"
+    assert broken.shut_down
+    assert engine._pool is healthy
@@ -0,0 +1,160 @@
+"""Tests for the PDF page classification pre-pass"""
+
+import pypdfium2 as pdfium
+
+from app.services.ocr_engine import PageOCRResult
+from app.services.ocr_service import OCRService
+from app.services.page_classifier import PAGE_MIXED, PAGE_SCANNED, PAGE_TEXT, PageClassifier
+
+TEXT = "BT /F1 12 Tf 72 720 Td (The parties agree to the following payment terms) Tj ET"
+STAMP = "BT /F1 12 Tf 500 40 Td (x7) Tj ET"
+FULL_PAGE_IMAGE = "q 612 0 0 792 0 0 cm BI /W 1 /H 1 /BPC 8 /CS /G ID \xff EI Q"
+
+
+def make_pdf(path, contents) -> str:
+    """Write a minimal PDF with one page per content stream"""
+    page_ids = [4 + 2 * i for i in range(len(contents))]
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(contents)} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page_id, content in zip(page_ids, contents):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(content.encode('latin-1'))} >>\nstream\n{content}\nendstream")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(out)
+    return str(path)
+
+
+class CountingOCR:
+    def __init__(self):
+        self.pages = 0
+
+    def extract_text_from_page(self, image_data):
+        self.pages += 1
+        return "OCR page text with many more words than the text layer has in it"
+
+    def recognize_page(self, image_data, use_cache=True):
+        return PageOCRResult(self.extract_text_from_page(image_data))
+
+
+def test_pages_are_classified_by_text_and_image_coverage(tmp_path):
+    pdf_path = make_pdf(tmp_path / "doc.pdf", [TEXT, STAMP, FULL_PAGE_IMAGE + " " + TEXT, ""])
+    classifier = PageClassifier()
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        types = [classifier.analyze_page(pdf[i])[0].page_type for i in range(len(pdf))]
+    finally:
+        pdf.close()
+
+    assert types == [PAGE_TEXT, PAGE_SCANNED, PAGE_MIXED, PAGE_SCANNED]
+
+
+def test_only_scanned_and_mixed_pages_are_ocrd(tmp_path):
+    pdf_path = make_pdf(tmp_path / "doc.pdf", [TEXT, STAMP, FULL_PAGE_IMAGE + " " + TEXT])
+    service = OCRService()
+    service.engine = CountingOCR()
+
+    text = service.extract_text_from_file(pdf_path)
+
+    pages = text.split("\n\n")
+    assert pages[0] == "The parties agree to the following payment terms"
+    assert pages[1] == pages[2] == CountingOCR().extract_text_from_page(None)
+    assert service.engine.pages == 2
+
+
+def test_classification_is_saved_and_reused(tmp_path, monkeypatch):
+    pdf_path = make_pdf(tmp_path / "doc.pdf", [TEXT, STAMP])
+    service = OCRService()
+    service.engine = CountingOCR()
+    first = service.extract_text_from_file(pdf_path)
+
+    pages = PageClassifier().load(pdf_path, 2)
+    assert [page.page_type for page in pages] == [PAGE_TEXT, PAGE_SCANNED]
+
+    def fail(self, page):
+        raise AssertionError("pages should not be re-analyzed")
+
+    monkeypatch.setattr(PageClassifier, "analyze_page", fail)
+    assert service.extract_text_from_file(pdf_path) == first
+
+
+def test_interrupted_job_resumes_from_missing_pages(tmp_path, monkeypatch):
+    from app.core.config import settings
+    from app.services.page_checkpoint import PageCheckpoint
+
+    monkeypatch.setattr(settings, "OCR_PDF_PAGE_CONCURRENCY", 1)
+    pdf_path = make_pdf(tmp_path / "doc.pdf", [STAMP, STAMP, STAMP])
+
+    class FailingOCR(CountingOCR):
+        def extract_text_from_page(self, image_data):
+            if self.pages == 2:
+                raise KeyboardInterrupt("worker killed")
+            return super().extract_text_from_page(image_data)
+
+    service = OCRService()
+    service.engine = FailingOCR()
+    try:
+        service.extract_text_from_file(pdf_path)
+    except KeyboardInterrupt:
+        pass
+
+    with PageCheckpoint(pdf_path) as checkpoint:
+        assert len(checkpoint.open()) == 2
+
+    service.engine = CountingOCR()
+    text = service.extract_text_from_file(pdf_path)
+
+    assert text.split("\n\n") == [CountingOCR().extract_text_from_page(None)] * 3
+    assert service.engine.pages == 1
+
+
+def test_mixed_page_keeps_the_longer_text_by_characters_not_words(tmp_path):
+    pdf_path = make_pdf(tmp_path / "doc.pdf", [FULL_PAGE_IMAGE + " " + TEXT])
+    # 中文识别结果没有空格：按词数比较只有 1 个词，按字符数比文本层多
+    ocr_text = "甲方与乙方经友好协商就以下付款条款及违约责任达成一致意见" * 2
+
+    class ChineseOCR(CountingOCR):
+        def extract_text_from_page(self, image_data):
+            return ocr_text
+
+    service = OCRService()
+    service.engine = ChineseOCR()
+
+    assert service.extract_text_from_file(pdf_path) == ocr_text
+
+
+def test_refresh_marker_skips_page_cache_once(tmp_path):
+    from app.services.page_checkpoint import request_refresh, refresh_requested
+
+    pdf_path = make_pdf(tmp_path / "doc.pdf", [STAMP])
+    calls = []
+
+    class CachingOCR(CountingOCR):
+        def recognize_page(self, image_data, use_cache=True):
+            calls.append(use_cache)
+            return super().recognize_page(image_data)
+
+    service = OCRService()
+    service.engine = CachingOCR()
+    service.extract_text_from_file(pdf_path)
+
+    request_refresh(pdf_path)
+    service.extract_text_from_file(pdf_path)
+    # 检查点已丢弃，页面重新识别且不读页面级缓存；标记在成功后删除
+    assert calls == [True, False]
+    assert not refresh_requested(pdf_path)
@@ -0,0 +1,44 @@
+"""Tests for the multi-process PDF rasterizer"""
+
+import io
+
+from PIL import Image
+
+from app.services.pdf_rasterizer import PDFRasterizer
+
+
+def test_pages_are_rendered_in_worker_processes_at_requested_dpi(tmp_path):
+    pages = [Image.new("RGB", (width, 144), "white") for width in (288, 432)]
+    pdf_path = tmp_path / "scan.pdf"
+    pages[0].save(pdf_path, format="PDF", save_all=True, append_images=pages[1:], resolution=72)
+
+    rasterizer = PDFRasterizer(workers=2)
+    try:
+        futures = [rasterizer.submit(str(pdf_path), index, dpi) for index in (0, 1) for dpi in (72, 144)]
+        images = [Image.open(io.BytesIO(future.result())) for future in futures]
+    finally:
+        rasterizer.shutdown()
+
+    assert [image.size for image in images] == [(288, 144), (576, 288), (432, 144), (864, 288)]
+    assert all(image.format == "JPEG" and image.mode == "L" for image in images)
+
+
+def test_pool_is_rebuilt_after_a_render_worker_dies(tmp_path):
+    page = Image.new("RGB", (288, 144), "white")
+    pdf_path = tmp_path / "scan.pdf"
+    page.save(pdf_path, format="PDF", resolution=72)
+
+    rasterizer = PDFRasterizer(workers=1)
+    try:
+        rasterizer.render(str(pdf_path), 0, 72)
+        # 模拟渲染进程被 OOM killer 杀死
+        for process in list(rasterizer._pool._processes.values()):
+            process.kill()
+            process.join()
+
+        image = Image.open(io.BytesIO(rasterizer.render(str(pdf_path), 0, 72)))
+        image_again = Image.open(io.BytesIO(rasterizer.render(str(pdf_path), 0, 72)))
+    finally:
+        rasterizer.shutdown()
+
+    assert image.size == image_again.size == (288, 144)
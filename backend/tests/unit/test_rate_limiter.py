@@ -0,0 +1,69 @@
+"""Tests for the provider rate limiter"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.rate_limiter import ThrottledError, TokenBucket, call_with_backoff
+
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "PROVIDER_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(settings, "PROVIDER_MAX_RETRIES", 3)
+
+
+def test_rate_limits_are_parsed_per_provider_and_endpoint(monkeypatch):
+    monkeypatch.setattr(settings, "PROVIDER_RATE_LIMITS", "baidu=10, baidu:general_basic=20,qwen=2.5")
+
+    assert settings.provider_rate_limits == {"baidu": 10.0, "baidu:general_basic": 20.0, "qwen": 2.5}
+
+
+def test_bucket_allows_burst_then_paces_requests():
+    bucket = TokenBucket("test", rate=20, burst=2)
+
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    # 前 2 个令牌立即可用，后 2 个按 20 QPS 补充
+    assert elapsed >= 0.09
+    stats = bucket.stats()
+    assert stats["acquired"] == 4
+    assert stats["waited"] == 2
+    assert stats["max_wait"] > 0
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket("test", rate=0)
+
+    assert all(bucket.acquire() == 0 for _ in range(100))
+
+
+def test_throttled_requests_are_retried(fast_backoff):
+    bucket = TokenBucket("test", rate=0)
+    calls = []
+
+    async def request():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ThrottledError("qps limit")
+        return "ok"
+
+    assert asyncio.run(call_with_backoff(bucket, request)) == "ok"
+    assert len(calls) == 3
+    assert bucket.stats()["throttled"] == 2
+
+
+def test_retries_are_bounded(fast_backoff):
+    bucket = TokenBucket("test", rate=0)
+
+    async def request():
+        raise ThrottledError("qps limit")
+
+    with pytest.raises(ThrottledError):
+        asyncio.run(call_with_backoff(bucket, request))
+    assert bucket.stats()["throttled"] == 4
@@ -0,0 +1,148 @@
+"""Tests for the Redis Streams OCR and AI extraction queues"""
+
+import threading
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.core.config import settings  # noqa: E402
+from app.services.redis_ocr_queue import RedisAIQueueManager, RedisOCRQueueManager  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def make_queue(server, monkeypatch):
+    """Independent queue managers on one fake Redis server, like separate processes"""
+    monkeypatch.setattr(settings, "OCR_QUEUE_VISIBILITY_TIMEOUT", 0.3)
+    monkeypatch.setattr(RedisOCRQueueManager, "BLOCK_MS", 50)
+    managers = []
+
+    def make(processor, workers=1, base=RedisOCRQueueManager):
+        class IsolatedQueueManager(base):
+            _instance = None
+
+        client = fakeredis.FakeRedis(server=server, decode_responses=True)
+        manager = IsolatedQueueManager(processor, workers, redis_client=client)
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.stop(timeout=1)
+
+
+def wait_until(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_tasks_are_processed_and_acknowledged(make_queue):
+    processed = []
+    manager = make_queue(lambda contract_id: processed.append(contract_id) or {"status": "pending_ai"})
+
+    assert manager.add_tasks(["c-1", "c-2"])["queued_count"] == 2
+
+    assert wait_until(lambda: processed == ["c-1", "c-2"])
+    assert wait_until(lambda: manager._redis.xlen(manager.stream) == 0)
+    assert manager.get_queue_status()["in_flight"] == 0
+    # 确认后可以再次入队
+    assert manager.add_task("c-1")["status"] == "queued"
+
+
+def test_queued_contracts_are_deduplicated_across_processes(make_queue):
+    release = threading.Event()
+    first = make_queue(lambda contract_id: release.wait(2) and {"status": "pending_ai"})
+    second = make_queue(lambda contract_id: {"status": "pending_ai"}, workers=1)
+    second.stop(timeout=1)
+
+    first.add_task("c-1")
+    assert wait_until(lambda: first.current_tasks)
+    first.add_task("c-2")
+
+    assert second.add_task("c-1")["status"] == "already_queued"
+    assert second.add_tasks(["c-2", "c-3"])["queued_count"] == 1
+    assert first.get_queue_status()["queued_contracts"] == ["c-2", "c-3"]
+    release.set()
+
+
+def test_queue_status_lists_a_bounded_prefix(make_queue, monkeypatch):
+    release = threading.Event()
+    manager = make_queue(lambda contract_id: release.wait(2) and {"status": "pending_ai"})
+    monkeypatch.setattr(manager, "STATUS_LIST_LIMIT", 2)
+
+    manager.add_task("c-1")
+    assert wait_until(lambda: manager.current_tasks)
+    manager.add_tasks(["c-2", "c-3", "c-4"])
+
+    status = manager.get_queue_status()
+    assert status["queue_length"] == 3
+    assert status["queued_contracts"] == ["c-2", "c-3"]
+    assert status["in_flight"] == 1
+    release.set()
+
+
+def test_unacknowledged_task_is_reclaimed_after_visibility_timeout(make_queue):
+    crashed = make_queue(lambda contract_id: {"status": "pending_ai"})
+    # 模拟进程在处理中途退出：消息已领取但从未确认
+    crashed.stop(timeout=1)
+    crashed.add_task("c-1")
+    assert crashed._get_next_task(0)["contract_id"] == "c-1"
+
+    processed = []
+    survivor = make_queue(lambda contract_id: processed.append(contract_id) or {"status": "pending_ai"})
+
+    assert wait_until(lambda: processed == ["c-1"])
+    assert wait_until(lambda: survivor.get_queue_status()["in_flight"] == 0)
+
+
+def test_heartbeat_keeps_long_task_from_being_reclaimed(make_queue):
+    release = threading.Event()
+    calls = []
+
+    def slow(contract_id):
+        calls.append(contract_id)
+        release.wait(2)
+        return {"status": "pending_ai"}
+
+    other = make_queue(slow)
+    other.stop(timeout=1)
+    worker = make_queue(slow)
+    worker.add_task("c-1")
+
+    # 处理时间超过可见性超时的 3 倍，其他消费者也不会重复领取
+    time.sleep(1.0)
+    assert other._get_next_task(0) is None
+    assert calls == ["c-1"]
+    release.set()
+
+
+def test_ai_stage_uses_its_own_stream_and_keeps_retry_attempts(make_queue, monkeypatch):
+    monkeypatch.setattr(settings, "AI_MAX_RETRIES", 1)
+    monkeypatch.setattr(settings, "AI_RETRY_BACKOFF", 0.05)
+    attempts = []
+
+    def extract(contract_id):
+        attempts.append(contract_id)
+        return {"status": "error", "retryable": True}
+
+    ocr = make_queue(lambda contract_id: {"status": "pending_ai"})
+    ocr.stop(timeout=1)
+    ai = make_queue(extract, base=RedisAIQueueManager)
+    assert ai.stream == settings.AI_QUEUE_STREAM != ocr.stream
+
+    ai.add_task("c-1")
+
+    # 首次执行 + 重试 1 次后不再入队
+    assert wait_until(lambda: ai.stats()["processed"] == 2)
+    time.sleep(0.2)
+    assert attempts == ["c-1", "c-1"]
+    assert ai.stats()["retried"] == 1
+    assert ocr._redis.xlen(ocr.stream) == 0
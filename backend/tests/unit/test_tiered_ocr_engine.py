@@ -0,0 +1,111 @@
+"""Tests for tiered OCR escalation"""
+
+import pytest
+
+from app.core.config import settings
+from app.services.ocr_engine import OCREngine, PageOCRResult
+from app.services.tiered_ocr_engine import TieredOCREngine
+
+
+class ScriptedEngine(OCREngine):
+    """Returns a fixed result per image and counts calls"""
+
+    def __init__(self, name, results):
+        self.name = name
+        self.results = results
+        self.calls = 0
+
+    def extract_text_from_image(self, image_path, use_cache=True):
+        raise NotImplementedError
+
+    def extract_text_from_bytes(self, image_data):
+        raise NotImplementedError
+
+    def extract_text_from_page(self, image_data):
+        raise NotImplementedError
+
+    def recognize_page(self, image_data, use_cache=True):
+        self.calls += 1
+        result = self.results[image_data]
+        if isinstance(result, Exception):
+            raise result
+        return PageOCRResult(*result, tier=self.tier)
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_TIER_MIN_CONFIDENCE", 0.9)
+    fast = ScriptedEngine("fast", {
+        b"clause": ("第三条 本条款适用于双方之间的全部往来事项和后续补充约定", 0.95),
+        b"blurry": ("第三条 本条?款适?用", 0.6),
+        b"parties": ("甲方：某某公司 乙方：某某公司 金额：壹万元", 0.95),
+        b"broken": RuntimeError("model crashed"),
+    })
+    accurate = ScriptedEngine("accurate", {
+        key: ("精确识别结果", 0.99) for key in (b"clause", b"blurry", b"parties", b"broken")
+    })
+    return fast, accurate, TieredOCREngine(fast, accurate)
+
+
+def test_confident_pages_stay_on_fast_tier(engines):
+    fast, accurate, tiered = engines
+
+    result = tiered.recognize_page(b"clause")
+
+    assert result.tier == "fast"
+    assert accurate.calls == 0
+
+
+@pytest.mark.parametrize("page", [b"blurry", b"parties", b"broken"])
+def test_low_confidence_key_pages_and_failures_escalate(engines, page):
+    fast, accurate, tiered = engines
+
+    result = tiered.recognize_page(page)
+
+    # 关键词密集的页面即使置信度 0.95 也升级
+    assert result == PageOCRResult("精确识别结果", 0.99, "accurate")
+    assert tiered.stats()["escalations"] == 1
+
+
+def test_stats_record_pages_per_tier(engines):
+    fast, accurate, tiered = engines
+    for page in (b"clause", b"clause", b"blurry"):
+        tiered.recognize_page(page)
+
+    stats = tiered.stats()
+
+    assert stats["tiers"]["fast"]["pages"] == 3
+    assert stats["tiers"]["accurate"]["pages"] == 1
+    assert stats["escalations"] == 1
+    assert stats["fast_only_pages"] == 2
+
+
+def test_fast_tier_wraps_the_provider_engine():
+    from app.services.ocr_service import create_ocr_engine
+
+    engine = create_ocr_engine("baidu", fast_tier="baidu")
+
+    assert isinstance(engine, TieredOCREngine)
+    assert engine.tier == "baidu:general_basic>baidu:accurate_basic"
+    assert create_ocr_engine("baidu", fast_tier="").tier == "baidu:accurate_basic"
+
+
+def test_tiered_engine_stats_accumulate_across_ocr_services(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.core.config import settings
+    from app.main import app
+    from app.services import ocr_service
+
+    monkeypatch.setattr(settings, "OCR_FAST_TIER", "baidu")
+    monkeypatch.setattr(ocr_service, "_tiered_engines", {})
+    # process_ocr 为每个合同创建 OCRService，分级引擎和统计在进程内共享
+    first, second = ocr_service.OCRService(), ocr_service.OCRService()
+    assert first.engine is second.engine
+    first.engine._stats["baidu:general_basic"] = {"pages": 3, "seconds": 0.3}
+    first.engine.escalations = 1
+
+    response = TestClient(app).get("/health/metrics")
+
+    stats = response.json()["ocr_engines"]["baidu:general_basic>baidu:accurate_basic"]
+    assert stats["tiers"]["baidu:general_basic"]["pages"] == 3
+    assert stats["fast_only_pages"] == 2
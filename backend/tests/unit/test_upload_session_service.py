@@ -0,0 +1,124 @@
+"""Tests for resumable upload chunk handling"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.models.models import Contract, UploadSession
+from app.services.contract_service import UploadTooLargeError
+from app.services.upload_session_service import UploadSessionService, UploadOffsetError, UploadSessionError
+
+
+async def as_stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def write(service, upload_session, offset, *chunks) -> int:
+    return asyncio.run(service.write_chunk(upload_session, offset, as_stream(*chunks)))
+
+
+@pytest.fixture
+def upload_session(tmp_path):
+    temp_path = tmp_path / "session.part"
+    temp_path.touch()
+    return UploadSession(
+        contract_number="HT001",
+        contract_type="purchase",
+        filename="scan.pdf",
+        total_size=10,
+        received_size=0,
+        temp_path=str(temp_path),
+        status="uploading",
+    )
+
+
+def test_chunks_are_appended_at_offset(upload_session):
+    service = UploadSessionService()
+
+    upload_session.received_size = write(service, upload_session, 0, b"0123", b"45")
+    upload_session.received_size = write(service, upload_session, 6, b"6789")
+
+    assert upload_session.received_size == 10
+    assert open(upload_session.temp_path, "rb").read() == b"0123456789"
+
+
+def test_retransmitted_chunk_overwrites_tail(upload_session):
+    service = UploadSessionService()
+    upload_session.received_size = write(service, upload_session, 0, b"012345")
+
+    upload_session.received_size = write(service, upload_session, 4, b"45")
+
+    assert upload_session.received_size == 6
+    assert open(upload_session.temp_path, "rb").read() == b"012345"
+
+
+def test_gap_in_offsets_is_rejected(upload_session):
+    service = UploadSessionService()
+    upload_session.received_size = write(service, upload_session, 0, b"0123")
+
+    with pytest.raises(UploadOffsetError) as exc_info:
+        write(service, upload_session, 6, b"67")
+
+    assert exc_info.value.expected_offset == 4
+
+
+def test_chunk_beyond_declared_size_is_discarded(upload_session):
+    service = UploadSessionService()
+    upload_session.received_size = write(service, upload_session, 0, b"01234")
+
+    with pytest.raises(UploadTooLargeError):
+        write(service, upload_session, 5, b"56789", b"X")
+
+    assert open(upload_session.temp_path, "rb").read() == b"01234"
+
+
+def test_closed_session_rejects_chunks(upload_session):
+    upload_session.status = "completed"
+
+    with pytest.raises(UploadSessionError):
+        write(UploadSessionService(), upload_session, 0, b"0")
+
+
+def test_deleting_a_contract_detaches_its_upload_sessions():
+    (foreign_key,) = UploadSession.__table__.c.contract_id.foreign_keys
+
+    # 会话不阻止删除合同（否则 FOREIGN KEY constraint failed）
+    assert foreign_key.ondelete == "SET NULL"
+
+
+@pytest.mark.parametrize("status", ["ocr_processing", "pending_ai", "ai_processing"])
+def test_complete_refuses_to_append_to_contract_in_progress(upload_session, status):
+    upload_session.received_size = upload_session.total_size
+    open(upload_session.temp_path, "wb").write(b"0123456789")
+    contract = Contract(contract_number="HT001", contract_type="purchase", status=status)
+    db = MagicMock()
+    db.query.return_value.filter.return_value.with_for_update.return_value.first.return_value = contract
+    service = UploadSessionService()
+    service.contract_service = MagicMock()
+
+    with pytest.raises(UploadSessionError):
+        service.complete(db, upload_session)
+
+    # 会话保持 uploading，客户端可在处理结束后重试完成
+    assert upload_session.status == "uploading"
+    assert contract.status == status
+    service.contract_service.add_contract_file.assert_not_called()
+    db.commit.assert_not_called()
+
+
+def test_complete_appends_to_finished_contract(upload_session):
+    upload_session.received_size = upload_session.total_size
+    open(upload_session.temp_path, "wb").write(b"0123456789")
+    contract = Contract(contract_number="HT001", contract_type="purchase", status="pending_review")
+    db = MagicMock()
+    db.query.return_value.filter.return_value.with_for_update.return_value.first.return_value = contract
+    service = UploadSessionService()
+    service.contract_service = MagicMock()
+
+    assert service.complete(db, upload_session) is contract
+
+    assert contract.status == "pending_ocr"
+    assert upload_session.status == "completed"
+    service.contract_service.add_contract_file.assert_called_once()